@@ -0,0 +1,673 @@
+"""Vectorized access simulation for Immuta row-restriction policies
+
+A policy is evaluated for a table of users against a table of sample rows.
+Rules are applied top-down: the first rule whose inclusions match a user
+decides which rows that user sees, and later rules are ignored for them.
+Members of a rule's exception groups see all rows.
+
+Row columns are factorized once (distinct values plus one code per row), so
+predicate functions only run on distinct values, and group/attribute
+membership is a boolean user x token matrix. Row visibility is a boolean
+users x rows array computed in chunks of users, which keeps tens of
+thousands of users and rows to a few seconds.
+
+SQL NULL handling is simplified to two-valued logic: comparisons with NULL
+are false and NOT simply negates.
+"""
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from policy_cache import get_policy_cache
+from predicate_parser import (And, AttributeValuesContains, Call, Column, Comparison, Extract, InList,
+                              IsNull, Like, Literal, Not, Or, PredicateParseError, RegexpContains, Split,
+                              Truth, parse_expression, parse_predicate, to_sql)
+
+ROW_RESTRICTION_PREFIX = 'Row Restriction'
+DEFAULT_CHUNK_SIZE = 4096
+MAX_SYNTHETIC_ROWS = 5000
+
+_FLIPPED_OPERATORS = {'=': '=', '!=': '!=', '<>': '<>', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+# Nodes value() evaluates; anything else under Truth is itself a condition
+_SCALAR_NODES = (Literal, Column, Call, Split, Extract)
+_STRING_FUNCTIONS = {
+    'UPPER': lambda value: value.upper(),
+    'LOWER': lambda value: value.lower(),
+    'TRIM': lambda value: value.strip(),
+    'LTRIM': lambda value: value.lstrip(),
+    'RTRIM': lambda value: value.rstrip(),
+}
+
+
+class SimulationError(ValueError):
+    """Raised when a predicate uses something the simulator cannot evaluate"""
+
+
+# --- Row and user tables ---------------------------------------------------
+
+class _Const:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _Factor:
+    """Values of one expression over all rows: distinct values plus one code per row"""
+    __slots__ = ('uniques', 'codes')
+
+    def __init__(self, uniques: List[Any], codes: np.ndarray):
+        self.uniques = uniques
+        self.codes = codes
+
+    @classmethod
+    def from_values(cls, values: Sequence[Any]) -> '_Factor':
+        index = {}
+        uniques = []
+        codes = np.empty(len(values), dtype=np.intp)
+        for position, value in enumerate(values):
+            key = tuple(value) if isinstance(value, list) else value
+            code = index.get(key)
+            if code is None:
+                code = index[key] = len(uniques)
+                uniques.append(value)
+            codes[position] = code
+        return cls(uniques, codes)
+
+    def map(self, func: Callable[[Any], Any]) -> '_Factor':
+        return _Factor([func(value) for value in self.uniques], self.codes)
+
+    def test(self, func: Callable[[Any], bool]) -> np.ndarray:
+        """Boolean row mask of ``func`` evaluated once per distinct value"""
+        hits = np.fromiter((bool(func(value)) for value in self.uniques), dtype=bool, count=len(self.uniques))
+        return hits[self.codes]
+
+    def values(self) -> np.ndarray:
+        uniques = np.empty(len(self.uniques), dtype=object)
+        uniques[:] = self.uniques
+        return uniques[self.codes]
+
+
+class RowTable:
+    """Sample rows, with column lookups case-insensitive like BigQuery
+
+    Columns that are not present read as NULL.
+    """
+
+    def __init__(self, rows: Sequence[Dict[str, Any]]):
+        self.rows = list(rows)
+        self._names = {}
+        for row in self.rows:
+            for name in row:
+                self._names.setdefault(name.lower(), name)
+        self._factors: Dict[str, _Factor] = {}
+
+    @classmethod
+    def from_csv(cls, text: str) -> 'RowTable':
+        """Rows from CSV text; empty cells are NULL"""
+        reader = csv.DictReader(io.StringIO(text))
+        return cls([{name: (value if value != '' else None) for name, value in row.items()} for row in reader])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def factor(self, name: str) -> _Factor:
+        key = name.lower()
+        if key not in self._factors:
+            column = self._names.get(key)
+            values = [row.get(column) for row in self.rows] if column else [None] * len(self.rows)
+            self._factors[key] = _Factor.from_values(values)
+        return self._factors[key]
+
+
+class UserTable:
+    """Users with their groups and attributes, indexed for vectorized rule matching
+
+    Each user is a dict like ``{"name": ..., "groups": [...],
+    "attributes": {"EntraID.department": ["ECM"]}}``; attribute values may be
+    a single value or a list.
+    """
+
+    def __init__(self, users: Sequence[Dict[str, Any]]):
+        self.users = list(users)
+        self.names = [str(user.get('name', f"user {index + 1}")) for index, user in enumerate(self.users)]
+        self._tokens: Dict[Tuple[str, ...], int] = {}
+        self._attribute_pairs: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+        self._attribute_columns: Dict[Tuple, np.ndarray] = {}
+        user_positions, token_positions = [], []
+        for position, user in enumerate(self.users):
+            for token in self._user_tokens(user):
+                user_positions.append(position)
+                token_positions.append(self._tokens.setdefault(token, len(self._tokens)))
+        # One extra all-False column stands in for tokens no user has
+        self._membership = np.zeros((len(self.users), len(self._tokens) + 1), dtype=bool)
+        self._membership[user_positions, token_positions] = True
+        self._audiences: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_json(cls, text: str) -> 'UserTable':
+        import json
+        data = json.loads(text)
+        return cls(data.get('users', []) if isinstance(data, dict) else data)
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    @staticmethod
+    def _attribute_values(user: Dict[str, Any]) -> Iterator[Tuple[str, Any]]:
+        for name, values in (user.get('attributes') or {}).items():
+            for value in values if isinstance(values, (list, tuple, set)) else [values]:
+                yield name, value
+
+    def _user_tokens(self, user: Dict[str, Any]) -> Iterator[Tuple[str, ...]]:
+        for group in user.get('groups') or []:
+            yield ('group', group)
+        for name, value in self._attribute_values(user):
+            yield ('attribute', name, str(value))
+
+    def audience(self, groups: Sequence[str], attributes: Sequence[Dict], operator: str) -> np.ndarray:
+        """Users matching any (or all) of the given groups and attributes"""
+        tokens = [('group', group) for group in groups]
+        tokens += [('attribute', attr.get('name', ''), str(attr.get('value', ''))) for attr in attributes]
+        key = (operator, tuple(tokens))
+        if key not in self._audiences:
+            missing = self._membership.shape[1] - 1
+            columns = self._membership[:, [self._tokens.get(token, missing) for token in tokens]]
+            if not tokens:
+                self._audiences[key] = np.zeros(len(self.users), dtype=bool)
+            elif operator == 'all':
+                self._audiences[key] = columns.all(axis=1)
+            else:
+                self._audiences[key] = columns.any(axis=1)
+        return self._audiences[key]
+
+    def attribute_matrix(self, attribute: str, values: Sequence[Any], user_index: np.ndarray) -> np.ndarray:
+        """users[user_index] x values, True where the user holds the value for ``attribute``"""
+        if attribute not in self._attribute_pairs:
+            positions, held = [], []
+            for position, user in enumerate(self.users):
+                for name, value in self._attribute_values(user):
+                    if name == attribute:
+                        positions.append(position)
+                        held.append(str(value))
+            self._attribute_pairs[attribute] = (np.array(positions, dtype=np.intp), held)
+
+        positions, held = self._attribute_pairs[attribute]
+        key = (attribute, tuple(str(value) if value is not None else None for value in values))
+        columns = self._attribute_columns.get(key)
+        if columns is None:
+            index = {value: column for column, value in enumerate(key[1]) if value is not None}
+            columns = self._attribute_columns[key] = np.array([index.get(value, -1) for value in held], dtype=np.intp)
+        # Map absolute user positions to rows of the result
+        row_of_user = np.full(len(self.users), -1, dtype=np.intp)
+        row_of_user[user_index] = np.arange(len(user_index))
+        rows = row_of_user[positions] if len(positions) else positions
+        keep = (columns >= 0) & (rows >= 0)
+        matrix = np.zeros((len(user_index), len(values)), dtype=bool)
+        matrix[rows[keep], columns[keep]] = True
+        return matrix
+
+
+# --- Predicate evaluation --------------------------------------------------
+
+def _coerce_pair(left, right):
+    if isinstance(left, str) and isinstance(right, (int, float)) and not isinstance(right, bool):
+        return float(left), right
+    if isinstance(right, str) and isinstance(left, (int, float)) and not isinstance(left, bool):
+        return left, float(right)
+    if isinstance(left, (date, datetime)) and isinstance(right, str):
+        return left.isoformat(), right
+    return left, right
+
+
+def _compare(left, op: str, right) -> bool:
+    if left is None or right is None:
+        return False
+    try:
+        left, right = _coerce_pair(left, right)
+        if op == '=':
+            return left == right
+        if op in ('!=', '<>'):
+            return left != right
+        if op == '<':
+            return left < right
+        if op == '<=':
+            return left <= right
+        if op == '>':
+            return left > right
+        if op == '>=':
+            return left >= right
+    except (TypeError, ValueError):
+        return False
+    return False
+
+
+def _extract_part(part: str, value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+    attribute = {'YEAR': 'year', 'MONTH': 'month', 'DAY': 'day'}.get(part)
+    return getattr(value, attribute, None) if attribute else None
+
+
+def _like_pattern(pattern: str) -> re.Pattern:
+    parts = []
+    for char in pattern:
+        parts.append('.*' if char == '%' else '.' if char == '_' else re.escape(char))
+    return re.compile(''.join(parts) + r'\Z', re.DOTALL)
+
+
+def _split_part(delimiter: str, offset: int) -> Callable[[Any], Any]:
+    def split(value):
+        if value is None:
+            return None
+        parts = str(value).split(delimiter)
+        return parts[offset] if 0 <= offset < len(parts) else None
+    return split
+
+
+class _Evaluator:
+    """Evaluates predicate ASTs to row masks (rows,) or user x row masks (users, rows)
+
+    User-dependent conditions are evaluated only for ``user_index``.
+    """
+
+    def __init__(self, rows: RowTable, users: UserTable, user_index: np.ndarray):
+        self.rows = rows
+        self.users = users
+        self.user_index = user_index
+
+    def _full(self, value: bool) -> np.ndarray:
+        return np.full(len(self.rows), bool(value))
+
+    def condition(self, node) -> np.ndarray:
+        if isinstance(node, And):
+            result = self.condition(node.items[0])
+            for item in node.items[1:]:
+                result = result & self.condition(item)
+            return result
+        if isinstance(node, Or):
+            result = self.condition(node.items[0])
+            for item in node.items[1:]:
+                result = result | self.condition(item)
+            return result
+        if isinstance(node, Not):
+            return ~self.condition(node.item)
+        if isinstance(node, Truth):
+            if not isinstance(node.expr, _SCALAR_NODES):
+                # Function-style conditions such as REGEXP_CONTAINS(...) parse as Truth(...)
+                return self.condition(node.expr)
+            value = self.value(node.expr)
+            truthy = lambda v: v is not None and v is not False and v != 0 and str(v).lower() != 'false'
+            return self._full(truthy(value.value)) if isinstance(value, _Const) else value.test(truthy)
+        if isinstance(node, Comparison):
+            return self._comparison(node)
+        if isinstance(node, InList):
+            members = set()
+            for item in node.values:
+                value = self.value(item)
+                if not isinstance(value, _Const):
+                    raise SimulationError(f"IN list values must be literals: {to_sql(node)}")
+                members.add(value.value)
+            members = {str(member) for member in members if member is not None} | members
+            test = lambda v: v is not None and (v in members or str(v) in members)
+            return self._test(node.expr, (lambda v: v is not None and not test(v)) if node.negated else test)
+        if isinstance(node, Like):
+            pattern = _like_pattern(node.pattern)
+            test = lambda v: v is not None and pattern.match(str(v)) is not None
+            return self._test(node.expr, (lambda v: v is not None and not test(v)) if node.negated else test)
+        if isinstance(node, IsNull):
+            return self._test(node.expr, (lambda v: v is not None) if node.negated else (lambda v: v is None))
+        if isinstance(node, RegexpContains):
+            pattern = re.compile(node.pattern)
+            return self._test(node.expr, lambda v: v is not None and pattern.search(str(v)) is not None)
+        if isinstance(node, AttributeValuesContains):
+            return self._attribute_values_contains(node)
+        raise SimulationError(f"Unsupported condition: {to_sql(node)}")
+
+    def _test(self, expr, func: Callable[[Any], bool]) -> np.ndarray:
+        value = self.value(expr)
+        return self._full(func(value.value)) if isinstance(value, _Const) else value.test(func)
+
+    def _comparison(self, node: Comparison) -> np.ndarray:
+        left, right = self.value(node.left), self.value(node.right)
+        if isinstance(left, _Const) and isinstance(right, _Const):
+            return self._full(_compare(left.value, node.op, right.value))
+        if isinstance(right, _Const):
+            return left.test(lambda v: _compare(v, node.op, right.value))
+        if isinstance(left, _Const):
+            flipped = _FLIPPED_OPERATORS[node.op]
+            return right.test(lambda v: _compare(v, flipped, left.value))
+        compare = np.frompyfunc(lambda a, b: _compare(a, node.op, b), 2, 1)
+        return compare(left.values(), right.values()).astype(bool)
+
+    def _attribute_values_contains(self, node: AttributeValuesContains) -> np.ndarray:
+        try:
+            value = self.value(parse_expression(node.expression))
+        except PredicateParseError as e:
+            raise SimulationError(f"Unsupported expression {node.expression!r}: {e}")
+        if isinstance(value, _Const):
+            value = _Factor([value.value], np.zeros(len(self.rows), dtype=np.intp))
+        matrix = self.users.attribute_matrix(node.attribute, value.uniques, self.user_index)
+        return matrix[:, value.codes]
+
+    def value(self, node) -> Union[_Const, _Factor]:
+        if isinstance(node, Literal):
+            return _Const(node.value)
+        if isinstance(node, Column):
+            return self.rows.factor(node.name)
+        if isinstance(node, Split):
+            return self._apply(node.expr, _split_part(node.delimiter, node.offset))
+        if isinstance(node, Extract):
+            return self._apply(node.expr, lambda v: _extract_part(node.part, v))
+        if isinstance(node, Call) and node.name.upper() in _STRING_FUNCTIONS and len(node.args) == 1:
+            func = _STRING_FUNCTIONS[node.name.upper()]
+            return self._apply(node.args[0], lambda v: func(str(v)) if v is not None else None)
+        raise SimulationError(f"Unsupported expression: {to_sql(node)}")
+
+    def _apply(self, expr, func: Callable[[Any], Any]) -> Union[_Const, _Factor]:
+        value = self.value(expr)
+        return _Const(func(value.value)) if isinstance(value, _Const) else value.map(func)
+
+
+# --- Policies --------------------------------------------------------------
+
+@dataclass
+class SimulatedRule:
+    """One row-restriction rule prepared for simulation"""
+    number: int
+    rule_type: str
+    groups: List[str]
+    attributes: List[Dict]
+    operator: str
+    exception_groups: List[str]
+    exception_attributes: List[Dict]
+    node: Any
+
+
+def _extract_rules(config: Dict) -> List[Dict]:
+    rules = []
+    for action in (config or {}).get('actions', []) or []:
+        rules.extend(action.get('rules', []) or [])
+    return rules
+
+
+class AccessSimulator:
+    """Top-down, first-match evaluation of one policy for users x rows"""
+
+    def __init__(self, policy: Union[str, Dict]):
+        config = get_policy_cache().parse_text(policy) if isinstance(policy, str) else policy
+        self.rules: List[SimulatedRule] = []
+        self.warnings: List[str] = []
+        for number, rule in enumerate(_extract_rules(config), 1):
+            self._add_rule(number, rule)
+
+    def _add_rule(self, number: int, rule: Dict):
+        config = rule.get('config', {}) or {}
+        rule_type = rule.get('type', config.get('type', ''))
+        if not rule_type.startswith(ROW_RESTRICTION_PREFIX):
+            return
+        if config.get('matches') or 'predicate' not in config:
+            self.warnings.append(f"Rule {number} ({rule_type}) cannot be simulated and was skipped")
+            return
+        try:
+            node = parse_predicate(config.get('predicate', ''))
+        except PredicateParseError as e:
+            self.warnings.append(f"Rule {number} was skipped: {e}")
+            return
+
+        inclusions = rule.get('inclusions', config.get('inclusions', {})) or {}
+        exceptions = rule.get('exceptions', config.get('exceptions', {})) or {}
+        operator = inclusions.get('operator', rule.get('operator', config.get('operator', 'any')))
+        self.rules.append(SimulatedRule(
+            number=number,
+            rule_type=rule_type,
+            groups=list(inclusions.get('groups', []) or []),
+            attributes=list(inclusions.get('attributes', []) or []),
+            operator=operator,
+            exception_groups=list(exceptions.get('groups', []) or []),
+            exception_attributes=list(exceptions.get('attributes', []) or []),
+            node=node,
+        ))
+
+    def iter_visible(self, users: UserTable, rows: RowTable,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        """Yield (start, stop, visible, undetermined) for users[start:stop]
+
+        visible is a users x rows boolean array; undetermined marks users
+        decided by a rule that could not be evaluated, whose rows are unknown.
+        Every user is decided by one rule at most, so each rule only writes
+        the rows of the users it applies to.
+        """
+        row_masks: Dict[int, np.ndarray] = {}
+        failed = set()
+        for start in range(0, max(len(users), 1), chunk_size):
+            stop = min(start + chunk_size, len(users))
+            remaining = np.ones(stop - start, dtype=bool)
+            undetermined = np.zeros(stop - start, dtype=bool)
+            visible = np.zeros((stop - start, len(rows)), dtype=bool)
+
+            for index, rule in enumerate(self.rules):
+                if rule.groups or rule.attributes:
+                    applies = users.audience(rule.groups, rule.attributes, rule.operator)[start:stop] & remaining
+                else:
+                    applies = remaining.copy()
+                if rule.exception_groups or rule.exception_attributes:
+                    exempt = applies & users.audience(rule.exception_groups, rule.exception_attributes, 'any')[start:stop]
+                    visible[exempt] = True
+                    remaining &= ~exempt
+                    applies &= ~exempt
+                chunk_index = np.nonzero(applies)[0]
+                if not len(chunk_index):
+                    continue
+
+                mask = row_masks.get(index)
+                if mask is None and index not in failed:
+                    try:
+                        mask = _Evaluator(rows, users, chunk_index + start).condition(rule.node)
+                    except SimulationError as e:
+                        self.warnings.append(f"Rule {rule.number} could not be evaluated: {e}")
+                        failed.add(index)
+                    else:
+                        if mask.ndim == 1:
+                            row_masks[index] = mask
+                if mask is None:
+                    # The rule still decides these users (first match), but their rows are unknown
+                    undetermined[chunk_index] = True
+                else:
+                    visible[chunk_index] = mask
+                remaining[chunk_index] = False
+
+            yield start, stop, visible, undetermined
+
+    def visible(self, users: UserTable, rows: RowTable) -> np.ndarray:
+        """users x rows boolean array of the rows each user sees
+
+        Users decided by a rule that could not be evaluated see no rows here;
+        iter_visible() reports them separately.
+        """
+        chunks = [visible for _, _, visible, _ in self.iter_visible(users, rows)]
+        return np.vstack(chunks) if chunks else np.zeros((0, len(rows)), dtype=bool)
+
+
+@dataclass
+class AccessDelta:
+    """Per-user row counts before and after a policy change
+
+    Users whose rows are unknown under either policy (a rule deciding them
+    could not be evaluated) are flagged in ``undetermined`` and have no delta.
+    """
+    users: List[str]
+    row_count: int
+    old_visible: np.ndarray
+    new_visible: np.ndarray
+    gained: np.ndarray
+    lost: np.ndarray
+    warnings: List[str] = field(default_factory=list)
+    undetermined: Optional[np.ndarray] = None
+
+    def __post_init__(self):
+        if self.undetermined is None:
+            self.undetermined = np.zeros(len(self.users), dtype=bool)
+
+    def changed_users(self) -> List[Dict]:
+        changed = np.nonzero((self.gained > 0) | (self.lost > 0))[0]
+        return [{
+            "user": self.users[index],
+            "rows_before": int(self.old_visible[index]),
+            "rows_after": int(self.new_visible[index]),
+            "rows_gained": int(self.gained[index]),
+            "rows_lost": int(self.lost[index]),
+        } for index in changed]
+
+    def undetermined_users(self) -> List[str]:
+        return [self.users[index] for index in np.nonzero(self.undetermined)[0]]
+
+    def summary(self) -> Dict:
+        return {
+            "users": len(self.users),
+            "rows": self.row_count,
+            "users_gained_rows": int(np.count_nonzero(self.gained)),
+            "users_lost_rows": int(np.count_nonzero(self.lost)),
+            "users_undetermined": int(np.count_nonzero(self.undetermined)),
+            "warnings": list(self.warnings),
+        }
+
+
+def compare_access(old_policy: Union[str, Dict], new_policy: Union[str, Dict], users: UserTable,
+                   rows: RowTable, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AccessDelta:
+    """Exact before/after access delta of a policy change for the given users and rows"""
+    old_simulator, new_simulator = AccessSimulator(old_policy), AccessSimulator(new_policy)
+    counts = {name: np.zeros(len(users), dtype=np.int64) for name in ('old', 'new', 'gained', 'lost')}
+    undetermined = np.zeros(len(users), dtype=bool)
+    chunks = zip(old_simulator.iter_visible(users, rows, chunk_size),
+                 new_simulator.iter_visible(users, rows, chunk_size))
+    for (start, stop, before, old_unknown), (_, _, after, new_unknown) in chunks:
+        unknown = old_unknown | new_unknown
+        undetermined[start:stop] = unknown
+        counts['old'][start:stop] = before.sum(axis=1)
+        counts['new'][start:stop] = after.sum(axis=1)
+        counts['gained'][start:stop] = np.where(unknown, 0, (after & ~before).sum(axis=1))
+        counts['lost'][start:stop] = np.where(unknown, 0, (before & ~after).sum(axis=1))
+
+    warnings = [f"Old policy: {w}" for w in dict.fromkeys(old_simulator.warnings)]
+    warnings += [f"New policy: {w}" for w in dict.fromkeys(new_simulator.warnings)]
+    if undetermined.any():
+        warnings.append(f"{int(np.count_nonzero(undetermined))} user(s) are decided by a rule that could not "
+                        f"be evaluated; their access change is unknown")
+    return AccessDelta(users.names, len(rows), counts['old'], counts['new'],
+                       counts['gained'], counts['lost'], warnings, undetermined)
+
+
+# --- Synthetic users and rows ----------------------------------------------
+
+def _walk(node) -> Iterator[Any]:
+    yield node
+    for child in getattr(node, 'items', ()) or ():
+        yield from _walk(child)
+    for name in ('item', 'expr'):
+        child = getattr(node, name, None)
+        if child is not None and not isinstance(child, (str, int, float)):
+            yield from _walk(child)
+
+
+def synthetic_users(*policies: Union[str, Dict]) -> UserTable:
+    """One user per group and attribute named in the policies, plus one with neither
+
+    Attributes read by @attributeValuesContains get one user per literal value
+    that appears in the policies' IN lists and equalities.
+    """
+    users, seen = [], set()
+    for policy in policies:
+        rules = AccessSimulator(policy).rules
+        literals = {str(row_value) for rule in rules for row in _witness_rows(rule.node) for row_value in row.values()}
+        for rule in rules:
+            for node in _walk(rule.node):
+                if isinstance(node, AttributeValuesContains):
+                    for value in sorted(literals):
+                        if ('attribute', node.attribute, value) not in seen:
+                            seen.add(('attribute', node.attribute, value))
+                            users.append({"name": f"{node.attribute}={value}", "attributes": {node.attribute: [value]}})
+            for group in rule.groups + rule.exception_groups:
+                if ('group', group) not in seen:
+                    seen.add(('group', group))
+                    users.append({"name": group, "groups": [group]})
+            for attr in rule.attributes + rule.exception_attributes:
+                name, value = attr.get('name', ''), attr.get('value', '')
+                if ('attribute', name, value) not in seen:
+                    seen.add(('attribute', name, value))
+                    users.append({"name": f"{name}={value}", "attributes": {name: [value]}})
+    users.append({"name": "(no groups)"})
+    return UserTable(users)
+
+
+def _witness_column(expr) -> Optional[Tuple[str, Callable[[Any], Any]]]:
+    """Column an expression reads and how to build a cell that yields a given value"""
+    if isinstance(expr, Column):
+        return expr.name, lambda value: value
+    if isinstance(expr, Split) and isinstance(expr.expr, Column):
+        return expr.expr.name, lambda value: expr.delimiter * expr.offset + str(value)
+    return None
+
+
+def _witness_rows(node) -> List[Dict[str, Any]]:
+    """Partial rows that satisfy the membership parts of a predicate"""
+    if isinstance(node, Or):
+        return [row for item in node.items for row in _witness_rows(item)]
+    if isinstance(node, And):
+        rows = [{}]
+        for item in node.items:
+            options = _witness_rows(item)
+            if not options:
+                continue
+            rows = [{**row, **options[0]} for row in rows] + [{**rows[0], **option} for option in options[1:]]
+        return rows if rows != [{}] else []
+    values = []
+    if isinstance(node, InList) and not node.negated:
+        target, values = node.expr, [v.value for v in node.values if isinstance(v, Literal)]
+    elif isinstance(node, Comparison) and node.op == '=':
+        if isinstance(node.right, Literal):
+            target, values = node.left, [node.right.value]
+        elif isinstance(node.left, Literal):
+            target, values = node.right, [node.left.value]
+    if not values:
+        return []
+    witness = _witness_column(target)
+    if witness is None:
+        return []
+    column, cell = witness
+    return [{column: cell(value)} for value in values]
+
+
+def synthetic_rows(*policies: Union[str, Dict]) -> RowTable:
+    """Sample rows covering every IN-list and equality value in the policies, plus an empty row"""
+    rows, seen = [], set()
+    for policy in policies:
+        for rule in AccessSimulator(policy).rules:
+            for row in [{}] + _witness_rows(rule.node):
+                key = tuple(sorted((name, str(value)) for name, value in row.items()))
+                if key not in seen and len(rows) < MAX_SYNTHETIC_ROWS:
+                    seen.add(key)
+                    rows.append(row)
+    return RowTable(rows)
+
+
+def simulate_policy_change(old_yaml: str, new_yaml: str, users: Optional[UserTable] = None,
+                           rows: Optional[RowTable] = None) -> AccessDelta:
+    """Access delta between two policy YAML texts
+
+    Without explicit users or rows, synthetic ones are built from the groups,
+    attributes and predicate values of both policies.
+    """
+    cache = get_policy_cache()
+    old_config, new_config = cache.parse_text(old_yaml), cache.parse_text(new_yaml)
+    users = users if users is not None else synthetic_users(old_config, new_config)
+    rows = rows if rows is not None else synthetic_rows(old_config, new_config)
+    return compare_access(old_config, new_config, users, rows)
@@ -0,0 +1,342 @@
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from immuta_rule_explainer_improved import GENERATOR_VERSION, ImmutaRuleExplainer
+from generation_manifest import GenerationManifest, plan_incremental, try_hash_file
+from instrumentation import collect, file_scope
+
+SUPPORTED_FORMATS = ('docx', 'pdf', 'md')
+DEFAULT_FORMATS = ('docx', 'pdf')
+DEFAULT_NAME_TEMPLATE = "{dataset_name}_explanation.{fmt}"
+
+# Files queued per worker process; keeps a huge batch from queueing every file at once
+JOBS_PER_WORKER = 2
+
+# One explainer per worker process, created on first use
+_worker_explainer = None
+
+
+def default_worker_count() -> int:
+    """Number of worker processes to use when none is configured"""
+    return max(1, os.cpu_count() or 1)
+
+
+def find_yaml_files(input_dir: str) -> List[Path]:
+    """Find all YAML files in a folder in a stable order"""
+    input_path = Path(input_dir)
+    yaml_files = list(input_path.glob("*.yaml")) + list(input_path.glob("*.yml"))
+    return sorted(yaml_files)
+
+
+def iter_yaml_files(input_dir: str) -> Iterator[str]:
+    """Paths of the YAML files in a folder, in the same order as find_yaml_files
+
+    Only the names are sorted, so large folders don't build a Path per file.
+    """
+    names = sorted(entry.name for entry in os.scandir(input_dir)
+                   if entry.name.endswith(('.yaml', '.yml')) and not entry.name.startswith('.')
+                   and entry.is_file())
+    for name in names:
+        yield os.path.join(input_dir, name)
+
+
+def _get_worker_explainer() -> ImmutaRuleExplainer:
+    global _worker_explainer
+    if _worker_explainer is None:
+        _worker_explainer = ImmutaRuleExplainer()
+    return _worker_explainer
+
+
+def _new_result(index: int, yaml_file: str) -> Dict:
+    return {
+        "index": index,
+        "file": yaml_file,
+        "name": os.path.basename(yaml_file),
+        "dataset_name": Path(yaml_file).stem,
+        "sha256": None,
+        "outputs": [],
+        "targets": {},
+        "pending": [],
+        "errors": [],
+        "success": False,
+        "skipped": False,
+        "parsed": False,
+        "timings": {},
+        "memory_peaks_kb": {},
+    }
+
+
+def _check_formats(formats: Iterable[str]) -> tuple:
+    formats = tuple(formats)
+    if not formats:
+        raise ValueError("No output formats selected")
+    unsupported = [fmt for fmt in formats if fmt not in SUPPORTED_FORMATS]
+    if unsupported:
+        raise ValueError(f"Unsupported output format(s): {', '.join(unsupported)}")
+    return formats
+
+
+def _run_scoped(file_name: str, timings: bool, trace_memory: bool, func, *args) -> Dict:
+    """Call func for one file, adding its per-stage timings to the result when asked"""
+    with file_scope(file_name):
+        if not timings:
+            return func(*args)
+        with collect(trace_memory) as collector:
+            result = func(*args)
+    result["timings"] = collector.timings()
+    result["memory_peaks_kb"] = collector.peaks()
+    return result
+
+
+def process_file(index: int, file_path: str, output_dir: str, formats: Iterable[str],
+                 timings: bool = False, trace_memory: bool = False,
+                 name_template: str = DEFAULT_NAME_TEMPLATE) -> Dict:
+    """Run parse -> explain -> DOCX / PDF / Markdown for a single YAML file
+
+    Outputs are written to temporary ``.partial`` files next to their final
+    location; ``BatchProcessor`` moves them into place so that files sharing a
+    dataset name resolve exactly as they would in a serial run. Outputs are
+    named with ``name_template`` as in iter_documents(). With
+    ``timings`` the result carries milliseconds per stage (and, with
+    ``trace_memory``, the traced memory peak per stage in KB).
+    """
+    return _run_scoped(os.path.basename(file_path), timings, trace_memory,
+                       _process_file, index, file_path, output_dir, formats, name_template)
+
+
+def _process_file(index: int, file_path: str, output_dir: str, formats: Iterable[str],
+                  name_template: str) -> Dict:
+    yaml_file = Path(file_path)
+    result = _new_result(index, str(yaml_file))
+    # Hashed before parsing, so the manifest never pairs new outputs with a later edit
+    result["sha256"] = try_hash_file(str(yaml_file))
+
+    try:
+        explainer = _get_worker_explainer()
+        explained = explainer.explain_yaml_file(str(yaml_file))
+        if explained.document is None:
+            result["errors"].append(f"Failed to process: {yaml_file.name}")
+            return result
+
+        dataset_name = explained.dataset_name
+        result["dataset_name"] = dataset_name
+        result["parsed"] = explained.parsed
+
+        for fmt in formats:
+            final_path = Path(output_dir) / name_template.format(dataset_name=dataset_name, stem=yaml_file.stem,
+                                                                 fmt=fmt)
+            result["targets"][fmt] = str(final_path)
+            partial_path = final_path.with_name(f"{final_path.name}.{os.getpid()}.{index}.partial")
+            try:
+                explainer.render(explained, fmt, str(partial_path))
+                result["pending"].append((str(partial_path), str(final_path)))
+            except Exception as e:
+                if partial_path.exists():
+                    partial_path.unlink()
+                result["errors"].append(f"{fmt.upper()} generation failed for {yaml_file.name}: {e}")
+
+        result["success"] = not result["errors"]
+    except Exception as e:
+        result["errors"].append(f"Error processing {yaml_file.name}: {e}")
+
+    return result
+
+
+def iter_documents(yaml_files: Iterable, sink, formats: Iterable[str] = DEFAULT_FORMATS,
+                   explainer: Optional[ImmutaRuleExplainer] = None, name_template: str = DEFAULT_NAME_TEMPLATE,
+                   timings: bool = False, trace_memory: bool = False) -> Iterator[Dict]:
+    """Explain and render files one at a time, yielding each result as soon as its outputs are in sink
+
+    ``yaml_files`` may be any iterable, including a generator such as
+    iter_yaml_files(); files are read only when the next result is requested
+    and nothing is kept once a result has been yielded, so memory stays flat
+    however many files there are. ``sink`` is an output_sinks sink
+    (DirectorySink, ZipArchiveSink or InMemorySink); outputs are named with
+    ``name_template`` from ``dataset_name``, ``stem`` (the YAML file name
+    without extension) and ``fmt``. A result's ``outputs`` are the names the
+    sink returned.
+    """
+    formats = _check_formats(formats)
+    explainer = explainer or _get_worker_explainer()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for index, yaml_file in enumerate(yaml_files):
+            yaml_file = str(yaml_file)
+            yield _run_scoped(os.path.basename(yaml_file), timings, trace_memory, _stream_file,
+                              index, yaml_file, explainer, sink, formats, name_template, temp_dir)
+
+
+def _stream_file(index: int, yaml_file: str, explainer: ImmutaRuleExplainer, sink, formats: tuple,
+                 name_template: str, temp_dir: str) -> Dict:
+    result = _new_result(index, yaml_file)
+    del result["pending"]
+    try:
+        explained = explainer.explain_yaml_file(yaml_file)
+        if explained.document is None:
+            result["errors"].append(f"Failed to process: {result['name']}")
+            return result
+        result["dataset_name"] = explained.dataset_name
+        result["parsed"] = explained.parsed
+
+        stem = Path(yaml_file).stem
+        for fmt in formats:
+            temp_path = os.path.join(temp_dir, f"{index}.{fmt}")
+            try:
+                explainer.render(explained, fmt, temp_path)
+                name = name_template.format(dataset_name=explained.dataset_name, stem=stem, fmt=fmt)
+                location = sink.add_file(temp_path, name, remove=True)
+                result["targets"][fmt] = location
+                result["outputs"].append(location)
+            except Exception as e:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                result["errors"].append(f"{fmt.upper()} generation failed for {result['name']}: {e}")
+
+        result["success"] = not result["errors"]
+    except Exception as e:
+        result["errors"].append(f"Error processing {result['name']}: {e}")
+    return result
+
+
+class BatchProcessor:
+    """Generate documents for many YAML files using a pool of worker processes"""
+
+    def __init__(self, output_dir: str, formats: Iterable[str] = DEFAULT_FORMATS,
+                 workers: Optional[int] = None, timings: bool = False, trace_memory: bool = False,
+                 name_template: str = DEFAULT_NAME_TEMPLATE):
+        self.output_dir = str(output_dir)
+        self.formats = _check_formats(formats)
+        self.workers = workers if workers else default_worker_count()
+        # Per-stage timings (and tracemalloc peaks) in each result, off by default
+        self.timings = timings or trace_memory
+        self.trace_memory = trace_memory
+        self.name_template = name_template
+
+        # Output path -> index of the input file that currently owns it
+        self._owners = {}
+
+    def run(self, yaml_files: Iterable, on_result: Optional[Callable[[Dict], None]] = None,
+            changed_only: bool = False) -> List[Dict]:
+        """Process files and call on_result for each one as soon as it finishes
+
+        With ``changed_only`` inputs whose content hash, generator version and
+        outputs match the manifest in the output folder are skipped and
+        reported with ``skipped`` set. Results are returned in input order
+        regardless of completion order; use iter_run() to avoid keeping them.
+        """
+        results = []
+        for result in self.iter_run(yaml_files, changed_only):
+            results.append(result)
+            if on_result:
+                on_result(result)
+        results.sort(key=lambda r: r["index"])
+        return results
+
+    def iter_run(self, yaml_files: Iterable, changed_only: bool = False) -> Iterator[Dict]:
+        """Yield each file's result as soon as it finishes, in completion order
+
+        Only a few files per worker are queued at a time and results are not
+        kept, so memory doesn't grow with the number of files. Skipped files
+        are reported last. The manifest is saved when the iteration ends,
+        including when the caller stops early.
+        """
+        yaml_files = [str(f) for f in yaml_files]
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._owners = {}
+
+        manifest = GenerationManifest.load(self.output_dir, GENERATOR_VERSION)
+        if changed_only:
+            digests = {yaml_file: try_hash_file(yaml_file) for yaml_file in yaml_files}
+            to_generate, to_skip = plan_incremental(manifest, yaml_files, self.formats, digests)
+        else:
+            # Workers hash their own file, so the first results don't wait for a hashing pass
+            digests, to_generate, to_skip = {}, yaml_files, []
+
+        positions = {yaml_file: index for index, yaml_file in enumerate(yaml_files)}
+        written = set()
+        try:
+            for result in self._iter_batch([(positions[f], f) for f in to_generate]):
+                written.update(result["targets"].values())
+                self._record(manifest, result, digests)
+                yield result
+
+            # A changed input may have started writing to a file owned by a skipped
+            # one (e.g. its dataset name changed); regenerate those too
+            collided = [f for f in to_skip
+                        if written.intersection(os.path.join(self.output_dir, name)
+                                                for name in manifest.outputs_for(f).values())]
+            for result in self._iter_batch([(positions[f], f) for f in collided]):
+                self._record(manifest, result, digests)
+                yield result
+
+            collided = set(collided)
+            for yaml_file in to_skip:
+                if yaml_file in collided:
+                    continue
+                result = _new_result(positions[yaml_file], yaml_file)
+                del result["pending"]
+                recorded = manifest.outputs_for(yaml_file)
+                result["outputs"] = [os.path.join(self.output_dir, recorded[fmt]) for fmt in self.formats]
+                result["success"] = True
+                result["skipped"] = True
+                result["parsed"] = True
+                yield result
+        finally:
+            try:
+                manifest.save()
+            except OSError as e:
+                print(f"Could not save manifest {manifest.path}: {e}")
+
+    @staticmethod
+    def _record(manifest: GenerationManifest, result: Dict, digests: Dict[str, Optional[str]]):
+        digest = digests.get(result["file"]) or result.get("sha256")
+        if result["success"] and digest:
+            manifest.record(result["file"], digest, result["targets"])
+
+    def _iter_batch(self, jobs: List) -> Iterator[Dict]:
+        if self.workers <= 1 or len(jobs) <= 1:
+            for index, yaml_file in jobs:
+                result = process_file(index, yaml_file, self.output_dir, self.formats,
+                                      self.timings, self.trace_memory, self.name_template)
+                self._commit_outputs(result)
+                yield result
+            return
+
+        workers = min(self.workers, len(jobs))
+        queue = iter(jobs)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            running = {}
+
+            def submit_next():
+                for index, yaml_file in queue:
+                    future = executor.submit(process_file, index, yaml_file, self.output_dir, self.formats,
+                                             self.timings, self.trace_memory, self.name_template)
+                    running[future] = (index, yaml_file)
+                    return
+
+            for _ in range(workers * JOBS_PER_WORKER):
+                submit_next()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, yaml_file = running.pop(future)
+                    submit_next()
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = _new_result(index, yaml_file)
+                        result["errors"].append(f"Worker failed for {os.path.basename(yaml_file)}: {e}")
+                    self._commit_outputs(result)
+                    yield result
+
+    def _commit_outputs(self, result: Dict):
+        """Move finished outputs into place, letting later inputs win like a serial run"""
+        for partial_path, final_path in result.pop("pending", []):
+            owner = self._owners.get(final_path)
+            if owner is not None and owner > result["index"]:
+                os.remove(partial_path)
+                continue
+            os.replace(partial_path, final_path)
+            self._owners[final_path] = result["index"]
+            result["outputs"].append(final_path)
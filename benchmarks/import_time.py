@@ -0,0 +1,153 @@
+"""Cold-start time of the main modules and of the lightweight entry paths
+
+    python benchmarks/import_time.py [--runs 7] [--json]
+    python benchmarks/import_time.py --save-baseline before.json
+    python benchmarks/import_time.py --baseline before.json
+    python benchmarks/import_time.py --repo ../old-checkout --save-baseline before.json
+
+Each case runs in a fresh interpreter and the fastest of --runs is reported,
+next to a bare interpreter for reference. The "loaded" column lists the heavy
+optional backends (python-docx, reportlab, openai, numpy) that a case pulled
+in; the markdown and deterministic impact paths should load none of them.
+--repo times another checkout (for example a git worktree of an older commit),
+so a baseline saved from it can be compared with the current tree.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DIR = os.path.join(REPO_DIR, 'Input')
+
+HEAVY_MODULES = ('docx', 'reportlab', 'openai', 'numpy')
+
+MARKDOWN_PATH = """
+import glob, os, tempfile
+from immuta_rule_explainer_improved import ImmutaRuleExplainer
+explainer = ImmutaRuleExplainer()
+sample = sorted(glob.glob(os.path.join({sample_dir!r}, '*.yaml')))[0]
+result = explainer.explain_yaml_file(sample)
+with tempfile.TemporaryDirectory() as out:
+    explainer.generate_markdown(result, os.path.join(out, 'policy.md'))
+"""
+
+IMPACT_PATH = """
+from impact_analyzer import ImpactAnalyzer
+rule = (
+    "actions:\\n"
+    "- rules:\\n"
+    "  - type: Row Restriction by Custom Where Clause\\n"
+    "    config:\\n"
+    "      predicate: \\"Dept in ({values})\\"\\n"
+    "    inclusions:\\n"
+    "      groups: [{groups}]\\n"
+)
+old = rule.format(values="'A'", groups='team.a')
+new = rule.format(values="'A', 'B'", groups='team.a, team.b')
+result = ImpactAnalyzer().analyze_impact(old, new, include_llm=False)
+assert result.get('rule_changes'), result
+"""
+
+CASES = [
+    ('python (no imports)', 'pass'),
+    ('import immuta_rule_explainer_improved', 'import immuta_rule_explainer_improved'),
+    ('import immuta_rule_explainer', 'import immuta_rule_explainer'),
+    ('import impact_analyzer', 'import impact_analyzer'),
+    ('import batch_processor', 'import batch_processor'),
+    ('import bulk_impact', 'import bulk_impact'),
+    ('import immuta_cli', 'import immuta_cli'),
+    ('markdown explanation of one file', MARKDOWN_PATH),
+    ('deterministic impact analysis', IMPACT_PATH),
+]
+
+REPORT_LOADED = """
+import sys
+print(','.join(m for m in {heavy!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def time_case(code: str, runs: int, repo_dir: str = REPO_DIR):
+    """Fastest wall time in seconds and the heavy modules loaded by the code"""
+    script = code + REPORT_LOADED.format(heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=repo_dir, IMMUTA_POLICY_CACHE_DIR='')
+    best, loaded = None, ''
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', script], cwd=repo_dir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - start
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip())
+        loaded = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ''
+        best = elapsed if best is None else min(best, elapsed)
+    return best, loaded
+
+
+def compare(results: list, baseline: dict, threshold: float) -> dict:
+    """Time ratio (current / baseline) per case timed in both runs"""
+    before = {r["case"]: r for r in baseline.get("results", []) if r.get("ms")}
+    comparison = {}
+    for r in results:
+        old = before.get(r["case"])
+        if not old or r["ms"] is None:
+            continue
+        ratio = r["ms"] / old["ms"]
+        status = "regression" if ratio > 1 + threshold else "improvement" if ratio < 1 - threshold else "unchanged"
+        comparison[r["case"]] = {"baseline_ms": old["ms"], "ms": r["ms"],
+                                 "ratio": round(ratio, 3), "status": status}
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the generator modules")
+    parser.add_argument("--runs", type=int, default=7, help="Runs per case; the fastest is reported (default: 7)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--repo", default=REPO_DIR, help="Checkout to time (default: this repository)")
+    parser.add_argument("--baseline", help="Compare against a previously saved --json report")
+    parser.add_argument("--save-baseline", help="Also save the results as a baseline file")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as a regression (default: 0.1)")
+    args = parser.parse_args()
+    repo_dir = os.path.abspath(args.repo)
+    sample_dir = os.path.join(repo_dir, 'Input') if os.path.isdir(os.path.join(repo_dir, 'Input')) else SAMPLE_DIR
+
+    results = []
+    for name, code in CASES:
+        if code is MARKDOWN_PATH:
+            code = code.format(sample_dir=sample_dir)
+        try:
+            seconds, loaded = time_case(code, max(1, args.runs), repo_dir)
+            results.append({"case": name, "ms": round(seconds * 1000, 1),
+                            "loaded": [m for m in loaded.split(',') if m]})
+        except Exception as e:
+            results.append({"case": name, "ms": None, "error": str(e)})
+
+    report = {"python": sys.version.split()[0], "runs": args.runs, "results": results}
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            report["comparison"] = compare(results, json.load(file), args.threshold)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    comparison = report.get("comparison", {})
+    width = max(len(r["case"]) for r in results)
+    for r in results:
+        if r["ms"] is None:
+            print(f"{r['case']:<{width}}  failed: {r['error']}")
+            continue
+        line = f"{r['case']:<{width}}  {r['ms']:7.1f} ms"
+        status = comparison.get(r["case"])
+        if status:
+            line += f"  (was {status['baseline_ms']:7.1f} ms, x{status['ratio']:.2f} {status['status']})"
+        print(f"{line}  {', '.join(r['loaded'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Latency and throughput of each pipeline stage over the Input/ corpus
+
+    python benchmarks/run_benchmarks.py                        # the corpus as is
+    python benchmarks/run_benchmarks.py --files 1000 --rules 500
+    python benchmarks/run_benchmarks.py --files 10000 --stages parse,process
+    python benchmarks/run_benchmarks.py --save-baseline before.json
+    python benchmarks/run_benchmarks.py --baseline before.json --fail-on-regression
+
+Stages: parse (parse_yaml_file), explain_rule, process (process_yaml_file),
+docx (generate_docx), pdf (generate_pdf) and impact (analyze_impact on the
+corpus pairs, LLM stubbed). --files scales the corpus with renamed copies;
+DOCX and PDF only render the first --render-limit files. --rules adds a
+single synthetic policy with that many rules, measured as process_large and
+impact_large.
+
+Every item is timed on its own. The JSON report has per-stage percentiles,
+throughput and the process peak RSS after the stage (peak RSS never goes
+down, so it is cumulative). Comparing against a baseline flags stages whose
+p50 moved by more than --threshold; sub-millisecond stages are noisy in a
+single pass, so use --repeat 3 or more for both runs when comparing them.
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+STAGES = ('parse', 'explain_rule', 'process', 'docx', 'pdf', 'impact', 'process_large', 'impact_large')
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Linear-interpolated percentile (0-100) of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if it can't be read"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+def stage_stats(durations, unit: str) -> dict:
+    values = sorted(durations)
+    total = sum(values)
+    return {
+        "items": len(values),
+        "unit": unit,
+        "total_s": round(total, 4),
+        "throughput_per_s": round(len(values) / total, 2) if total else None,
+        "mean_ms": round(total / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def time_each(items, func, repeat: int):
+    """Per-call durations of func(item) over items, repeated; generator output is silenced"""
+    durations = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            for item in items:
+                start = time.perf_counter()
+                func(item)
+                durations.append(time.perf_counter() - start)
+    return durations
+
+
+def scale_corpus(files, count: int, work_dir: str):
+    """count policy files: the corpus, then renamed copies that differ by a trailing comment"""
+    if count <= len(files):
+        return list(files[:count])
+    copies_dir = os.path.join(work_dir, 'corpus')
+    os.makedirs(copies_dir, exist_ok=True)
+    scaled = list(files)
+    index = 0
+    while len(scaled) < count:
+        source = files[index % len(files)]
+        with open(source, 'rb') as file:
+            data = file.read()
+        stem = os.path.splitext(os.path.basename(source))[0]
+        path = os.path.join(copies_dir, f"{stem}--copy{index}.yaml")
+        with open(path, 'wb') as file:
+            # Distinct bytes so the policy cache can't serve copies from one entry
+            file.write(data + f"\n# benchmark copy {index}\n".encode('utf-8'))
+        scaled.append(path)
+        index += 1
+    return scaled
+
+
+def large_policy(corpus_rules, rule_count: int):
+    """A policy with rule_count rules cycled from the corpus, and a modified version of it"""
+    import yaml
+    rules = [copy.deepcopy(corpus_rules[i % len(corpus_rules)]) for i in range(rule_count)]
+    old = {'name': f'Benchmark policy with {rule_count} rules', 'actions': [{'rules': rules}]}
+
+    # Drop every tenth rule and add a group to every seventh, so alignment has work to do
+    new_rules = []
+    for i, rule in enumerate(copy.deepcopy(rules)):
+        if i % 10 == 5:
+            continue
+        if i % 7 == 3:
+            target = rule.get('exceptions') or rule.setdefault('inclusions', {})
+            target.setdefault('groups', []).append('benchmark.extra.group')
+        new_rules.append(rule)
+    new = {'name': old['name'], 'actions': [{'rules': new_rules}]}
+    dump = lambda config: yaml.safe_dump(config, default_flow_style=False, sort_keys=False, allow_unicode=True)
+    return dump(old), dump(new)
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> dict:
+    """p50 and throughput ratios (current / baseline) per stage present in both"""
+    comparison = {}
+    for name, stats in report["stages"].items():
+        before = baseline.get("stages", {}).get(name)
+        if not before or not before.get("p50_ms") or before.get("items") != stats["items"]:
+            continue
+        ratio = stats["p50_ms"] / before["p50_ms"]
+        status = "regression" if ratio > 1 + threshold else "improvement" if ratio < 1 - threshold else "unchanged"
+        comparison[name] = {
+            "baseline_p50_ms": before["p50_ms"],
+            "p50_ms": stats["p50_ms"],
+            "p50_ratio": round(ratio, 3),
+            "throughput_ratio": round(stats["throughput_per_s"] / before["throughput_per_s"], 3)
+            if stats["throughput_per_s"] and before.get("throughput_per_s") else None,
+            "status": status,
+        }
+    return comparison
+
+
+def run(args) -> dict:
+    # The policy cache is read from the environment on first use
+    work_dir = tempfile.mkdtemp(prefix='immuta-bench-')
+    os.environ['IMMUTA_POLICY_CACHE_DIR'] = os.path.join(work_dir, 'policy-cache') if args.policy_cache else ''
+    try:
+        from batch_processor import find_yaml_files
+        from bulk_impact import pair_policy_files
+        from immuta_rule_explainer_improved import GENERATOR_VERSION, ImmutaRuleExplainer
+        from impact_analyzer import ImpactAnalyzer
+        from llm_client import LLMClient
+
+        class StubLLMClient(LLMClient):
+            """Answers immediately without contacting an endpoint"""
+
+            def __init__(self):
+                super().__init__(cache_dir=None)
+
+            def submit_impact_analysis(self, old_yaml, new_yaml, rule_changes):
+                future = Future()
+                future.set_result("Stubbed LLM analysis")
+                return future
+
+        corpus = [str(path) for path in find_yaml_files(args.input)]
+        if not corpus:
+            raise SystemExit(f"No YAML files found in {args.input}")
+        files = scale_corpus(corpus, args.files or len(corpus), work_dir)
+        explainer = ImmutaRuleExplainer()
+        analyzer = ImpactAnalyzer(llm_client=StubLLMClient())
+        with contextlib.redirect_stdout(io.StringIO()):
+            configs = [explainer.parse_yaml_file(path) for path in corpus]
+        rules = [rule for config in configs if config for rule in explainer.extract_rules(config)]
+        pairs, _ = pair_policy_files(corpus)
+        pair_texts = []
+        for old, new in pairs:
+            with open(old["file"], encoding='utf-8') as old_file, open(new["file"], encoding='utf-8') as new_file:
+                pair_texts.append((old_file.read(), new_file.read()))
+        out_dir = os.path.join(work_dir, 'out')
+        os.makedirs(out_dir)
+
+        selected = args.stages
+        stages = {}
+
+        def measure(name, items, func, unit):
+            if name not in selected or not items:
+                return
+            if not args.quiet:
+                print(f"{name}: {len(items)} {unit}(s) x {args.repeat}", file=sys.stderr, flush=True)
+            stages[name] = stage_stats(time_each(items, func, args.repeat), unit)
+
+        measure('parse', files, explainer.parse_yaml_file, 'file')
+        measure('explain_rule', list(enumerate(rules)), lambda item: explainer.explain_rule(item[1], item[0]), 'rule')
+        measure('process', files, explainer.process_yaml_file, 'file')
+        if 'docx' in selected or 'pdf' in selected:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results = [explainer.explain_yaml_file(path) for path in files[:args.render_limit]]
+            measure('docx', results, lambda r: explainer.generate_docx(r, os.path.join(out_dir, 'bench.docx')), 'file')
+            measure('pdf', results, lambda r: explainer.generate_pdf(r, os.path.join(out_dir, 'bench.pdf')), 'file')
+        measure('impact', pair_texts, lambda pair: analyzer.analyze_impact(*pair), 'pair')
+
+        if args.rules and rules:
+            old_text, new_text = large_policy(rules, args.rules)
+            large_path = os.path.join(work_dir, f'large_{args.rules}_rules.yaml')
+            with open(large_path, 'w', encoding='utf-8') as file:
+                file.write(old_text)
+            measure('process_large', [large_path], explainer.process_yaml_file, 'policy')
+            measure('impact_large', [(old_text, new_text)], lambda pair: analyzer.analyze_impact(*pair), 'pair')
+
+        return {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "generator_version": GENERATOR_VERSION,
+                "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "policy_cache": args.policy_cache,
+                "repeat": args.repeat,
+            },
+            "corpus": {
+                "input": os.path.abspath(args.input),
+                "files": len(files),
+                "rules": len(rules),
+                "pairs": len(pair_texts),
+                "rendered_files": min(len(files), args.render_limit),
+                "large_policy_rules": args.rules,
+            },
+            "stages": stages,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def parse_stages(value: str):
+    stages = [stage.strip() for stage in value.split(',') if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if not stages or unknown:
+        raise argparse.ArgumentTypeError(f"choose from {', '.join(STAGES)} (got {value!r})")
+    return stages
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark parsing, explanation, rendering and impact analysis")
+    parser.add_argument("--input", default=os.path.join(REPO_DIR, 'Input'), help="Policy corpus folder (default: Input)")
+    parser.add_argument("--files", type=int, default=0, help="Scale the corpus to this many files (default: corpus size)")
+    parser.add_argument("--rules", type=int, default=200, help="Rules in the synthetic large policy, 0 to skip (default: 200)")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over each stage's items (default: 1)")
+    parser.add_argument("--render-limit", type=int, default=20, help="Files rendered by the docx/pdf stages (default: 20)")
+    parser.add_argument("--stages", type=parse_stages, default=list(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--policy-cache", action="store_true", help="Use a fresh on-disk policy cache instead of parsing every time")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="Compare against a previously saved report")
+    parser.add_argument("--save-baseline", help="Also save this report as a baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative p50 change reported as a regression (default: 0.2)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if any stage regressed")
+    parser.add_argument("-q", "--quiet", action="store_true", help="No progress on stderr")
+    args = parser.parse_args(argv)
+    args.repeat = max(1, args.repeat)
+
+    report = run(args)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            report["comparison"] = compare(report, json.load(file), args.threshold)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump({key: report[key] for key in ("meta", "corpus", "stages")}, file, indent=2)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+    if not args.quiet:
+        for name, stats in report["stages"].items():
+            line = (f"{name:<14} {stats['items']:>6} {stats['unit']:<7} p50 {stats['p50_ms']:>9.3f} ms  "
+                    f"p99 {stats['p99_ms']:>9.3f} ms  {stats['throughput_per_s'] or 0:>9.1f}/s")
+            status = report.get("comparison", {}).get(name)
+            if status:
+                line += f"  {status['status']} (x{status['p50_ratio']})"
+            print(line, file=sys.stderr)
+
+    regressed = [name for name, c in report.get("comparison", {}).items() if c["status"] == "regression"]
+    return 1 if args.fail_on_regression and regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
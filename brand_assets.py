@@ -0,0 +1,96 @@
+import os
+import struct
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_FILE = 'LogoMFEC.png'
+
+# Set to a pixel width (e.g. 600) to embed a downscaled logo instead of the
+# full-resolution original; keeps generated files smaller
+LOGO_MAX_WIDTH_ENV = 'IMMUTA_LOGO_MAX_PX'
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# (file name, max width) -> ImageAsset, or None when the file is missing
+_assets: Dict[Tuple[str, Optional[int]], Optional['ImageAsset']] = {}
+
+
+@dataclass(frozen=True)
+class ImageAsset:
+    """An image loaded once and shared by the DOCX and PDF renderers"""
+    name: str
+    data: bytes
+    width: int
+    height: int
+
+    @property
+    def aspect_ratio(self) -> float:
+        return self.width / self.height
+
+    def stream(self) -> BytesIO:
+        """Fresh file-like object over the image bytes"""
+        return BytesIO(self.data)
+
+
+def image_size(data: bytes) -> Tuple[int, int]:
+    """Pixel size of an image, read from the PNG header when possible"""
+    if data[:8] == _PNG_SIGNATURE and data[12:16] == b'IHDR':
+        return struct.unpack('>II', data[16:24])
+
+    from PIL import Image as PILImage
+    with PILImage.open(BytesIO(data)) as img:
+        return img.size
+
+
+def _downscale(data: bytes, max_width: int) -> bytes:
+    from PIL import Image as PILImage
+    with PILImage.open(BytesIO(data)) as img:
+        if img.width <= max_width:
+            return data
+        height = max(1, round(img.height * max_width / img.width))
+        resized = img.resize((max_width, height), PILImage.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, format='PNG', optimize=True)
+        return buffer.getvalue()
+
+
+def get_image(file_name: str, max_width: Optional[int] = None) -> Optional[ImageAsset]:
+    """Load an image from the asset folder once per process
+
+    Returns None if the file does not exist. With ``max_width`` a downscaled
+    copy is returned when the original is wider.
+    """
+    key = (file_name, max_width)
+    if key in _assets:
+        return _assets[key]
+
+    asset = None
+    path = os.path.join(ASSET_DIR, file_name)
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        if max_width:
+            data = _downscale(data, max_width)
+        width, height = image_size(data)
+        asset = ImageAsset(file_name, data, width, height)
+
+    _assets[key] = asset
+    return asset
+
+
+def logo_max_width() -> Optional[int]:
+    """Opt-in logo width limit from the environment"""
+    value = os.environ.get(LOGO_MAX_WIDTH_ENV, '').strip()
+    try:
+        return int(value) if value else None
+    except ValueError:
+        print(f"Ignoring invalid {LOGO_MAX_WIDTH_ENV}={value!r}")
+        return None
+
+
+def get_logo(max_width: Optional[int] = None) -> Optional[ImageAsset]:
+    """The MFEC logo, pre-scaled to max_width and/or IMMUTA_LOGO_MAX_PX when set"""
+    limits = [width for width in (max_width, logo_max_width()) if width]
+    return get_image(LOGO_FILE, min(limits) if limits else None)
@@ -0,0 +1,260 @@
+import argparse
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from batch_processor import default_worker_count, find_yaml_files
+from impact_analyzer import ImpactAnalyzer
+from policy_cache import get_policy_cache
+
+IMPACT_LEVELS = ('HIGH', 'MEDIUM', 'LOW', 'NONE')
+
+# Tokens that name an environment or revision rather than the policy itself
+ENVIRONMENT_RANKS = {'dev': 0, 'sit': 1, 'uat': 1, 'prd': 2, 'prod': 2}
+REVISION_TOKENS = {'new'}
+
+# One analyzer per worker process, created on first use
+_worker_analyzer = None
+
+
+def _tokens(text: str) -> List[str]:
+    return [token for token in re.split(r'[^0-9a-z.]+', text.lower()) if token]
+
+
+def pairing_key(text: str) -> str:
+    """Policy identity with environment and revision markers removed
+
+    'Contract: Official Mart DEV' and 'Contract: Official Mart PRD' both give
+    'contract official mart'.
+    """
+    skip = set(ENVIRONMENT_RANKS) | REVISION_TOKENS
+    return ' '.join(token for token in _tokens(text) if token not in skip)
+
+
+def revision_rank(file_path: str, policy_key: str) -> float:
+    """Ordering within a pair group: DEV before UAT before PRD, '_new' last"""
+    tokens = _tokens(policy_key) + _tokens(Path(file_path).stem)
+    ranks = [ENVIRONMENT_RANKS[token] for token in tokens if token in ENVIRONMENT_RANKS]
+    rank = max(ranks) if ranks else 1
+    if REVISION_TOKENS.intersection(tokens):
+        rank += 0.5
+    return rank
+
+
+def describe_policy_file(file_path: str) -> Dict:
+    """Pairing information for one YAML file (policyKey, dataset, keys)"""
+    info = {"file": str(file_path), "policy_key": "", "dataset_name": "", "error": None}
+    try:
+        config = get_policy_cache().load_file(file_path, normalize=False) or {}
+        info["policy_key"] = str(config.get('policyKey') or config.get('name') or '')
+        info["dataset_name"] = _dataset_tag(config)
+    except Exception as e:
+        info["error"] = f"YAML parsing error: {e}"
+    if not info["policy_key"]:
+        info["policy_key"] = Path(file_path).stem.replace('--', ' ')
+    info["key"] = pairing_key(info["policy_key"])
+    info["rank"] = revision_rank(file_path, info["policy_key"])
+    return info
+
+
+def _dataset_tag(config: Dict) -> str:
+    """Table name from the circumstance tags, e.g. '...Table.schema.contract' -> 'contract'"""
+    for circumstance in config.get('circumstances', []) or []:
+        tag = circumstance.get('tag', '') if isinstance(circumstance, dict) else ''
+        if '.Table.' in tag:
+            return tag.split('.')[-1]
+    return ''
+
+
+def pair_policy_files(files: Iterable, new_files: Optional[Iterable] = None) -> Tuple[List[Tuple[Dict, Dict]], List[Dict]]:
+    """Pair old/new policy files and return (pairs, unpaired)
+
+    With one list, files are grouped by policyKey with environment markers
+    removed (falling back to the dataset name for files left alone) and each
+    group is ordered DEV -> UAT -> PRD -> '_new', pairing neighbours. With two
+    lists, each old file is paired with the new file of the same key.
+    """
+    if new_files is not None:
+        return _pair_across(list(files), list(new_files))
+
+    infos = [describe_policy_file(path) for path in files]
+    groups: Dict[str, List[Dict]] = {}
+    for info in infos:
+        groups.setdefault(info["key"], []).append(info)
+
+    # Files alone under their policyKey may still pair by dataset name
+    singles = [group[0] for group in groups.values() if len(group) == 1]
+    by_dataset: Dict[str, List[Dict]] = {}
+    for info in singles:
+        if info["dataset_name"]:
+            by_dataset.setdefault(info["dataset_name"], []).append(info)
+    for dataset, members in by_dataset.items():
+        if len(members) > 1:
+            for info in members:
+                del groups[info["key"]]
+            groups[f"dataset:{dataset}"] = members
+
+    pairs, unpaired = [], []
+    for key in sorted(groups):
+        group = sorted(groups[key], key=lambda info: (info["rank"], info["file"]))
+        if len(group) == 1:
+            unpaired.extend(group)
+            continue
+        pairs.extend(zip(group, group[1:]))
+    return pairs, unpaired
+
+
+def _pair_across(old_files: List, new_files: List) -> Tuple[List[Tuple[Dict, Dict]], List[Dict]]:
+    old_infos = [describe_policy_file(path) for path in old_files]
+    new_infos = [describe_policy_file(path) for path in new_files]
+
+    by_name = {Path(info["file"]).name: info for info in new_infos}
+    by_key: Dict[str, List[Dict]] = {}
+    for info in new_infos:
+        by_key.setdefault(info["key"], []).append(info)
+
+    pairs, used = [], set()
+    for old in old_infos:
+        candidates = [by_name.get(Path(old["file"]).name)] + by_key.get(old["key"], [])
+        match = next((info for info in candidates if info and info["file"] not in used), None)
+        if match:
+            used.add(match["file"])
+            pairs.append((old, match))
+    paired_old = {old["file"] for old, _ in pairs}
+    unpaired = [info for info in old_infos if info["file"] not in paired_old]
+    unpaired += [info for info in new_infos if info["file"] not in used]
+    return pairs, unpaired
+
+
+def _get_worker_analyzer() -> ImpactAnalyzer:
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = ImpactAnalyzer()
+    return _worker_analyzer
+
+
+def analyze_pair(index: int, old_file: str, new_file: str) -> Dict:
+    """Deterministic impact analysis of one old/new file pair"""
+    result = {"index": index, "old_file": old_file, "new_file": new_file, "impact": None, "error": None}
+    try:
+        with open(old_file, 'r', encoding='utf-8') as file:
+            old_yaml = file.read()
+        with open(new_file, 'r', encoding='utf-8') as file:
+            new_yaml = file.read()
+        impact = _get_worker_analyzer().analyze_impact(old_yaml, new_yaml, include_llm=False)
+        if "error" in impact:
+            result["error"] = impact["error"]
+        else:
+            result["impact"] = impact
+    except Exception as e:
+        result["error"] = f"Error analyzing {Path(old_file).name} vs {Path(new_file).name}: {e}"
+    return result
+
+
+def _rollup_pair(result: Dict) -> Dict:
+    """Per-pair counts of rule changes by impact level"""
+    counts = {level: 0 for level in IMPACT_LEVELS[:3]}
+    impact = result.get("impact")
+    if impact:
+        for change in impact["rule_changes"]:
+            counts[change["impact"]] = counts.get(change["impact"], 0) + 1
+        result["impact_level"] = impact["summary"]["impact_level"]
+    else:
+        result["impact_level"] = "ERROR"
+    result["change_counts"] = counts
+    return result
+
+
+def analyze_directories(old_dir: str, new_dir: Optional[str] = None, workers: Optional[int] = None,
+                        on_result: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Pair policy files in one or two folders and analyze all pairs"""
+    old_files = find_yaml_files(old_dir)
+    new_files = find_yaml_files(new_dir) if new_dir else None
+    return analyze_files(old_files, new_files, workers=workers, on_result=on_result)
+
+
+def analyze_files(files: Iterable, new_files: Optional[Iterable] = None, workers: Optional[int] = None,
+                  on_result: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Pair the given files, analyze every pair in parallel and aggregate a report
+
+    The report has ``pairs`` (in pairing order, each with ``impact_level``
+    and per-level ``change_counts``), ``unpaired`` files and an overall
+    ``rollup`` of pairs per impact level.
+    """
+    pairs, unpaired = pair_policy_files(files, new_files)
+    jobs = [(index, old["file"], new["file"]) for index, (old, new) in enumerate(pairs)]
+    workers = workers if workers else default_worker_count()
+    results = []
+
+    def finish(result):
+        result = _rollup_pair(result)
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            finish(analyze_pair(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            futures = {executor.submit(analyze_pair, *job): job for job in jobs}
+            for future in as_completed(futures):
+                index, old_file, new_file = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"index": index, "old_file": old_file, "new_file": new_file,
+                              "impact": None, "error": f"Worker failed: {e}"}
+                finish(result)
+
+    results.sort(key=lambda r: r["index"])
+    rollup = {level: 0 for level in IMPACT_LEVELS + ('ERROR',)}
+    for result in results:
+        rollup[result["impact_level"]] = rollup.get(result["impact_level"], 0) + 1
+
+    return {
+        "pairs": results,
+        "unpaired": [info["file"] for info in unpaired],
+        "rollup": rollup,
+    }
+
+
+def format_bulk_report(report: Dict) -> str:
+    """Markdown summary of a bulk impact report"""
+    lines = ["# Bulk Impact Analysis", ""]
+    rollup = report["rollup"]
+    lines.append(f"Pairs analyzed: {len(report['pairs'])}")
+    lines.append("Impact levels: " + ", ".join(f"{level} {count}" for level, count in rollup.items() if count))
+    lines.append("")
+    lines.append("| Old file | New file | Impact | HIGH | MEDIUM | LOW |")
+    lines.append("|---|---|---|---|---|---|")
+    order = {level: index for index, level in enumerate(('ERROR',) + IMPACT_LEVELS)}
+    for result in sorted(report["pairs"], key=lambda r: (order.get(r["impact_level"], 99), r["index"])):
+        counts = result["change_counts"]
+        lines.append(f"| {Path(result['old_file']).name} | {Path(result['new_file']).name} | "
+                     f"{result['impact_level']} | {counts['HIGH']} | {counts['MEDIUM']} | {counts['LOW']} |")
+    errors = [result for result in report["pairs"] if result.get("error")]
+    if errors:
+        lines.append("")
+        lines.append("## Errors")
+        lines.extend(f"- {Path(r['old_file']).name} vs {Path(r['new_file']).name}: {r['error']}" for r in errors)
+    if report["unpaired"]:
+        lines.append("")
+        lines.append("## Unpaired files")
+        lines.extend(f"- {Path(path).name}" for path in report["unpaired"])
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impact analysis across whole policy folders")
+    parser.add_argument("old_dir", help="Folder with policy YAML files (DEV/PRD pairs are found automatically)")
+    parser.add_argument("new_dir", nargs="?", help="Optional folder with the new versions of the same policies")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    report = analyze_directories(args.old_dir, args.new_dir, workers=args.jobs)
+    print(format_bulk_report(report))
+
+
+if __name__ == "__main__":
+    main()
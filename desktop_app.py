@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import heapq
 import threading
 from pathlib import Path
 import sys
 sys.path.append(os.path.dirname(__file__))
-from immuta_rule_explainer_improved import ImmutaRuleExplainer
+from batch_processor import BatchProcessor, default_worker_count, iter_yaml_files
+from instrumentation import format_timings
 
 class DocumentGeneratorApp:
     def __init__(self, root):
@@ -20,6 +22,7 @@ class DocumentGeneratorApp:
         # Variables
         self.input_folder = tk.StringVar()
         self.output_folder = tk.StringVar()
+        self.worker_count = tk.IntVar(value=default_worker_count())
         
         self.setup_modern_style()
         self.setup_ui()
@@ -73,11 +76,24 @@ class DocumentGeneratorApp:
         # File format options with modern styling
         self.generate_docx = tk.BooleanVar(value=True)
         self.generate_pdf = tk.BooleanVar(value=True)
+        self.changed_only = tk.BooleanVar(value=False)
+        self.show_timings = tk.BooleanVar(value=False)
         
         ttk.Checkbutton(options_frame, text="Generate Word documents (.docx)", 
                        variable=self.generate_docx, style='Modern.TCheckbutton').grid(row=0, column=0, sticky=tk.W, pady=5)
         ttk.Checkbutton(options_frame, text="Generate PDF files (.pdf)", 
                        variable=self.generate_pdf, style='Modern.TCheckbutton').grid(row=1, column=0, sticky=tk.W, pady=5)
+        ttk.Checkbutton(options_frame, text="Skip files unchanged since the last run", 
+                       variable=self.changed_only, style='Modern.TCheckbutton').grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Checkbutton(options_frame, text="Show per-file timing breakdown", 
+                       variable=self.show_timings, style='Modern.TCheckbutton').grid(row=3, column=0, sticky=tk.W, pady=5)
+        
+        # Parallel worker count
+        workers_frame = ttk.Frame(options_frame, style='Modern.TFrame')
+        workers_frame.grid(row=4, column=0, sticky=tk.W, pady=5)
+        ttk.Label(workers_frame, text="Parallel workers:", style='Modern.TLabel').grid(row=0, column=0, sticky=tk.W)
+        ttk.Spinbox(workers_frame, from_=1, to=max(32, default_worker_count()), width=5,
+                    textvariable=self.worker_count).grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
         
         # Process button with modern styling
         self.process_button = ttk.Button(main_frame, text="🚀 Generate Documents", 
@@ -149,66 +165,77 @@ class DocumentGeneratorApp:
     
     def process_files(self):
         try:
-            input_path = Path(self.input_folder.get())
             output_path = Path(self.output_folder.get())
             
+            formats = []
+            if self.generate_docx.get():
+                formats.append('docx')
+            if self.generate_pdf.get():
+                formats.append('pdf')
+            if not formats:
+                # The boxes can be unticked after Start was pressed
+                self.update_status("Please select at least one output format")
+                return
+            
             # Find all YAML files
-            yaml_files = list(input_path.glob("*.yaml")) + list(input_path.glob("*.yml"))
+            yaml_files = list(iter_yaml_files(self.input_folder.get()))
             
             if not yaml_files:
                 self.update_status("No YAML files found in input folder")
                 return
             
             self.update_status(f"Found {len(yaml_files)} YAML files to process")
+            self.root.after(0, lambda: self.start_progress(len(yaml_files)))
             
-            explainer = ImmutaRuleExplainer()
-            processed = 0
-            errors = 0
+            try:
+                workers = max(1, int(self.worker_count.get()))
+            except (tk.TclError, ValueError):
+                workers = default_worker_count()
             
-            for yaml_file in yaml_files:
-                try:
-                    self.update_status(f"Processing: {yaml_file.name}")
-                    
-                    # Generate explanation
-                    explanation = explainer.process_yaml_file(str(yaml_file))
-                    
-                    if explanation:
-                        base_name = yaml_file.stem
-                        
-                        # Generate Word document if requested
-                        if self.generate_docx.get():
-                            # Get dataset name for filename
-                            config = explainer.parse_yaml_file(str(yaml_file))
-                            dataset_name = explainer.get_dataset_name(config) if config else base_name
-                            docx_file = output_path / f"{dataset_name}_explanation.docx"
-                            explainer.generate_docx(explanation, str(docx_file))
-                            self.log_result(f"✓ Generated: {docx_file.name}")
-                        
-                        # Generate PDF if requested
-                        if self.generate_pdf.get():
-                            # Get dataset name for filename
-                            config = explainer.parse_yaml_file(str(yaml_file))
-                            dataset_name = explainer.get_dataset_name(config) if config else base_name
-                            pdf_file = output_path / f"{dataset_name}_explanation.pdf"
-                            explainer.generate_pdf(explanation, str(pdf_file))
-                            self.log_result(f"✓ Generated: {pdf_file.name}")
-                        
-                        processed += 1
-                    else:
-                        self.log_result(f"✗ Failed to process: {yaml_file.name}")
-                        errors += 1
-                        
-                except Exception as e:
-                    self.log_result(f"✗ Error processing {yaml_file.name}: {str(e)}")
+            show_timings = self.show_timings.get()
+            processor = BatchProcessor(str(output_path), formats=formats, workers=workers, timings=show_timings)
+            completed = processed = skipped = errors = 0
+            slowest = []  # (total ms, name) of the five slowest files
+            
+            # Results are logged as they finish and then dropped
+            for result in processor.iter_run(yaml_files, changed_only=self.changed_only.get()):
+                completed += 1
+                self.update_status(f"Processed {completed}/{len(yaml_files)}: {result['name']}")
+                self.set_progress(completed)
+                if result.get('skipped'):
+                    skipped += 1
+                    self.log_result(f"↷ Skipped (unchanged): {result['name']}")
+                    continue
+                if result['success']:
+                    processed += 1
+                else:
                     errors += 1
+                for output_file in result['outputs']:
+                    self.log_result(f"✓ Generated: {Path(output_file).name}")
+                for error in result['errors']:
+                    self.log_result(f"✗ {error}")
+                if result.get('timings'):
+                    self.log_result(f"   ⏱ {format_timings(result['timings'])}")
+                    entry = (sum(result['timings'].values()), result['name'])
+                    if len(slowest) < 5:
+                        heapq.heappush(slowest, entry)
+                    else:
+                        heapq.heappushpop(slowest, entry)
             
             # Final summary
-            self.update_status(f"Processing complete: {processed} successful, {errors} errors")
+            self.update_status(f"Processing complete: {processed} successful, {skipped} skipped, {errors} errors")
             self.log_result(f"\n=== SUMMARY ===")
             self.log_result(f"Total files processed: {processed}")
+            self.log_result(f"Skipped (unchanged): {skipped}")
             self.log_result(f"Errors: {errors}")
+            self.log_result(f"Workers: {processor.workers}")
             self.log_result(f"Output folder: {output_path}")
             
+            if slowest:
+                self.log_result("\n=== SLOWEST FILES ===")
+                for total_ms, name in sorted(slowest, reverse=True):
+                    self.log_result(f"{total_ms:.0f} ms  {name}")
+            
         except Exception as e:
             self.update_status(f"Error: {str(e)}")
             self.log_result(f"✗ Fatal error: {str(e)}")
@@ -216,6 +243,13 @@ class DocumentGeneratorApp:
             # Re-enable button and stop progress
             self.root.after(0, self.finish_processing)
     
+    def start_progress(self, total):
+        self.progress.stop()
+        self.progress.config(mode='determinate', maximum=total, value=0)
+    
+    def set_progress(self, value):
+        self.root.after(0, lambda: self.progress.config(value=value))
+    
     def update_status(self, message):
         self.root.after(0, lambda: self.status_label.config(text=message))
     
@@ -227,6 +261,7 @@ class DocumentGeneratorApp:
     
     def finish_processing(self):
         self.progress.stop()
+        self.progress.config(mode='indeterminate', value=0)
         self.process_button.config(state='normal')
 
 def main():
@@ -0,0 +1,144 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class ExplanationLine:
+    """One line of a rule explanation step
+
+    ``label`` is the bold lead-in (e.g. ``Action if True:``) and ``condition``
+    holds the explained predicate when the line ends with one, so renderers can
+    lay it out without searching the text for it.
+    """
+    text: str
+    label: str = ''
+    condition: Optional[str] = None
+    bullet: bool = False
+    indent: bool = False
+
+    @property
+    def sentence(self) -> str:
+        if self.condition is not None:
+            return f"{self.text} {self.condition}."
+        return self.text
+
+    def to_markdown(self) -> str:
+        line = f"**{self.label}** {self.sentence}" if self.label else self.sentence
+        return f"- {line}" if self.bullet else line
+
+
+@dataclass
+class ExplanationStep:
+    """A titled step of a rule explanation, e.g. ``Step 1: Check Inclusions``
+
+    Inline steps (``Condition:``, ``Universal Rule:``) put their first line on
+    the same markdown line as the title.
+    """
+    title: str
+    lines: List[ExplanationLine] = field(default_factory=list)
+    inline: bool = False
+
+    def to_markdown(self) -> str:
+        lines = list(self.lines)
+        heading = f"**{self.title}**"
+        if self.inline and lines:
+            heading += f" {lines.pop(0).to_markdown()}"
+        markdown = heading + "\n"
+        markdown += "".join(line.to_markdown() + "\n" for line in lines)
+        if self.lines:
+            markdown += "\n"
+        return markdown
+
+
+@dataclass
+class RuleExplanation:
+    """Explanation of a single rule: its number, metadata and steps"""
+    number: int
+    rule_type: str = 'Unknown'
+    operator: str = 'any'
+    steps: List[ExplanationStep] = field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        return f"\n**Rule {self.number}:**\n" + "".join(step.to_markdown() for step in self.steps)
+
+
+@dataclass
+class DocumentSection:
+    """A free-form section such as an error message or analysis note"""
+    heading: str
+    paragraphs: List[str] = field(default_factory=list)
+    bullets: List[str] = field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        body = "\n".join(self.paragraphs + [f"- {bullet}" for bullet in self.bullets])
+        return f"## {self.heading}\n\n{body}"
+
+
+@dataclass
+class PolicyDocument:
+    """Renderer-independent model of an explanation document"""
+    title: str
+    dataset_name: str
+    file_name: str
+    yaml_text: str = ''
+    rules: List[RuleExplanation] = field(default_factory=list)
+    sections: List[DocumentSection] = field(default_factory=list)
+
+    def to_markdown(self) -> str:
+        if self.rules:
+            markdown = f"# {self.title}\n"
+            markdown += f"Dataset/Table: {self.dataset_name}\n"
+            markdown += f"File Name: {self.file_name}\n\n"
+            markdown += "## Configuration\n"
+            markdown += f"```yaml\n{self.yaml_text}```\n\n"
+            markdown += "## Explanation\n"
+            markdown += "".join(rule.to_markdown() for rule in self.rules)
+            return markdown
+
+        parts = [f"# {self.title}", f"Dataset/Table: {self.dataset_name}\nFile Name: {self.file_name}"]
+        if self.yaml_text:
+            parts.append(f"## Configuration\n\n```yaml\n{self.yaml_text}```")
+        parts.extend(section.to_markdown() for section in self.sections)
+        return "\n\n".join(parts)
+
+    @classmethod
+    def from_markdown(cls, text: str) -> 'PolicyDocument':
+        """Minimal document from explanation markdown, for callers that only have the text
+
+        The title, Dataset/Table and File Name lines and the YAML block are
+        picked up; every other ``##`` heading (or text outside one) becomes a
+        section of plain paragraphs and bullets.
+        """
+        document = cls("Immuta Rule Configuration Analysis", "Unknown", "Unknown")
+        section = None
+        yaml_lines = None
+        for line in text.split('\n'):
+            if yaml_lines is not None:
+                if line.strip() == '```':
+                    document.yaml_text = ''.join(f"{yaml_line}\n" for yaml_line in yaml_lines)
+                    yaml_lines = None
+                else:
+                    yaml_lines.append(line)
+            elif line.startswith('```yaml'):
+                yaml_lines = []
+            elif line.startswith('# '):
+                document.title = line[2:].strip()
+            elif line.startswith('Dataset/Table:'):
+                document.dataset_name = line.replace('Dataset/Table:', '').strip()
+            elif line.startswith('File Name:'):
+                document.file_name = line.replace('File Name:', '').strip()
+            elif line.startswith('## '):
+                section = None
+                if line[3:].strip() != 'Configuration':
+                    section = DocumentSection(line[3:].strip())
+                    document.sections.append(section)
+            elif line.strip():
+                if section is None:
+                    section = DocumentSection('Explanation')
+                    document.sections.append(section)
+                plain = line.strip().replace('**', '')
+                if plain.startswith('- '):
+                    section.bullets.append(plain[2:])
+                else:
+                    section.paragraphs.append(plain)
+        return document
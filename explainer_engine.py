@@ -0,0 +1,360 @@
+import yaml
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+import os
+from document_model import (DocumentSection, ExplanationLine, ExplanationStep,
+                            PolicyDocument, RuleExplanation)
+import predicate_parser
+from generation_manifest import GenerationManifest, try_hash_file
+from policy_cache import get_policy_cache
+from instrumentation import span, timed
+from renderers import get_renderer
+
+# Bump whenever explanation text or document layout changes so incremental
+# runs regenerate existing outputs
+GENERATOR_VERSION = "2.1"
+
+# Instrumentation stage of each output format
+STAGE_NAMES = {'md': 'markdown', 'docx': 'docx', 'pdf': 'pdf'}
+
+
+@dataclass
+class ExplanationResult:
+    """Everything produced from a single YAML file, parsed exactly once"""
+    file_path: str
+    config: Dict[str, Any] = field(default_factory=dict)
+    rules: List[Dict[str, Any]] = field(default_factory=list)
+    dataset_name: str = ''
+    document: Optional[PolicyDocument] = None
+
+    @property
+    def explanation(self) -> str:
+        """Markdown rendering of the document"""
+        return self.document.to_markdown() if self.document else ''
+
+    @property
+    def file_name(self) -> str:
+        return os.path.basename(self.file_path)
+
+    @property
+    def parsed(self) -> bool:
+        return bool(self.config)
+
+
+class ExplanationText(str):
+    """Markdown returned by process_yaml_file(), carrying the document it was rendered from"""
+
+    def __new__(cls, text: str, document: Optional[PolicyDocument] = None):
+        value = super().__new__(cls, text)
+        value.document = document
+        return value
+
+
+class ExplainerEngine:
+    """Parse -> model -> render pipeline shared by every explainer
+
+    A YAML file is parsed once into an ExplanationResult holding a
+    PolicyDocument, which the renderers in renderers.py turn into Markdown,
+    DOCX or PDF. Subclasses choose a look per format through
+    ``renderer_styles`` (e.g. ``{'docx': 'classic'}``).
+    """
+    renderer_styles: Dict[str, str] = {}
+    
+    def __init__(self):
+        self.rules = []
+        self.explanations = []
+    
+    @timed('parse')
+    def parse_yaml_file(self, file_path: str) -> Dict[str, Any]:
+        """Parse YAML configuration file"""
+        try:
+            # Parsed configs are cached on disk by content hash
+            config = get_policy_cache().load_file(file_path)
+            if not config:
+                print(f"Warning: Empty YAML file {file_path}")
+                return {}
+            return config
+        except yaml.YAMLError as e:
+            print(f"YAML parsing error in {file_path}: {e}")
+            return {}
+        except Exception as e:
+            print(f"Error reading file {file_path}: {e}")
+            return {}
+    
+    @timed('extract_rules')
+    def extract_rules(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Extract rules from configuration"""
+        rules = []
+        
+        if 'rules' in config:
+            rules.extend(config['rules'])
+        
+        if 'actions' in config:
+            for action in config['actions']:
+                if 'rules' in action:
+                    rules.extend(action['rules'])
+        
+        return rules
+    
+    def explain_predicate(self, predicate: str) -> str:
+        """Convert predicate logic to human-readable explanation"""
+        return predicate_parser.explain_predicate(predicate)
+    
+    def explain_rule(self, rule: Dict[str, Any], rule_index: int) -> str:
+        """Generate step-by-step explanation for a single rule"""
+        return self.build_rule_explanation(rule, rule_index).to_markdown()
+    
+    def build_rule_explanation(self, rule: Dict[str, Any], rule_index: int) -> RuleExplanation:
+        """Build the structured step-by-step explanation for a single rule"""
+        config = rule.get('config', {})
+        predicate = config.get('predicate', '')
+        matches = config.get('matches', [])
+        
+        inclusions = rule.get('inclusions', config.get('inclusions', {}))
+        exceptions = rule.get('exceptions', config.get('exceptions', {}))
+        operator = rule.get('operator', config.get('operator', 'any'))
+        rule_type = rule.get('type', config.get('type', 'Unknown'))
+        
+        explanation = RuleExplanation(rule_index + 1, rule_type, operator)
+        
+        # Handle inclusions
+        if inclusions:
+            step = ExplanationStep("Step 1: Check Inclusions")
+            explanation.steps.append(step)
+            
+            attributes = inclusions.get('attributes', [])
+            groups = inclusions.get('groups', [])
+            
+            conditions = []
+            if attributes:
+                for attr in attributes:
+                    attr_name = attr.get('name', '')
+                    attr_value = attr.get('value', '')
+                    conditions.append(f"user's {attr_name} is '{attr_value}'")
+            
+            if groups:
+                conditions.append(f"user belongs to one of these groups: {', '.join(groups)}")
+            
+            if conditions:
+                joiner = ' OR ' if operator == 'any' else ' AND '
+                step.lines.append(ExplanationLine(f"Immuta checks if {joiner.join(conditions)}.", indent=True))
+                
+                predicate_explanation = self.explain_predicate(predicate)
+                step.lines.append(ExplanationLine("User will see data where", label="Action if True:",
+                                                  condition=predicate_explanation, bullet=True))
+                step.lines.append(ExplanationLine("Move to next condition.", label="Action if False:", bullet=True))
+        
+        # Handle exceptions
+        if exceptions:
+            step = ExplanationStep("Step 2: Check Exceptions")
+            explanation.steps.append(step)
+            exception_groups = exceptions.get('groups', [])
+            if exception_groups:
+                step.lines.append(ExplanationLine(f"Immuta checks if user belongs to exception groups: {', '.join(exception_groups)}.", indent=True))
+                step.lines.append(ExplanationLine("User will see all data (exception applies).", label="Action if Yes:", bullet=True))
+                step.lines.append(ExplanationLine("Apply the standard rule filter.", label="Action if No:", bullet=True))
+        
+        # Handle User Entitlements rules with matches
+        if matches and rule_type == 'Row Restriction by User Entitlements':
+            step = ExplanationStep("User Entitlements Rule:")
+            explanation.steps.append(step)
+            for match in matches:
+                attribute = match.get('attribute', '')
+                tag = match.get('tag', '')
+                match_type = match.get('type', '')
+                step.lines.append(ExplanationLine(f"User's {attribute} must match values in {tag} (type: {match_type})."))
+        
+        # Handle Masking rules
+        elif rule_type == 'Masking':
+            step = ExplanationStep("Masking Rule:")
+            explanation.steps.append(step)
+            fields = config.get('fields', [])
+            masking_config = config.get('maskingConfig', {})
+            masking_type = masking_config.get('type', 'Unknown')
+            
+            if fields:
+                step.lines.append(ExplanationLine("This rule applies masking to the following fields:"))
+                for masked_field in fields:
+                    column_tag = masked_field.get('columnTag', '')
+                    field_type = masked_field.get('type', '')
+                    step.lines.append(ExplanationLine(f"{column_tag} (type: {field_type})", bullet=True))
+                step.lines.append(ExplanationLine(masking_type, label="Masking Type:"))
+                step.lines.append(ExplanationLine(f"Data in these fields will be masked using {masking_type} method.", label="Action:"))
+        
+        # If no inclusions, explain the predicate directly
+        elif not inclusions and not exceptions and predicate:
+            predicate_explanation = self.explain_predicate(predicate)
+            explanation.steps.append(ExplanationStep("Condition:", [
+                ExplanationLine("User will see data where", condition=predicate_explanation)
+            ], inline=True))
+        
+        # Handle rules with no specific conditions
+        elif not inclusions and not exceptions and not predicate and not matches:
+            explanation.steps.append(ExplanationStep("Universal Rule:", [
+                ExplanationLine("This rule applies to all users and data.")
+            ], inline=True))
+        
+        return explanation
+    
+    def get_dataset_name(self, config: Dict) -> str:
+        """Extract dataset name from YAML config"""
+        circumstances = config.get('circumstances', [])
+        for circ in circumstances:
+            if circ.get('type') == 'tags':
+                tag = circ.get('tag', '')
+                if 'Table.' in tag:
+                    parts = tag.split('.')
+                    if len(parts) >= 2:
+                        return parts[-1]
+        
+        return config.get('name', 'unknown_dataset').replace(' ', '_').replace(':', '')
+    
+    def explain_yaml_file(self, file_path: str) -> ExplanationResult:
+        """Parse a YAML file once and build its explanation"""
+        file_name = os.path.basename(file_path)
+        config = self.parse_yaml_file(file_path)
+        if not config:
+            dataset_name = os.path.splitext(file_name)[0]
+            document = PolicyDocument("Error Processing File", "Unknown", file_name, sections=[
+                DocumentSection("Error", ["Could not parse YAML file. The file may be empty, corrupted, or contain invalid YAML syntax."]),
+                DocumentSection("Troubleshooting", bullets=[
+                    "Check if the file is empty",
+                    "Verify YAML syntax is correct",
+                    "Ensure file encoding is UTF-8",
+                ]),
+            ])
+            return ExplanationResult(file_path, {}, [], dataset_name, document)
+        
+        rules = self.extract_rules(config)
+        dataset_name = self.get_dataset_name(config)
+        # One 'explain' span per file, covering the YAML dump and the rule explanations
+        with span('explain', rules=len(rules)):
+            yaml_text = yaml.dump(config, default_flow_style=False, indent=2, sort_keys=False, allow_unicode=True)
+            if not rules:
+                document = PolicyDocument("Immuta Rule Configuration", dataset_name, file_name, yaml_text, sections=[
+                    DocumentSection("Analysis", ["No rules found in this configuration file. This may be:"], [
+                        "A configuration file without rules",
+                        "A template or placeholder file",
+                        "An incomplete configuration",
+                    ]),
+                ])
+            else:
+                document = PolicyDocument("Immuta Rule Configuration Explanation", dataset_name, file_name, yaml_text)
+                for i, rule in enumerate(rules):
+                    document.rules.append(self.build_rule_explanation(rule, i))
+        
+        return ExplanationResult(file_path, config, rules, dataset_name, document)
+    
+    def process_yaml_file(self, file_path: str) -> str:
+        """Process a single YAML file and generate explanation"""
+        result = self.explain_yaml_file(file_path)
+        return ExplanationText(result.explanation, result.document)
+    
+    def _as_document(self, content) -> PolicyDocument:
+        """Accept an ExplanationResult, a PolicyDocument or explanation markdown for rendering
+
+        Text from process_yaml_file() carries its document; any other string
+        is read back into a minimal document, as the old text-based
+        generate_docx()/generate_pdf() did.
+        """
+        if isinstance(content, ExplanationResult):
+            return content.document
+        if isinstance(content, PolicyDocument):
+            return content
+        if isinstance(content, ExplanationText) and content.document is not None:
+            return content.document
+        if isinstance(content, str):
+            return PolicyDocument.from_markdown(content)
+        raise TypeError("Expected an ExplanationResult, PolicyDocument or markdown text; "
+                        "use explain_yaml_file() to build one")
+    
+    def render(self, content, fmt: str, output_path: str, style: Optional[str] = None) -> str:
+        """Write content in one output format with the renderer registered for it and return the path"""
+        document = self._as_document(content)
+        renderer = get_renderer(fmt, style or self.renderer_styles.get(fmt))
+        with span(STAGE_NAMES.get(fmt, fmt)):
+            renderer(document, output_path)
+        return output_path
+    
+    def generate_markdown(self, content, output_path: str) -> str:
+        """Write the Markdown explanation to a file"""
+        return self.render(content, 'md', output_path)
+    
+    def generate_docx(self, content, output_path: str) -> str:
+        """Generate the Word document"""
+        return self.render(content, 'docx', output_path)
+    
+    def generate_pdf(self, content, output_path: str) -> str:
+        """Generate PDF document using reportlab"""
+        return self.render(content, 'pdf', output_path)
+
+
+def run_interactive(explainer: ExplainerEngine):
+    """Pick a YAML file in the current folder (or all of them) and write its DOCX explanation"""
+    current_dir = os.getcwd()
+    yaml_files = [f for f in os.listdir(current_dir) if f.endswith('.yaml')]
+    
+    if not yaml_files:
+        print("No YAML files found in current directory")
+        return
+    
+    print("Available YAML files:")
+    for i, file in enumerate(yaml_files, 1):
+        print(f"{i}. {file}")
+    
+    try:
+        choice = input("\nEnter file number to process (or 'all' for all files): ").strip()
+        
+        if choice.lower() == 'all':
+            from batch_processor import iter_documents
+            from output_sinks import DirectorySink
+            
+            manifest = GenerationManifest.load(current_dir, GENERATOR_VERSION)
+            digests = {}
+            skipped = 0
+            
+            def changed_files():
+                nonlocal skipped
+                for yaml_file in yaml_files:
+                    digest = try_hash_file(yaml_file)
+                    if digest and manifest.is_up_to_date(yaml_file, digest, ['docx']):
+                        print(f"Skipping {yaml_file} (unchanged)")
+                        skipped += 1
+                        continue
+                    digests[yaml_file] = digest
+                    print(f"\nProcessing {yaml_file}...")
+                    yield yaml_file
+            
+            # One file at a time: each document is written before the next file is read
+            for result in iter_documents(changed_files(), DirectorySink(current_dir), ['docx'], explainer,
+                                         name_template="{stem}_explanation.{fmt}"):
+                for output_file in result['outputs']:
+                    print(f"DOCX document saved to: {output_file}")
+                for error in result['errors']:
+                    print(error)
+                digest = digests.pop(result['file'], None)
+                if digest and result['success']:
+                    manifest.record(result['file'], digest, result['targets'])
+            
+            manifest.save()
+            if skipped:
+                print(f"\nSkipped {skipped} unchanged file(s)")
+        else:
+            file_index = int(choice) - 1
+            if 0 <= file_index < len(yaml_files):
+                selected_file = yaml_files[file_index]
+                print(f"\nProcessing {selected_file}...")
+                
+                result = explainer.explain_yaml_file(selected_file)
+                print(result.explanation)
+                
+                output_file = selected_file.replace('.yaml', '_explanation.docx')
+                explainer.generate_docx(result, output_file)
+                print(f"DOCX document saved to: {output_file}")
+            else:
+                print("Invalid file number")
+    
+    except ValueError:
+        print("Invalid input")
+    except KeyboardInterrupt:
+        print("\nOperation cancelled")
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+MANIFEST_FILE_NAME = '.immuta_manifest.json'
+MANIFEST_SCHEMA = 1
+
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def try_hash_file(file_path: str) -> Optional[str]:
+    """SHA-256 of a file, or None if it cannot be read"""
+    try:
+        return hash_file(file_path)
+    except OSError:
+        return None
+
+
+class GenerationManifest:
+    """Record of which inputs produced which outputs, stored in the output folder
+
+    Each entry is keyed by the absolute input path and stores the input's
+    content hash, the generator version and the generated file per format.
+    An input is up to date when its hash and the generator version match and
+    every requested output still exists.
+    """
+
+    def __init__(self, output_dir: str, generator_version: str):
+        self.output_dir = str(output_dir)
+        self.generator_version = generator_version
+        self.path = os.path.join(self.output_dir, MANIFEST_FILE_NAME)
+        self.entries: Dict[str, Dict] = {}
+
+    @classmethod
+    def load(cls, output_dir: str, generator_version: str) -> 'GenerationManifest':
+        manifest = cls(output_dir, generator_version)
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('schema') == MANIFEST_SCHEMA:
+                manifest.entries = data.get('files', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable manifest {manifest.path}: {e}")
+        return manifest
+
+    @staticmethod
+    def key(input_path: str) -> str:
+        return os.path.abspath(str(input_path))
+
+    def outputs_for(self, input_path: str) -> Dict[str, str]:
+        entry = self.entries.get(self.key(input_path), {})
+        return dict(entry.get('outputs', {}))
+
+    def is_up_to_date(self, input_path: str, digest: str, formats: Iterable[str]) -> bool:
+        entry = self.entries.get(self.key(input_path))
+        if not entry:
+            return False
+        if entry.get('sha256') != digest or entry.get('generator_version') != self.generator_version:
+            return False
+        outputs = entry.get('outputs', {})
+        for fmt in formats:
+            output_name = outputs.get(fmt)
+            if not output_name or not os.path.exists(os.path.join(self.output_dir, output_name)):
+                return False
+        return True
+
+    def record(self, input_path: str, digest: str, outputs: Dict[str, str]):
+        """Remember the output file each format of an input is written to
+
+        Outputs recorded earlier for other formats are kept as long as the
+        input and generator version have not changed.
+        """
+        key = self.key(input_path)
+        entry = self.entries.get(key, {})
+        if entry.get('sha256') == digest and entry.get('generator_version') == self.generator_version:
+            names = dict(entry.get('outputs', {}))
+        else:
+            names = {}
+        names.update({fmt: os.path.basename(path) for fmt, path in outputs.items()})
+        self.entries[key] = {
+            'sha256': digest,
+            'generator_version': self.generator_version,
+            'outputs': names,
+        }
+
+    def save(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        data = {
+            'schema': MANIFEST_SCHEMA,
+            'generator_version': self.generator_version,
+            'files': self.entries,
+        }
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+def plan_incremental(manifest: GenerationManifest, input_paths: Iterable[str], formats: Iterable[str],
+                     digests: Dict[str, Optional[str]]):
+    """Split inputs into (to_generate, to_skip) using the manifest
+
+    An unchanged input is still regenerated when a changed input previously
+    wrote one of the same output files, so shared outputs end up exactly as a
+    full run would leave them. Inputs whose digest is ``None`` (unreadable)
+    are always regenerated.
+    """
+    formats = tuple(formats)
+    input_paths = [str(path) for path in input_paths]
+
+    changed = [path for path in input_paths
+               if digests.get(path) is None or not manifest.is_up_to_date(path, digests[path], formats)]
+    changed_set = set(changed)
+    changed_outputs = set()
+    for path in changed:
+        changed_outputs.update(manifest.outputs_for(path).values())
+
+    to_generate, to_skip = [], []
+    for path in input_paths:
+        if path in changed_set or changed_outputs.intersection(manifest.outputs_for(path).values()):
+            to_generate.append(path)
+        else:
+            to_skip.append(path)
+    return to_generate, to_skip
@@ -0,0 +1,181 @@
+"""Non-interactive document generation for scheduled and scripted runs
+
+    python immuta_cli.py Input -o output --formats docx,pdf,md --jobs 8 --changed-only
+
+Progress goes to stderr and a JSON summary to stdout (or --summary FILE).
+Exit codes: 0 all files generated or unchanged, 1 some files failed (including
+files that are empty or not valid YAML), 2 invalid arguments, 3 no input files
+found.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+from batch_processor import (DEFAULT_FORMATS, SUPPORTED_FORMATS, BatchProcessor, default_worker_count,
+                             find_yaml_files)
+from immuta_rule_explainer_improved import GENERATOR_VERSION
+from instrumentation import format_timings
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_USAGE = 2
+EXIT_NO_INPUT = 3
+
+YAML_SUFFIXES = ('.yaml', '.yml')
+
+
+def resolve_inputs(inputs: Iterable[str]) -> List[str]:
+    """Expand folders and glob patterns into YAML files, keeping first-seen order"""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = find_yaml_files(item)
+        elif glob.has_magic(item):
+            matches = sorted(Path(path) for path in glob.glob(item, recursive=True))
+        else:
+            matches = [Path(item)] if os.path.isfile(item) else []
+        files.extend(str(path) for path in matches if path.suffix.lower() in YAML_SUFFIXES)
+    return list(dict.fromkeys(files))
+
+
+def parse_formats(value: str) -> List[str]:
+    formats = [fmt.strip().lower() for fmt in value.split(',') if fmt.strip()]
+    unsupported = [fmt for fmt in formats if fmt not in SUPPORTED_FORMATS]
+    if not formats or unsupported:
+        raise argparse.ArgumentTypeError(
+            f"choose from {', '.join(SUPPORTED_FORMATS)} (got {value!r})")
+    return list(dict.fromkeys(formats))
+
+
+def _failed(result: Dict) -> bool:
+    # Unparseable files still get an error document, but count as failures here
+    return not result["success"] or not result["parsed"]
+
+
+def build_summary(results: List[Dict], args, duration: float) -> Dict:
+    failed = [r for r in results if _failed(r)]
+    skipped = [r for r in results if r["skipped"]]
+    return {
+        "generator_version": GENERATOR_VERSION,
+        "output_dir": os.path.abspath(args.output_dir),
+        "formats": args.formats,
+        "jobs": args.jobs,
+        "changed_only": args.changed_only,
+        "total": len(results),
+        "generated": len(results) - len(failed) - len(skipped),
+        "skipped": len(skipped),
+        "failed": len(failed),
+        "duration_seconds": round(duration, 3),
+        "files": [{
+            "file": r["file"],
+            "success": not _failed(r),
+            "parsed": r["parsed"],
+            "skipped": r["skipped"],
+            "outputs": r["outputs"],
+            "errors": r["errors"],
+            **({"timings_ms": r["timings"]} if r.get("timings") else {}),
+            **({"memory_peaks_kb": r["memory_peaks_kb"]} if r.get("memory_peaks_kb") else {}),
+        } for r in results],
+    }
+
+
+@contextlib.contextmanager
+def _stdout_to_stderr() -> Iterator[TextIO]:
+    """Send stdout (including worker processes) to stderr while the block runs
+
+    Yields a stream for the real stdout. Anything printed while parsing
+    (e.g. YAML warnings) would otherwise corrupt the JSON summary. File
+    descriptor 1 is restored on exit, so callers of main() keep their stdout.
+    """
+    try:
+        sys.stdout.flush()
+        saved_fd = os.dup(sys.stdout.fileno())
+    except (AttributeError, OSError, ValueError):
+        # No real file descriptor (e.g. captured stdout); leave it alone
+        yield sys.stdout
+        return
+    real_stdout = os.fdopen(os.dup(saved_fd), 'w', encoding='utf-8')
+    try:
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+        yield real_stdout
+    finally:
+        sys.stdout.flush()
+        real_stdout.close()
+        os.dup2(saved_fd, sys.stdout.fileno())
+        os.close(saved_fd)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate Immuta policy documents without the GUI")
+    parser.add_argument("inputs", nargs="+", help="YAML files, folders or glob patterns (e.g. 'policies/**/*.yaml')")
+    parser.add_argument("-o", "--output-dir", default="output", help="Folder for generated documents (default: output)")
+    parser.add_argument("--formats", type=parse_formats, default=list(DEFAULT_FORMATS),
+                        help=f"Comma-separated formats from {','.join(SUPPORTED_FORMATS)} (default: {','.join(DEFAULT_FORMATS)})")
+    parser.add_argument("-j", "--jobs", type=int, default=default_worker_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Skip files unchanged since the last run into the same output folder")
+    parser.add_argument("--timings", action="store_true", help="Include per-stage timings for each file in the summary")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also record the tracemalloc peak per stage (slower; implies --timings)")
+    parser.add_argument("--summary", help="Write the JSON summary to this file instead of stdout")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print errors to stderr")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_OK if e.code == 0 else EXIT_USAGE
+    if args.jobs < 1:
+        parser.print_usage(sys.stderr)
+        print("error: --jobs must be at least 1", file=sys.stderr)
+        return EXIT_USAGE
+
+    yaml_files = resolve_inputs(args.inputs)
+    if not yaml_files:
+        print(f"No YAML files found in: {', '.join(args.inputs)}", file=sys.stderr)
+        return EXIT_NO_INPUT
+
+    def on_result(result: Dict):
+        if result["skipped"]:
+            line = f"↷ Skipped (unchanged): {result['name']}"
+        elif not _failed(result):
+            line = f"✓ {result['name']} -> {', '.join(os.path.basename(path) for path in result['outputs'])}"
+        else:
+            line = f"✗ {result['name']}: {'; '.join(result['errors']) or 'empty or invalid YAML'}"
+        if result.get("timings"):
+            line += f"\n    {format_timings(result['timings'], result.get('memory_peaks_kb'))}"
+        if not args.quiet or _failed(result):
+            print(line, file=sys.stderr, flush=True)
+
+    start = time.perf_counter()
+    with (_stdout_to_stderr() if not args.summary else contextlib.nullcontext()) as summary_stream:
+        processor = BatchProcessor(args.output_dir, args.formats, args.jobs,
+                                   timings=args.timings, trace_memory=args.trace_memory)
+        results = processor.run(yaml_files, on_result, changed_only=args.changed_only)
+        summary = build_summary(results, args, time.perf_counter() - start)
+
+        if args.summary:
+            with open(args.summary, 'w', encoding='utf-8') as file:
+                json.dump(summary, file, indent=2, ensure_ascii=False)
+        else:
+            json.dump(summary, summary_stream, indent=2, ensure_ascii=False)
+            summary_stream.write("\n")
+            summary_stream.flush()
+
+    if not args.quiet:
+        print(f"{summary['generated']} generated, {summary['skipped']} skipped, "
+              f"{summary['failed']} failed in {summary['duration_seconds']}s", file=sys.stderr)
+    return EXIT_FAILURES if summary["failed"] else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
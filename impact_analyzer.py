@@ -1,37 +1,73 @@
-import yaml
-from typing import Dict, List, Set, Tuple
-from openai import OpenAI
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from llm_client import LLMClient, get_default_client
+from policy_cache import get_policy_cache
+from instrumentation import span
+from predicate_parser import (EQUIVALENT, EXPANDED, MIXED, RESTRICTED, PredicateDiff,
+                              compare_predicates, normalize_predicate)
+from rule_alignment import ADDED, MODIFIED, REMOVED, align_rules
+
+
+@dataclass(frozen=True)
+class RuleRecord:
+    """The comparable fields of one rule, extracted once per analysis"""
+    number: int
+    rule_type: str
+    groups: FrozenSet[str]
+    operator: str
+    predicate: str
+    normalized_predicate: str
+    
+    @property
+    def fingerprint(self) -> Tuple:
+        """Identity used to align rules: type, groups, operator and predicate"""
+        return (self.rule_type, self.groups, self.operator, self.normalized_predicate)
+
 
 class ImpactAnalyzer:
-    def __init__(self):
+    def __init__(self, llm_client: Optional[LLMClient] = None):
         self.changes = []
-        try:
-            self.client = OpenAI(
-                base_url="https://gpt.mfec.co.th/litellm",
-                api_key="sk-2G0DcuqjvJmYToAGXdiEiA"
-            )
-        except Exception:
-            self.client = None
+        self._llm = llm_client
+    
+    @property
+    def llm(self) -> LLMClient:
+        """LLM client, only set up once an LLM analysis is requested"""
+        if self._llm is None:
+            self._llm = get_default_client()
+        return self._llm
     
-    def analyze_impact(self, old_yaml: str, new_yaml: str) -> Dict:
-        """Analyze impact of YAML changes on data access"""
+    def analyze_impact(self, old_yaml: str, new_yaml: str, wait_for_llm: bool = True,
+                       include_llm: bool = True) -> Dict:
+        """Analyze impact of YAML changes on data access
+        
+        With wait_for_llm=False the deterministic analysis is returned right
+        away; ``llm_future`` resolves to the LLM text and ``llm_analysis``
+        is only filled in if it was already cached. include_llm=False skips
+        the LLM entirely (used by bulk analysis).
+        """
         try:
-            old_config = yaml.safe_load(old_yaml)
-            new_config = yaml.safe_load(new_yaml)
+            cache = get_policy_cache()
+            with span('parse'):
+                old_config = cache.parse_text(old_yaml)
+                new_config = cache.parse_text(new_yaml)
         except Exception as e:
             return {"error": f"YAML parsing error: {e}"}
         
-        old_rules = self._extract_rules(old_config)
-        new_rules = self._extract_rules(new_config)
+        with span('impact'):
+            old_records = self._build_records(self._extract_rules(old_config))
+            new_records = self._build_records(self._extract_rules(new_config))
+            impact = self._diff_records(old_records, new_records)
         
-        impact = {
-            "summary": self._get_summary(old_rules, new_rules),
-            "rule_changes": self._compare_rules(old_rules, new_rules),
-            "access_impact": self._analyze_access_impact(old_rules, new_rules),
-            "affected_users": self._get_affected_users(old_rules, new_rules)
-        }
+        if not include_llm:
+            return impact
         
-        impact["llm_analysis"] = self._get_llm_analysis(old_yaml, new_yaml, impact)
+        future = self.submit_llm_analysis(old_yaml, new_yaml, impact)
+        if wait_for_llm:
+            impact["llm_analysis"] = future.result()
+        else:
+            impact["llm_future"] = future
+            impact["llm_analysis"] = future.result() if future.done() else None
         
         return impact
     
@@ -44,83 +80,149 @@ class ImpactAnalyzer:
                     rules.extend(action['rules'])
         return rules
     
-    def _get_summary(self, old_rules: List, new_rules: List) -> Dict:
-        """Get high-level summary of changes"""
-        return {
-            "old_rule_count": len(old_rules),
-            "new_rule_count": len(new_rules),
-            "rules_added": max(0, len(new_rules) - len(old_rules)),
-            "rules_removed": max(0, len(old_rules) - len(new_rules)),
-            "impact_level": self._calculate_impact_level(old_rules, new_rules)
-        }
+    def _build_records(self, rules: List[Dict]) -> List[RuleRecord]:
+        """Normalize every rule once so later passes never re-walk the raw dicts"""
+        records = []
+        for number, rule in enumerate(rules, 1):
+            config = rule.get('config', {}) or {}
+            predicate = str(config.get('predicate', ''))
+            records.append(RuleRecord(
+                number=number,
+                rule_type=rule.get('type', ''),
+                groups=frozenset(self._get_groups(rule)),
+                operator=rule.get('operator', config.get('operator', 'any')),
+                predicate=predicate,
+                normalized_predicate=normalize_predicate(predicate),
+            ))
+        return records
     
-    def _compare_rules(self, old_rules: List, new_rules: List) -> List[Dict]:
-        """Compare individual rules"""
-        changes = []
+    def _align_rules(self, old_records: List[RuleRecord], new_records: List[RuleRecord]) -> List[Tuple]:
+        """Match old rules to new rules by content instead of position
         
-        # Check for modified/removed rules
-        for i, old_rule in enumerate(old_rules):
-            if i < len(new_rules):
-                new_rule = new_rules[i]
-                rule_changes = self._compare_single_rule(old_rule, new_rule, i + 1)
-                if rule_changes:
-                    changes.append(rule_changes)
-            else:
-                changes.append({
-                    "rule_number": i + 1,
+        Returns (operation, old index, new index) tuples in rule order; a rule
+        inserted at the top shows up as one ADDED entry instead of shifting
+        every later rule. Only rules of the same type are paired as MODIFIED.
+        """
+        old_fingerprints = [record.fingerprint for record in old_records]
+        new_fingerprints = [record.fingerprint for record in new_records]
+        same_type = lambda i, j: old_records[i].rule_type == new_records[j].rule_type
+        return align_rules(old_fingerprints, new_fingerprints, same_type)
+    
+    def _diff_records(self, old_records: List[RuleRecord], new_records: List[RuleRecord]) -> Dict:
+        """Derive every impact metric from a single pass over the aligned rules"""
+        rule_changes = []
+        access_changes = []
+        added = removed = changed = 0
+        old_groups, new_groups = set(), set()
+        
+        for op, old_index, new_index in self._align_rules(old_records, new_records):
+            old = old_records[old_index] if old_index is not None else None
+            new = new_records[new_index] if new_index is not None else None
+            if old:
+                old_groups.update(old.groups)
+            if new:
+                new_groups.update(new.groups)
+            
+            if op == ADDED:
+                added += 1
+                rule_changes.append({
+                    "rule_number": new.number,
+                    "change_type": "ADDED",
+                    "description": f"New rule {new.number} was added",
+                    "impact": "MEDIUM"
+                })
+            elif op == REMOVED:
+                removed += 1
+                rule_changes.append({
+                    "rule_number": old.number,
+                    "old_rule_number": old.number,
                     "change_type": "REMOVED",
-                    "description": f"Rule {i + 1} was removed",
+                    "description": f"Rule {old.number} was removed",
                     "impact": "HIGH"
                 })
+            elif op == MODIFIED:
+                rule_change = self._compare_single_rule(old, new, new.number)
+                if rule_change:
+                    rule_change["old_rule_number"] = old.number
+                    rule_changes.append(rule_change)
+                    changed += 1
+                    scenario = self._access_scenario(new, rule_change.get("predicate_diff"))
+                    if scenario:
+                        access_changes.append(scenario)
         
-        # Check for added rules
-        for i in range(len(old_rules), len(new_rules)):
-            changes.append({
-                "rule_number": i + 1,
-                "change_type": "ADDED",
-                "description": f"New rule {i + 1} was added",
-                "impact": "MEDIUM"
-            })
-        
-        return changes
+        impact_level = self._calculate_impact_level(len(old_records), len(new_records), changed + added + removed)
+        return {
+            "summary": {
+                "old_rule_count": len(old_records),
+                "new_rule_count": len(new_records),
+                "rules_added": added,
+                "rules_removed": removed,
+                "impact_level": impact_level
+            },
+            "rule_changes": rule_changes,
+            "access_impact": self._analyze_access_impact(access_changes),
+            "affected_users": sorted(old_groups.symmetric_difference(new_groups))
+        }
     
-    def _compare_single_rule(self, old_rule: Dict, new_rule: Dict, rule_num: int) -> Dict:
+    def _compare_single_rule(self, old_rule: RuleRecord, new_rule: RuleRecord, rule_num: int) -> Dict:
         """Compare a single rule between old and new"""
         changes = []
         
-        # Compare predicates
-        old_predicate = old_rule.get('config', {}).get('predicate', '')
-        new_predicate = new_rule.get('config', {}).get('predicate', '')
-        if old_predicate != new_predicate:
-            changes.append(f"Predicate changed from '{old_predicate}' to '{new_predicate}'")
+        # Compare predicates by the values they allow; formatting-only edits are ignored
+        predicate_diff = None
+        if old_rule.normalized_predicate != new_rule.normalized_predicate:
+            predicate_diff = compare_predicates(old_rule.predicate, new_rule.predicate)
+            if predicate_diff.change == EQUIVALENT:
+                predicate_diff = None
+            else:
+                changes.extend(self._describe_predicate_diff(old_rule, new_rule, predicate_diff))
         
         # Compare inclusions
-        old_groups = self._get_groups(old_rule)
-        new_groups = self._get_groups(new_rule)
-        if old_groups != new_groups:
-            added_groups = new_groups - old_groups
-            removed_groups = old_groups - new_groups
+        if old_rule.groups != new_rule.groups:
+            added_groups = new_rule.groups - old_rule.groups
+            removed_groups = old_rule.groups - new_rule.groups
             if added_groups:
-                changes.append(f"Added groups: {', '.join(added_groups)}")
+                changes.append(f"Added groups: {', '.join(sorted(added_groups))}")
             if removed_groups:
-                changes.append(f"Removed groups: {', '.join(removed_groups)}")
+                changes.append(f"Removed groups: {', '.join(sorted(removed_groups))}")
         
         # Compare operators
-        old_op = old_rule.get('operator', old_rule.get('config', {}).get('operator', 'any'))
-        new_op = new_rule.get('operator', new_rule.get('config', {}).get('operator', 'any'))
-        if old_op != new_op:
-            changes.append(f"Operator changed from '{old_op}' to '{new_op}'")
+        if old_rule.operator != new_rule.operator:
+            changes.append(f"Operator changed from '{old_rule.operator}' to '{new_rule.operator}'")
         
         if changes:
-            return {
+            rule_change = {
                 "rule_number": rule_num,
                 "change_type": "MODIFIED",
                 "description": "; ".join(changes),
-                "impact": self._assess_rule_impact(changes)
+                "impact": self._assess_rule_impact(changes, predicate_diff)
             }
+            if predicate_diff:
+                rule_change["predicate_diff"] = {
+                    "change": predicate_diff.change,
+                    "added": {key: list(values) for key, values in predicate_diff.added},
+                    "removed": {key: list(values) for key, values in predicate_diff.removed},
+                    "all_rows_before": predicate_diff.old_always_true,
+                    "all_rows_after": predicate_diff.new_always_true,
+                }
+            return rule_change
         
         return None
     
+    def _describe_predicate_diff(self, old_rule: RuleRecord, new_rule: RuleRecord,
+                                 predicate_diff: PredicateDiff) -> List[str]:
+        """Readable lines for a predicate change, listing values when they are known"""
+        if not predicate_diff.added and not predicate_diff.removed:
+            return [f"Predicate changed from '{old_rule.predicate}' to '{new_rule.predicate}' "
+                    f"({predicate_diff.change.lower()})"]
+        
+        lines = []
+        for key, values in predicate_diff.added:
+            lines.append(f"Predicate values added to {key}: {', '.join(map(str, values))}")
+        for key, values in predicate_diff.removed:
+            lines.append(f"Predicate values removed from {key}: {', '.join(map(str, values))}")
+        return lines
+    
     def _get_groups(self, rule: Dict) -> Set[str]:
         """Extract groups from a rule"""
         groups = set()
@@ -129,164 +231,83 @@ class ImpactAnalyzer:
             groups.update(inclusions['groups'])
         return groups
     
-    def _analyze_access_impact(self, old_rules: List, new_rules: List) -> Dict:
-        """Analyze impact on data access using top-down rule evaluation"""
-        # Check for predicate changes that indicate expanded access
-        has_predicate_expansion = False
-        for i, old_rule in enumerate(old_rules):
-            if i < len(new_rules):
-                old_pred = old_rule.get('config', {}).get('predicate', '')
-                new_pred = new_rules[i].get('config', {}).get('predicate', '')
-                if old_pred != new_pred and new_pred == '1=1':
-                    has_predicate_expansion = True
-                    break
+    def _access_scenario(self, rule: RuleRecord, predicate_diff: Optional[Dict]) -> Optional[Dict]:
+        """Access change for the users of one rule whose predicate changed"""
+        if not predicate_diff or predicate_diff["change"] not in (EXPANDED, RESTRICTED, MIXED):
+            return None
         
-        # Create access change scenario for predicate expansion
-        access_changes = []
-        if has_predicate_expansion:
-            access_changes.append({
-                "user_type": "Division_OWO_Users",
-                "old_access": True,
-                "new_access": True,
-                "change": "EXPANDED",
-                "description": "Users will see ALL data (1=1) instead of filtered data"
-            })
+        if predicate_diff["all_rows_after"]:
+            description = "Users will see ALL data (1=1) instead of filtered data"
+        elif predicate_diff["all_rows_before"]:
+            description = "Users will only see filtered data instead of ALL data"
+        else:
+            parts = []
+            for key, values in predicate_diff["added"].items():
+                parts.append(f"now also see rows where {key} is {', '.join(map(str, values))}")
+            for key, values in predicate_diff["removed"].items():
+                parts.append(f"no longer see rows where {key} is {', '.join(map(str, values))}")
+            description = "Users " + "; ".join(parts) if parts else "Filter conditions changed"
         
-        has_expanded = len(access_changes) > 0
+        return {
+            "user_type": ", ".join(sorted(rule.groups)) or f"Rule {rule.number} users",
+            "rule_number": rule.number,
+            "old_access": True,
+            "new_access": True,
+            "change": predicate_diff["change"],
+            "description": description
+        }
+    
+    def _analyze_access_impact(self, access_changes: List[Dict]) -> Dict:
+        """Analyze impact on data access using top-down rule evaluation"""
+        has_expanded = any(c["change"] in (EXPANDED, MIXED) for c in access_changes)
+        has_restricted = any(c["change"] in (RESTRICTED, MIXED) for c in access_changes)
         
         return {
             "access_expanded": has_expanded,
-            "access_restricted": False, 
-            "access_unchanged": not has_expanded,
-            "description": "Division OWO users will see ALL records (1=1) instead of filtered data" if has_expanded else "No significant access changes detected",
+            "access_restricted": has_restricted,
+            "access_unchanged": not (has_expanded or has_restricted),
+            "description": self._get_detailed_access_description(access_changes),
             "affected_scenarios": access_changes
         }
     
-    def _get_affected_users(self, old_rules: List, new_rules: List) -> List[str]:
-        """Get list of potentially affected user groups"""
-        old_groups = set()
-        new_groups = set()
-        
-        for rule in old_rules:
-            old_groups.update(self._get_groups(rule))
-        
-        for rule in new_rules:
-            new_groups.update(self._get_groups(rule))
-        
-        affected = old_groups.symmetric_difference(new_groups)
-        return list(affected)
-    
-    def _get_llm_analysis(self, old_yaml: str, new_yaml: str, impact: Dict) -> str:
-        """Get LLM analysis of the impact using few-shot examples"""
-        if not self.client:
-            return "LLM analysis unavailable"
+    def submit_llm_analysis(self, old_yaml: str, new_yaml: str, impact: Dict) -> Future:
+        """Start the LLM analysis of the impact using few-shot examples
         
-        try:
-            prompt = f"""You are an expert in Immuta data policy analysis. Analyze the changes between old and new YAML configurations and provide impact assessment in Thai.
-
-# Few-shot Examples:
-
-## Example 1:
-Old YAML: predicate: "DeptName in ('ECM', 'EFE')"
-New YAML: predicate: "1=1"
-
-Analysis:
-🚨 **ผลกระทบสำคัญ - Predicate เปลี่ยนเป็น 1=1**
-
-**ผลกระทบทางธุรกิจ:**
-- ผู้ใช้จะเห็นข้อมูลทั้งหมด (ไม่มีการกรอง)
-- เดิมจะเห็นเฉพาะข้อมูลที่ตรงเงื่อนไข Department
-
-**ความเสี่ยงด้านความปลอดภัย:**
-- ข้อมูลที่ไม่ควรเห็นอาจถูกเปิดเผย
-- การควบคุมการเข้าถึงข้อมูลลดลง
-
-**คำแนะนำ:**
-- ตรวจสอบว่าการเปลี่ยนแปลงนี้เป็นไปตามความต้องการจริงหรือไม่
-- ทดสอบกับผู้ใช้ก่อนนำไปใช้งานจริง
-
-## Example 2:
-Old YAML: groups: ["team.finance"]
-New YAML: groups: ["team.finance", "team.audit"]
-
-Analysis:
-✅ **การเพิ่มสิทธิ์การเข้าถึง**
-
-**ผลกระทบทางธุรกิจ:**
-- เพิ่มทีม Audit เข้าสู่กลุ่มที่สามารถเข้าถึงข้อมูลได้
-- ขยายการเข้าถึงข้อมูลให้กับผู้ใช้เพิ่มเติม
-
-**ความเสี่ยงด้านความปลอดภัย:**
-- ความเสี่ยงต่ำ - เป็นการเพิ่มทีมที่เกี่ยวข้อง
-
-**คำแนะนำ:**
-- ตรวจสอบว่าทีม Audit มีความจำเป็นต้องเข้าถึงข้อมูลนี้
-
-# Current Analysis:
-Old YAML:
-{old_yaml}
-
-New YAML:
-{new_yaml}
-
-Detected Changes:
-{impact.get('rule_changes', [])}
-
-Please analyze the impact in Thai following the format above:"""
-
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert in data policy analysis. Provide detailed impact analysis in Thai language."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.3
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            return f"LLM analysis error: {str(e)}"
+        Returns a future resolving to the analysis text; identical YAML pairs
+        are answered from the on-disk cache.
+        """
+        return self.llm.submit_impact_analysis(old_yaml, new_yaml, impact.get('rule_changes', []))
     
-    def _calculate_impact_level(self, old_rules: List, new_rules: List) -> str:
-        """Calculate overall impact level"""
-        if len(old_rules) != len(new_rules):
+    def _calculate_impact_level(self, old_count: int, new_count: int, changes: int) -> str:
+        """Calculate overall impact level from rule counts and changed rules"""
+        if old_count != new_count:
             return "HIGH"
         
-        changes = 0
-        for i, old_rule in enumerate(old_rules):
-            if i < len(new_rules):
-                if self._compare_single_rule(old_rule, new_rules[i], i + 1):
-                    changes += 1
-        
         if changes == 0:
             return "NONE"
-        elif changes <= len(old_rules) * 0.3:
+        elif changes <= old_count * 0.3:
             return "LOW"
-        elif changes <= len(old_rules) * 0.7:
+        elif changes <= old_count * 0.7:
             return "MEDIUM"
         else:
             return "HIGH"
     
-    def _assess_rule_impact(self, changes: List[str]) -> str:
-        """Assess impact level of rule changes"""
-        if any("Predicate changed" in change for change in changes):
+    def _assess_rule_impact(self, changes: List[str], predicate_diff: Optional[PredicateDiff] = None) -> str:
+        """Assess impact level of rule changes
+        
+        Predicate changes that expand access, or cannot be classified, are
+        HIGH; a pure restriction is MEDIUM.
+        """
+        if predicate_diff is not None and predicate_diff.change != RESTRICTED:
             return "HIGH"
+        elif predicate_diff is not None:
+            return "MEDIUM"
         elif any("Removed groups" in change for change in changes):
             return "MEDIUM"
-        else:
-            return "LOW" in change for change in changes):
-            return "HIGH"
         elif any("Added groups" in change for change in changes):
             return "MEDIUM"
         elif any("Operator changed" in change for change in changes):
             return "MEDIUM"
-        else:
-            return "LOW" in change for change in changes):
-            return "HIGH"
-        elif any("Added groups" in change for change in changes):
-            return "MEDIUM"
         else:
             return "LOW"
     
@@ -297,11 +318,14 @@ Please analyze the impact in Thai following the format above:"""
         
         expanded = [c for c in access_changes if c["change"] == "EXPANDED"]
         restricted = [c for c in access_changes if c["change"] == "RESTRICTED"]
+        mixed = [c for c in access_changes if c["change"] == "MIXED"]
         
         descriptions = []
         if expanded:
             descriptions.append(f"{len(expanded)} user scenario(s) gained access")
         if restricted:
             descriptions.append(f"{len(restricted)} user scenario(s) lost access")
+        if mixed:
+            descriptions.append(f"{len(mixed)} user scenario(s) gained and lost access")
         
         return "; ".join(descriptions)
\ No newline at end of file
@@ -0,0 +1,233 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+# Stage names used by the pipeline, in the order they run
+PIPELINE_STAGES = ('parse', 'extract_rules', 'explain', 'markdown', 'docx', 'pdf', 'zip', 'impact', 'llm')
+
+
+@dataclass
+class Span:
+    """One timed stage; peak_kb is only set while memory tracking is on"""
+    name: str
+    duration_ms: float
+    file: Optional[str] = None
+    start: float = 0.0
+    peak_kb: Optional[float] = None
+    pid: int = 0
+    attrs: Dict = field(default_factory=dict)
+
+
+class MemorySink:
+    """Keeps spans in memory, e.g. for a results pane or tests"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def timings(self) -> Dict[str, float]:
+        """Total milliseconds per stage, in pipeline order"""
+        totals = {}
+        for span in self.spans:
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return _ordered({name: round(ms, 3) for name, ms in totals.items()})
+
+    def peaks(self) -> Dict[str, float]:
+        """Highest traced memory peak (KB) per stage, for spans that tracked memory"""
+        peaks = {}
+        for span in self.spans:
+            if span.peak_kb is not None:
+                peaks[span.name] = max(peaks.get(span.name, 0.0), span.peak_kb)
+        return _ordered(peaks)
+
+    def by_file(self) -> Dict[str, Dict[str, float]]:
+        """Total milliseconds per stage for each file"""
+        files = {}
+        for span in self.spans:
+            stages = files.setdefault(span.file or '', {})
+            stages[span.name] = round(stages.get(span.name, 0.0) + span.duration_ms, 3)
+        return {name: _ordered(stages) for name, stages in files.items()}
+
+
+class JsonLinesSink:
+    """Appends one JSON object per span to a file; safe to share between worker processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, span: Span):
+        line = json.dumps(asdict(span), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            # One small O_APPEND write per span keeps lines from interleaving
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line)
+
+
+def _ordered(stages: Dict[str, float]) -> Dict[str, float]:
+    order = {name: index for index, name in enumerate(PIPELINE_STAGES)}
+    return dict(sorted(stages.items(), key=lambda item: order.get(item[0], len(order))))
+
+
+# Sinks for every span in the process, and sinks scoped to the current context
+# (a batch worker's file, a Streamlit session's run) via collect()
+_global_sinks = []
+_scoped_sinks = contextvars.ContextVar('instrumentation_sinks', default=())
+_current_file = contextvars.ContextVar('instrumentation_file', default=None)
+_memory_users = 0
+_memory_lock = threading.Lock()
+_open_spans = threading.local()
+_env_configured = False
+
+
+def add_sink(sink):
+    """Send every span in this process to sink (JsonLinesSink, MemorySink or any .record(span))"""
+    global _global_sinks
+    _global_sinks = _global_sinks + [sink]
+
+
+def remove_sink(sink):
+    global _global_sinks
+    _global_sinks = [s for s in _global_sinks if s is not sink]
+
+
+def start_memory_tracking():
+    """Start tracemalloc so spans report their peak; calls nest with stop_memory_tracking()"""
+    global _memory_users
+    with _memory_lock:
+        if _memory_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _memory_users += 1
+
+
+def stop_memory_tracking():
+    global _memory_users
+    with _memory_lock:
+        _memory_users = max(0, _memory_users - 1)
+        if _memory_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def configure_from_env():
+    """Opt in through IMMUTA_TRACE_FILE (JSON lines path) and IMMUTA_TRACE_MEMORY=1
+
+    Runs once per process; worker processes inherit the environment, so
+    batch runs write all their spans to the same file.
+    """
+    global _env_configured
+    if _env_configured:
+        return
+    _env_configured = True
+    trace_file = os.environ.get('IMMUTA_TRACE_FILE')
+    if trace_file:
+        add_sink(JsonLinesSink(trace_file))
+        if os.environ.get('IMMUTA_TRACE_MEMORY', '').lower() in ('1', 'true', 'yes'):
+            start_memory_tracking()
+
+
+@contextmanager
+def file_scope(file_name: Optional[str]) -> Iterator[None]:
+    """Tag spans opened inside the block with the policy file they belong to"""
+    token = _current_file.set(file_name)
+    try:
+        yield
+    finally:
+        _current_file.reset(token)
+
+
+@contextmanager
+def collect(trace_memory: bool = False, sink: Optional[MemorySink] = None) -> Iterator[MemorySink]:
+    """Collect the spans of the current context (thread or task) into a MemorySink
+
+    Pass an existing sink to add several separate blocks to one breakdown.
+    """
+    sink = sink if sink is not None else MemorySink()
+    token = _scoped_sinks.set(_scoped_sinks.get() + (sink,))
+    if trace_memory:
+        start_memory_tracking()
+    try:
+        yield sink
+    finally:
+        if trace_memory:
+            stop_memory_tracking()
+        _scoped_sinks.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[None]:
+    """Time the enclosed block as stage name; a no-op unless a sink is listening"""
+    configure_from_env()
+    sinks = _global_sinks + list(_scoped_sinks.get())
+    if not sinks:
+        yield
+        return
+
+    # tracemalloc has one process-wide peak: hand it up to enclosing spans
+    # before resetting it, so nested spans don't hide each other's peaks
+    tracing = tracemalloc.is_tracing()
+    stack = getattr(_open_spans, 'stack', None)
+    if stack is None:
+        stack = _open_spans.stack = []
+    entry = None
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        for parent in stack:
+            parent['peak'] = max(parent['peak'], peak)
+        tracemalloc.reset_peak()
+        entry = {'base': current, 'peak': current}
+        stack.append(entry)
+
+    start_wall = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        peak_kb = None
+        if entry is not None:
+            stack.remove(entry)
+            if tracemalloc.is_tracing():
+                entry['peak'] = max(entry['peak'], tracemalloc.get_traced_memory()[1])
+            for parent in stack:
+                parent['peak'] = max(parent['peak'], entry['peak'])
+            peak_kb = round((entry['peak'] - entry['base']) / 1024, 1)
+        record = Span(name, round(duration_ms, 3), _current_file.get(), start_wall, peak_kb, os.getpid(), attrs)
+        for sink in sinks:
+            try:
+                sink.record(record)
+            except Exception as e:
+                print(f"Instrumentation sink failed: {e}")
+
+
+def timed(name: str):
+    """Decorator form of span() for a whole function"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def format_timings(timings: Dict[str, float], peaks: Optional[Dict[str, float]] = None) -> str:
+    """One-line breakdown such as 'parse 0.4 ms · explain 2.1 ms · docx 98.0 ms'"""
+    parts = []
+    for name, ms in timings.items():
+        part = f"{name} {ms:.1f} ms"
+        peak_kb = (peaks or {}).get(name)
+        if peak_kb is not None:
+            part += f" ({peak_kb / 1024:.1f} MB peak)" if peak_kb >= 1024 else f" ({peak_kb:.0f} KB peak)"
+        parts.append(part)
+    return " · ".join(parts)
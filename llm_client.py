@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from instrumentation import span
+
+# Bump whenever the prompt text changes so cached responses are not reused
+PROMPT_VERSION = "2"
+
+DEFAULT_BASE_URL = "https://gpt.mfec.co.th/litellm"
+DEFAULT_API_KEY = "sk-2G0DcuqjvJmYToAGXdiEiA"
+DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'immuta-impact-llm')
+
+SYSTEM_PROMPT = """You are an expert in Immuta data policy analysis. Analyze the changes between old and new YAML configurations and provide impact assessment in Thai.
+
+# Few-shot Examples:
+
+## Example 1:
+Old YAML: predicate: "DeptName in ('ECM', 'EFE')"
+New YAML: predicate: "1=1"
+
+Analysis:
+🚨 **ผลกระทบสำคัญ - Predicate เปลี่ยนเป็น 1=1**
+
+**ผลกระทบทางธุรกิจ:**
+- ผู้ใช้จะเห็นข้อมูลทั้งหมด (ไม่มีการกรอง)
+- เดิมจะเห็นเฉพาะข้อมูลที่ตรงเงื่อนไข Department
+
+**ความเสี่ยงด้านความปลอดภัย:**
+- ข้อมูลที่ไม่ควรเห็นอาจถูกเปิดเผย
+- การควบคุมการเข้าถึงข้อมูลลดลง
+
+**คำแนะนำ:**
+- ตรวจสอบว่าการเปลี่ยนแปลงนี้เป็นไปตามความต้องการจริงหรือไม่
+- ทดสอบกับผู้ใช้ก่อนนำไปใช้งานจริง
+
+## Example 2:
+Old YAML: groups: ["team.finance"]
+New YAML: groups: ["team.finance", "team.audit"]
+
+Analysis:
+✅ **การเพิ่มสิทธิ์การเข้าถึง**
+
+**ผลกระทบทางธุรกิจ:**
+- เพิ่มทีม Audit เข้าสู่กลุ่มที่สามารถเข้าถึงข้อมูลได้
+- ขยายการเข้าถึงข้อมูลให้กับผู้ใช้เพิ่มเติม
+
+**ความเสี่ยงด้านความปลอดภัย:**
+- ความเสี่ยงต่ำ - เป็นการเพิ่มทีมที่เกี่ยวข้อง
+
+**คำแนะนำ:**
+- ตรวจสอบว่าทีม Audit มีความจำเป็นต้องเข้าถึงข้อมูลนี้"""
+
+
+def build_impact_messages(old_yaml: str, new_yaml: str, rule_changes: List[Dict]) -> List[Dict]:
+    """Chat messages for an impact analysis
+
+    The instructions and few-shot examples are a fixed system message so the
+    provider can reuse the prompt prefix; only the YAML and changes vary.
+    """
+    prompt = f"""# Current Analysis:
+Old YAML:
+{old_yaml}
+
+New YAML:
+{new_yaml}
+
+Detected Changes:
+{rule_changes}
+
+Please analyze the impact in Thai following the format above:"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+class LLMResponseCache:
+    """Completed LLM responses stored as one JSON file per cache key"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as file:
+                return json.load(file).get('content')
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key: str, content: str):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'content': content}, file, ensure_ascii=False)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"Could not write LLM cache entry: {e}")
+
+
+class LLMClient:
+    """Concurrent, cached access to the chat completion endpoint
+
+    Requests run on a small thread pool (``max_concurrency``) and return
+    futures, so callers can show deterministic results while the text is
+    generated. Responses are cached on disk by a hash of the old YAML, new
+    YAML, detected changes, prompt version and model; a cache hit returns a
+    finished future without contacting the endpoint.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, api_key: str = DEFAULT_API_KEY,
+                 model: str = DEFAULT_MODEL, timeout: float = DEFAULT_TIMEOUT,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = LLMResponseCache(cache_dir) if cache_dir else None
+        self._client = None
+        self._executor = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'LLMClient':
+        """Client configured from IMMUTA_LLM_* environment variables
+
+        A local stub server can be used by pointing IMMUTA_LLM_BASE_URL at it.
+        """
+        cache_dir = os.environ.get('IMMUTA_LLM_CACHE_DIR', DEFAULT_CACHE_DIR)
+        try:
+            timeout = float(os.environ.get('IMMUTA_LLM_TIMEOUT', DEFAULT_TIMEOUT))
+            max_concurrency = int(os.environ.get('IMMUTA_LLM_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY))
+        except ValueError:
+            timeout, max_concurrency = DEFAULT_TIMEOUT, DEFAULT_MAX_CONCURRENCY
+        return cls(
+            base_url=os.environ.get('IMMUTA_LLM_BASE_URL', DEFAULT_BASE_URL),
+            api_key=os.environ.get('IMMUTA_LLM_API_KEY', DEFAULT_API_KEY),
+            model=os.environ.get('IMMUTA_LLM_MODEL', DEFAULT_MODEL),
+            timeout=timeout,
+            max_concurrency=max_concurrency,
+            cache_dir=cache_dir or None,
+        )
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use; None if openai is unavailable"""
+        with self._lock:
+            if self._client is None:
+                try:
+                    from openai import OpenAI
+                    self._client = OpenAI(base_url=self.base_url, api_key=self.api_key,
+                                          timeout=self.timeout, max_retries=1)
+                except Exception:
+                    self._client = False
+            return self._client or None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix='llm')
+            return self._executor
+
+    def cache_key(self, old_yaml: str, new_yaml: str, rule_changes: Optional[List[Dict]] = None) -> str:
+        # The change list is part of the prompt, so a different list is a different answer
+        changes = json.dumps(rule_changes or [], sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha256()
+        for part in (old_yaml, new_yaml, changes, PROMPT_VERSION, self.model):
+            data = part.encode('utf-8')
+            digest.update(len(data).to_bytes(8, 'big'))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def cached_impact_analysis(self, old_yaml: str, new_yaml: str,
+                               rule_changes: Optional[List[Dict]] = None) -> Optional[str]:
+        if not self.cache:
+            return None
+        return self.cache.get(self.cache_key(old_yaml, new_yaml, rule_changes))
+
+    def submit_impact_analysis(self, old_yaml: str, new_yaml: str, rule_changes: List[Dict]) -> Future:
+        """Start (or fetch from cache) the LLM impact analysis for a YAML pair
+
+        The future always resolves to a string; failures resolve to an
+        ``LLM analysis error: ...`` message and are not cached. A pair that
+        is already being analyzed shares the running request.
+        """
+        cached = self.cached_impact_analysis(old_yaml, new_yaml, rule_changes)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        key = self.cache_key(old_yaml, new_yaml, rule_changes)
+        messages = build_impact_messages(old_yaml, new_yaml, rule_changes)
+        executor = self._get_executor()
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = executor.submit(self._complete, key, messages)
+            self._pending[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: str, future: Future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _complete(self, key: str, messages: List[Dict]) -> str:
+        client = self.client
+        if not client:
+            return "LLM analysis unavailable"
+
+        try:
+            with span('llm', model=self.model):
+                response = client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=1000,
+                    temperature=0.3,
+                    timeout=self.timeout,
+                )
+            content = response.choices[0].message.content
+        except Exception as e:
+            return f"LLM analysis error: {str(e)}"
+
+        if self.cache and content:
+            self.cache.set(key, content)
+        return content
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> LLMClient:
+    """Process-wide client so the thread pool and concurrency limit are shared"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = LLMClient.from_env()
+        return _default_client
@@ -0,0 +1,192 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import BinaryIO, Dict, Optional
+from instrumentation import timed
+
+# Archives larger than this are spooled to a temporary file instead of memory
+ZIP_SPOOL_THRESHOLD = 32 * 1024 * 1024
+
+# Every sink takes finished documents through add_file() / add_bytes(), which
+# return where the document ended up, and hands back its result from finish().
+
+
+def _unique_name(name: str, taken) -> str:
+    if name not in taken:
+        return name
+    stem, ext = os.path.splitext(name)
+    counter = 2
+    while f"{stem} ({counter}){ext}" in taken:
+        counter += 1
+    return f"{stem} ({counter}){ext}"
+
+
+class DirectorySink:
+    """Writes documents into a folder as they finish
+
+    Files appear under their final name only once complete. A later document
+    with the same name replaces the earlier one, like repeated runs do.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = str(output_dir)
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.names = []
+        self._taken = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _record(self, name: str) -> str:
+        if name not in self._taken:
+            self._taken.add(name)
+            self.names.append(name)
+        return os.path.join(self.output_dir, name)
+
+    def add_file(self, file_path: str, arcname: Optional[str] = None, remove: bool = False) -> str:
+        """Copy (or with ``remove``, move) a finished file into the folder and return its path"""
+        name = arcname or os.path.basename(file_path)
+        target = os.path.join(self.output_dir, name)
+        partial_path = f"{target}.{os.getpid()}.partial"
+        if remove:
+            # A rename when on the same filesystem, a copy otherwise
+            shutil.move(file_path, partial_path)
+        else:
+            shutil.copyfile(file_path, partial_path)
+        os.replace(partial_path, target)
+        return self._record(name)
+
+    def add_bytes(self, name: str, data: bytes) -> str:
+        target = os.path.join(self.output_dir, name)
+        partial_path = f"{target}.{os.getpid()}.partial"
+        with open(partial_path, 'wb') as file:
+            file.write(data)
+        os.replace(partial_path, target)
+        return self._record(name)
+
+    def finish(self) -> str:
+        return self.output_dir
+
+    def close(self):
+        pass
+
+
+class InMemorySink:
+    """Keeps documents as bytes by name, e.g. for a download button
+
+    Names that were already added get a numbered suffix.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def names(self):
+        return list(self.files)
+
+    def add_file(self, file_path: str, arcname: Optional[str] = None, remove: bool = False) -> str:
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        name = self.add_bytes(arcname or os.path.basename(file_path), data)
+        if remove:
+            os.remove(file_path)
+        return name
+
+    def add_bytes(self, name: str, data: bytes) -> str:
+        name = _unique_name(name, self.files)
+        self.files[name] = data
+        return name
+
+    def finish(self) -> Dict[str, bytes]:
+        return self.files
+
+    def close(self):
+        pass
+
+
+class ZipArchiveSink:
+    """ZIP archive that generated documents are streamed into as they finish
+
+    By default the archive lives in a SpooledTemporaryFile, so small archives
+    stay in memory and large ones move to disk once they pass
+    ``spool_threshold``. Pass ``stream`` (an open file, socket file or other
+    writable binary stream) to write the archive straight there instead.
+    Names that were already added get a numbered suffix instead of creating
+    duplicate entries.
+    """
+
+    def __init__(self, spool_threshold: int = ZIP_SPOOL_THRESHOLD, stream: Optional[BinaryIO] = None):
+        self._owns_buffer = stream is None
+        self._buffer = stream if stream is not None else tempfile.SpooledTemporaryFile(max_size=spool_threshold, mode='w+b')
+        self._zip = zipfile.ZipFile(self._buffer, 'w', zipfile.ZIP_DEFLATED)
+        self.names = []
+        self._taken = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _unique_name(self, name: str) -> str:
+        name = _unique_name(name, self._taken)
+        self._taken.add(name)
+        self.names.append(name)
+        return name
+
+    @timed('zip')
+    def add_file(self, file_path: str, arcname: Optional[str] = None, remove: bool = False) -> str:
+        """Compress a finished file into the archive and return its name there
+
+        With ``remove`` the source file is deleted once it has been written.
+        """
+        name = self._unique_name(arcname or os.path.basename(file_path))
+        self._zip.write(file_path, name)
+        if remove:
+            os.remove(file_path)
+        return name
+
+    @timed('zip')
+    def add_bytes(self, name: str, data: bytes) -> str:
+        name = self._unique_name(name)
+        self._zip.writestr(name, data)
+        return name
+
+    @timed('zip')
+    def finish(self) -> BinaryIO:
+        """Write the ZIP directory and return the archive, rewound to the start when possible"""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        if self._buffer.seekable():
+            self._buffer.seek(0)
+        return self._buffer
+
+    @property
+    def size(self) -> int:
+        position = self._buffer.tell()
+        self._buffer.seek(0, os.SEEK_END)
+        size = self._buffer.tell()
+        self._buffer.seek(position)
+        return size
+
+    @property
+    def spooled_to_disk(self) -> bool:
+        return bool(getattr(self._buffer, '_rolled', False))
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        if self._owns_buffer:
+            self._buffer.close()
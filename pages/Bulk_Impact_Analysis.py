@@ -0,0 +1,104 @@
+import streamlit as st
+import hashlib
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from bulk_impact import analyze_files, format_bulk_report
+
+st.set_page_config(
+    page_title="Bulk Impact Analysis - Immuta x MFEC Helper",
+    page_icon="🗂️",
+    layout="wide"
+)
+
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def analyze_uploads(file_hashes: tuple, _files: tuple) -> dict:
+    """Bulk report for a set of uploaded (name, bytes) files, memoized by their names and hashes"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for name, data in _files:
+            temp_path = os.path.join(temp_dir, name)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            paths.append(temp_path)
+        return analyze_files(paths)
+
+
+st.title("🗂️ Bulk Impact Analysis")
+st.markdown("Upload a whole set of policy YAML files; DEV/PRD (and `_new`) versions are paired automatically")
+
+uploaded_files = st.file_uploader(
+    "Choose YAML files",
+    type=['yaml', 'yml'],
+    accept_multiple_files=True,
+    help="Select every policy file of a release, e.g. all files in the Input folder"
+)
+
+if uploaded_files:
+    st.success(f"✅ {len(uploaded_files)} file(s) uploaded successfully")
+
+    if st.button("🔍 Analyze All Pairs", type="primary"):
+        files = tuple((uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files)
+        file_hashes = tuple((name, hashlib.sha256(data).hexdigest()) for name, data in files)
+        with st.spinner("Analyzing all pairs..."):
+            report = analyze_uploads(file_hashes, files)
+
+        # Rollup
+        st.header("📊 Summary")
+        rollup = report['rollup']
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Pairs", len(report['pairs']))
+        with col2:
+            st.metric("🔴 HIGH", rollup.get('HIGH', 0))
+        with col3:
+            st.metric("🟡 MEDIUM", rollup.get('MEDIUM', 0))
+        with col4:
+            st.metric("🟢 LOW", rollup.get('LOW', 0))
+        with col5:
+            st.metric("✅ NONE", rollup.get('NONE', 0))
+
+        # Per-pair results, highest impact first
+        st.header("📋 Pairs")
+        order = {'ERROR': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3, 'NONE': 4}
+        for result in sorted(report['pairs'], key=lambda r: (order.get(r['impact_level'], 9), r['index'])):
+            title = f"{Path(result['old_file']).name} → {Path(result['new_file']).name} - {result['impact_level']}"
+            with st.expander(title):
+                if result.get('error'):
+                    st.error(result['error'])
+                    continue
+                counts = result['change_counts']
+                st.write(f"Rule changes: HIGH {counts['HIGH']}, MEDIUM {counts['MEDIUM']}, LOW {counts['LOW']}")
+                for change in result['impact']['rule_changes']:
+                    st.write(f"• Rule {change['rule_number']} ({change['change_type']}, {change['impact']}): {change['description']}")
+
+        if report['unpaired']:
+            with st.expander(f"📄 Unpaired files ({len(report['unpaired'])})"):
+                for path in report['unpaired']:
+                    st.write(f"• {Path(path).name}")
+
+        st.download_button(
+            label="📥 Download Report (Markdown)",
+            data=format_bulk_report(report),
+            file_name="bulk_impact_report.md",
+            mime="text/markdown"
+        )
+
+else:
+    st.info("👆 Please upload the policy YAML files to compare")
+
+    with st.expander("ℹ️ How files are paired"):
+        st.markdown("""
+        - Files are grouped by `policyKey` with environment markers (DEV, UAT, PRD) and `new` removed
+        - Files that are alone in their group are grouped by dataset (table tag) instead
+        - Within a group, versions are ordered DEV → UAT → PRD → new and compared in that order
+        - Files without a partner are listed as unpaired
+        """)
+
+# Footer
+st.markdown("---")
+st.markdown("Built with ❤️ by MFEC for Immuta | Data Policy Impact Analysis")
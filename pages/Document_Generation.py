@@ -1,11 +1,15 @@
 import streamlit as st
-import zipfile
-import io
+import hashlib
 import os
+import shutil
 import tempfile
+import uuid
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from immuta_rule_explainer_improved import ImmutaRuleExplainer
+from immuta_rule_explainer_improved import GENERATOR_VERSION, ImmutaRuleExplainer
+from batch_processor import iter_documents
+from output_sinks import DirectorySink, ZipArchiveSink
+from instrumentation import collect, file_scope
 
 st.set_page_config(
     page_title="Document Generation - Immuta x MFEC Helper",
@@ -13,6 +17,108 @@ st.set_page_config(
     layout="wide"
 )
 
+# Generated documents kept on disk for reuse; the oldest are removed beyond this
+STORE_MAX_ENTRIES = 256
+
+try:
+    # Newer Streamlit runs a callable passed to download_button only when it is clicked
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    DEFERRED_DOWNLOADS = hasattr(MediaFileManager, 'add_deferred')
+except ImportError:
+    DEFERRED_DOWNLOADS = False
+
+
+@st.cache_resource
+def get_explainer() -> ImmutaRuleExplainer:
+    """One explainer per server process, shared by every session and rerun"""
+    return ImmutaRuleExplainer()
+
+
+@st.cache_resource
+def get_work_dir() -> tempfile.TemporaryDirectory:
+    """Folder for generated documents and ZIP archives, removed when the server exits"""
+    work_dir = tempfile.TemporaryDirectory(prefix='immuta-documents-')
+    os.makedirs(os.path.join(work_dir.name, 'outputs'))
+    os.makedirs(os.path.join(work_dir.name, 'archives'))
+    return work_dir
+
+
+def work_path(*parts: str) -> str:
+    return os.path.join(get_work_dir().name, *parts)
+
+
+def _store_dir(file_name: str, file_hash: str, generator_version: str) -> str:
+    key = hashlib.sha256(f"{file_name}\0{file_hash}\0{generator_version}".encode('utf-8')).hexdigest()
+    return work_path('outputs', key)
+
+
+def _prune_store():
+    outputs_dir = work_path('outputs')
+    entries = sorted(os.scandir(outputs_dir), key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:max(0, len(entries) - STORE_MAX_ENTRIES)]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+@st.cache_data(max_entries=STORE_MAX_ENTRIES, show_spinner=False)
+def generate_documents(file_name: str, file_hash: str, generator_version: str, _data: bytes) -> dict:
+    """Generate DOCX and PDF for one uploaded file into the on-disk store, memoized by content hash
+
+    Only metadata is cached: {"outputs": [file names in the store folder],
+    "warnings": [...], "error": str or None, "timings": {stage: ms}}; the
+    timings are those of the run that filled the cache.
+    """
+    with file_scope(file_name), collect() as collector:
+        generated = _generate_documents(file_name, _data, _store_dir(file_name, file_hash, generator_version))
+    generated["timings"] = collector.timings()
+    _prune_store()
+    return generated
+
+
+def _generate_documents(file_name: str, data: bytes, output_dir: str) -> dict:
+    # DOCX failures fail the file; a PDF failure alone is only a warning
+    shutil.rmtree(output_dir, ignore_errors=True)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_yaml_path = os.path.join(temp_dir, file_name)
+        with open(temp_yaml_path, 'wb') as f:
+            f.write(data)
+        
+        sink = DirectorySink(output_dir)
+        result = next(iter_documents([temp_yaml_path], sink, ('docx', 'pdf'), get_explainer()))
+    
+    errors = [error for error in result["errors"] if not error.startswith("PDF ")]
+    warnings = [error for error in result["errors"] if error.startswith("PDF ")]
+    return {"outputs": sink.names, "warnings": warnings, "error": "; ".join(errors) or None}
+
+
+def get_documents(file_name: str, data: bytes) -> tuple:
+    """(store folder, generated metadata) for one upload, regenerating if its files were pruned"""
+    file_hash = hashlib.sha256(data).hexdigest()
+    output_dir = _store_dir(file_name, file_hash, GENERATOR_VERSION)
+    generated = generate_documents(file_name, file_hash, GENERATOR_VERSION, data)
+    if not all(os.path.exists(os.path.join(output_dir, name)) for name in generated["outputs"]):
+        generate_documents.clear()
+        generated = generate_documents(file_name, file_hash, GENERATOR_VERSION, data)
+    else:
+        # Mark as recently used so pruning keeps it
+        os.utime(output_dir)
+    return output_dir, generated
+
+
+def new_archive_path() -> str:
+    """Path for this session's next ZIP archive; the session's previous archive is removed"""
+    previous = st.session_state.get('archive_path')
+    if previous and os.path.exists(previous):
+        os.remove(previous)
+    path = work_path('archives', f"{uuid.uuid4().hex}.zip")
+    st.session_state['archive_path'] = path
+    return path
+
+
+def read_archive(path: str) -> bytes:
+    with open(path, 'rb') as file:
+        return file.read()
+
+
 st.title("📋 Document Generation")
 st.markdown("Upload YAML configuration files to generate professional explanations")
 
@@ -34,77 +140,65 @@ if uploaded_files:
         for file in uploaded_files:
             st.write(f"• {file.name}")
     
+    show_timings = st.checkbox("⏱ Show per-file timing breakdown")
+    
     if st.button("🚀 Generate Explanations", type="primary"):
-        explainer = ImmutaRuleExplainer()
-        
         # Progress bar
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Create temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            output_files = []
+        # Files already generated in this server process are served from the on-disk store
+        timing_rows = []
+        archive_path = new_archive_path()
+        with open(archive_path, 'w+b') as archive_file, ZipArchiveSink(stream=archive_file) as archive:
             
             for i, uploaded_file in enumerate(uploaded_files):
                 status_text.text(f"Processing {uploaded_file.name}...")
                 progress_bar.progress((i + 1) / len(uploaded_files))
                 
-                try:
-                    # Save uploaded file temporarily
-                    temp_yaml_path = os.path.join(temp_dir, uploaded_file.name)
-                    with open(temp_yaml_path, 'wb') as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    # Generate explanation
-                    explanation = explainer.process_yaml_file(temp_yaml_path)
-                    
-                    # Generate output files
-                    config = explainer.parse_yaml_file(temp_yaml_path)
-                    dataset_name = explainer.get_dataset_name(config) if config else uploaded_file.name.replace('.yaml', '').replace('.yml', '')
-                    
-                    # DOCX file
-                    docx_path = os.path.join(temp_dir, f"{dataset_name}_explanation.docx")
-                    explainer.generate_docx(explanation, docx_path)
-                    output_files.append(docx_path)
-                    
-                    # PDF file
-                    try:
-                        pdf_path = os.path.join(temp_dir, f"{dataset_name}_explanation.pdf")
-                        explainer.generate_pdf(explanation, pdf_path)
-                        if os.path.exists(pdf_path):
-                            output_files.append(pdf_path)
-                    except Exception as e:
-                        st.warning(f"PDF generation failed for {uploaded_file.name}: {str(e)}")
-                    
-                except Exception as e:
-                    st.error(f"Error processing {uploaded_file.name}: {str(e)}")
-            
-            # Create ZIP file
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for file_path in output_files:
-                    if os.path.exists(file_path):
-                        zip_file.write(file_path, os.path.basename(file_path))
-            
-            zip_buffer.seek(0)
-            
-            # Success message and download
-            st.success("🎉 Processing completed successfully!")
-            
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                st.metric("Files Processed", len(uploaded_files))
-            with col2:
-                st.metric("Output Files Generated", len(output_files))
-            
-            # Download button
+                output_dir, generated = get_documents(uploaded_file.name, uploaded_file.getvalue())
+                with collect() as zip_spans:
+                    for name in generated["outputs"]:
+                        archive.add_file(os.path.join(output_dir, name), name)
+                timings = {**generated["timings"], **zip_spans.timings()}
+                timing_rows.append({"file": uploaded_file.name, **timings, "total": round(sum(timings.values()), 3)})
+                for warning in generated["warnings"]:
+                    st.warning(warning)
+                if generated["error"]:
+                    st.error(generated["error"])
+            archive.finish()
+            archive_names = list(archive.names)
+        
+        # Success message and download
+        st.success("🎉 Processing completed successfully!")
+        
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            st.metric("Files Processed", len(uploaded_files))
+        with col2:
+            st.metric("Output Files Generated", len(archive_names))
+        
+        if show_timings:
+            st.subheader("⏱ Timing Breakdown (ms)")
+            st.caption("Stage times of the run that generated each file; files served from cache only add the ZIP step.")
+            st.dataframe(sorted(timing_rows, key=lambda row: row["total"], reverse=True), use_container_width=True)
+        
+        # The archive stays on disk; with deferred downloads it is only read when the button is clicked
+        if DEFERRED_DOWNLOADS:
+            download_data = lambda: read_archive(archive_path)
+        else:
+            download_data = open(archive_path, 'rb')
+        try:
             st.download_button(
                 label="📥 Download All Results (ZIP)",
-                data=zip_buffer.getvalue(),
+                data=download_data,
                 file_name="immuta_explanations.zip",
                 mime="application/zip",
                 type="primary"
             )
+        finally:
+            if not DEFERRED_DOWNLOADS:
+                download_data.close()
 
 else:
     # Instructions
@@ -1,8 +1,11 @@
 import streamlit as st
+import hashlib
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from impact_analyzer import ImpactAnalyzer
+from access_simulator import RowTable, UserTable, simulate_policy_change
+from instrumentation import MemorySink, collect, format_timings, span
 
 st.set_page_config(
     page_title="Impact Analysis - Immuta x MFEC Helper",
@@ -10,6 +13,35 @@ st.set_page_config(
     layout="wide"
 )
 
+
+
+@st.cache_resource
+def get_analyzer() -> ImpactAnalyzer:
+    """One analyzer (and LLM client) per server process, shared by every session and rerun"""
+    return ImpactAnalyzer()
+
+
+def _digest(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def analyze_changes(original_hash: str, modified_hash: str, _original: str, _modified: str) -> dict:
+    """Deterministic impact of one YAML pair, memoized by the content hashes"""
+    return get_analyzer().analyze_impact(_original, _modified, include_llm=False)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def simulate_access(original_hash: str, modified_hash: str, users_hash: str, rows_hash: str,
+                    _original: str, _modified: str, _users_json: str, _rows_csv: str) -> dict:
+    """Access simulation summary and changed users, memoized by the input hashes"""
+    sim_users = UserTable.from_json(_users_json) if _users_json else None
+    sim_rows = RowTable.from_csv(_rows_csv) if _rows_csv else None
+    delta = simulate_policy_change(_original, _modified, sim_users, sim_rows)
+    return {"summary": delta.summary(), "changed_users": delta.changed_users(),
+            "undetermined_users": delta.undetermined_users()}
+
+
 st.title("⚡ Impact Analysis")
 st.markdown("Compare old vs new YAML files to analyze policy changes indevelopment")
 
@@ -25,7 +57,7 @@ with col1:
     )
     
     if original_file:
-        original_content = original_file.read().decode('utf-8')
+        original_content = original_file.getvalue().decode('utf-8')
         with st.expander("View Original Content"):
             st.code(original_content, language='yaml')
 
@@ -38,21 +70,35 @@ with col2:
     )
     
     if modified_file:
-        modified_content = modified_file.read().decode('utf-8')
+        modified_content = modified_file.getvalue().decode('utf-8')
         with st.expander("View Modified Content"):
             st.code(modified_content, language='yaml')
 
 # Analysis section
 if original_file and modified_file:
+    with st.expander("🧪 Optional: sample users and rows for access simulation"):
+        st.markdown("Without uploads, users and rows are generated from the groups and predicate values in both files.")
+        users_file = st.file_uploader("Users (JSON list of {name, groups, attributes})", type=['json'], key="sim_users")
+        rows_file = st.file_uploader("Sample rows (CSV with a header row)", type=['csv'], key="sim_rows")
+    
+    pair_hashes = (_digest(original_content), _digest(modified_content))
     if st.button("🔍 Analyze Impact", type="primary"):
-        analyzer = ImpactAnalyzer()
-        
-        with st.spinner("Analyzing changes..."):
-            impact = analyzer.analyze_impact(original_content, modified_content)
+        st.session_state['analyzed_pair'] = pair_hashes
+    
+    # Results stay on screen across reruns (e.g. simulation uploads) until either file changes
+    if st.session_state.get('analyzed_pair') == pair_hashes:
+        # Stage times of this run; results served from cache take close to zero
+        page_spans = MemorySink()
+        with st.spinner("Analyzing changes..."), collect(sink=page_spans):
+            impact = analyze_changes(*pair_hashes, original_content, modified_content)
         
         if "error" in impact:
             st.error(f"❌ {impact['error']}")
         else:
+            # Rule analysis is shown right away; the AI text is filled in below.
+            # Cached and in-flight requests are reused, so reruns don't re-bill the LLM.
+            llm_future = get_analyzer().submit_llm_analysis(original_content, modified_content, impact)
+            
             # Summary section
             st.header("📊 Summary of Changes")
             
@@ -81,7 +127,10 @@ if original_file and modified_file:
             if impact['rule_changes']:
                 st.header("📋 Detailed Rule Changes")
                 for change in impact['rule_changes']:
-                    with st.expander(f"Rule {change['rule_number']} - {change['change_type']}"):
+                    label = f"Rule {change['rule_number']}"
+                    if change['change_type'] == 'MODIFIED' and change.get('old_rule_number') != change['rule_number']:
+                        label += f" (was Rule {change['old_rule_number']})"
+                    with st.expander(f"{label} - {change['change_type']}"):
                         col1, col2 = st.columns([3, 1])
                         with col1:
                             st.write(change['description'])
@@ -124,10 +173,45 @@ if original_file and modified_file:
                         
                         if scenario['change'] == 'EXPANDED':
                             st.success(f"→ {scenario['user_type']} gained access")
+                        elif scenario['change'] == 'MIXED':
+                            st.warning(f"→ {scenario['user_type']} gained and lost access")
                         else:
                             st.error(f"→ {scenario['user_type']} lost access")
+                        if scenario.get('description'):
+                            st.caption(scenario['description'])
                         st.divider()
             
+            # Simulated access: exact before/after delta for sample users x rows
+            st.header("🧪 Simulated Access")
+            try:
+                users_json = users_file.getvalue().decode('utf-8') if users_file else ''
+                rows_csv = rows_file.getvalue().decode('utf-8') if rows_file else ''
+                with st.spinner("Simulating access..."), collect(sink=page_spans), span('simulate'):
+                    simulation = simulate_access(*pair_hashes, _digest(users_json), _digest(rows_csv),
+                                                 original_content, modified_content, users_json, rows_csv)
+                summary = simulation['summary']
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Users", summary['users'])
+                with col2:
+                    st.metric("Rows", summary['rows'])
+                with col3:
+                    st.metric("Users gaining rows", summary['users_gained_rows'])
+                with col4:
+                    st.metric("Users losing rows", summary['users_lost_rows'])
+                changed_users = simulation['changed_users']
+                if changed_users:
+                    st.dataframe(changed_users, use_container_width=True)
+                else:
+                    st.success("No user sees different rows with the new policy")
+                for warning in summary['warnings']:
+                    st.warning(warning)
+                if simulation['undetermined_users']:
+                    with st.expander(f"❔ Users with unknown access ({summary['users_undetermined']})"):
+                        st.write(", ".join(simulation['undetermined_users']))
+            except Exception as e:
+                st.error(f"❌ Access simulation failed: {e}")
+            
             # Affected users
             if impact['affected_users']:
                 st.header("👥 Potentially Affected User Groups")
@@ -135,10 +219,9 @@ if original_file and modified_file:
                 for user_group in impact['affected_users']:
                     st.write(f"• {user_group}")
             
-            # LLM Analysis
-            if 'llm_analysis' in impact and impact['llm_analysis']:
-                st.header("🤖 AI Analysis")
-                st.info(impact['llm_analysis'])
+            # LLM Analysis (placeholder, filled once the response arrives)
+            st.header("🤖 AI Analysis")
+            llm_placeholder = st.empty()
             
             # Recommendations
             st.header("💡 Recommendations")
@@ -171,6 +254,17 @@ if original_file and modified_file:
                 - Policies appear identical
                 - Standard deployment process can be followed
                 """)
+            
+            if llm_future.done():
+                llm_placeholder.info(llm_future.result())
+            else:
+                with llm_placeholder.container():
+                    with st.spinner("Waiting for AI analysis..."), collect(sink=page_spans), span('llm_wait'):
+                        llm_text = llm_future.result()
+                llm_placeholder.info(llm_text)
+            
+            with st.expander("⏱ Timing breakdown"):
+                st.write(format_timings(page_spans.timings()) or "All results were served from cache")
 
 else:
     # Instructions
@@ -181,7 +275,8 @@ else:
         **Impact Analysis examines:**
         
         1. **Rule Changes**: Modifications to policy rules
-           - Added/removed/modified predicates
+           - Added/removed/modified predicates, compared by the values they allow
+             (whitespace-only edits are ignored)
            - Changes to user groups
            - Changes to operators (any/all)
         
@@ -190,9 +285,12 @@ else:
            - First matching rule applies, subsequent rules are ignored
            - Analyzes impact based on user scenarios
         
-        3. **Affected Users**: User groups that may be impacted
+        3. **Simulated Access**: Exact before/after row visibility per user, computed
+           top-down for sample users and rows (generated, or uploaded as JSON/CSV)
+        
+        4. **Affected Users**: User groups that may be impacted
         
-        4. **Impact Level**: Severity of changes
+        5. **Impact Level**: Severity of changes
            - 🔴 HIGH: Significant changes requiring careful review
            - 🟡 MEDIUM: Moderate changes
            - 🟢 LOW: Minor changes
@@ -0,0 +1,91 @@
+import streamlit as st
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from policy_index import KINDS, PolicyIndex
+
+st.set_page_config(
+    page_title="Policy Search - Immuta x MFEC Helper",
+    page_icon="🔎",
+    layout="wide"
+)
+
+DEFAULT_POLICY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Input')
+
+KIND_LABELS = {
+    'group': 'Groups',
+    'attribute': 'User attributes',
+    'column_tag': 'Column tags',
+    'circumstance_tag': 'Table tags',
+    'field': 'Predicate fields',
+    'value': 'Values',
+}
+
+
+@st.cache_resource(show_spinner="Indexing policies...")
+def get_index(policy_dir: str) -> PolicyIndex:
+    """One saved index per folder, shared by every session"""
+    return PolicyIndex.open(policy_dir)
+
+
+st.title("🔎 Policy Search")
+st.markdown("Find every policy and rule that references a group, attribute, tag, field or value")
+
+policy_dir = st.text_input("Policy folder", value=DEFAULT_POLICY_DIR,
+                           help="Folder of policy YAML files on the machine running this app")
+
+if not os.path.isdir(policy_dir):
+    st.error(f"❌ Folder not found: {policy_dir}")
+    st.stop()
+
+index = get_index(os.path.abspath(policy_dir))
+# Pick up files added or edited since the index was opened; cheap when nothing changed
+start = time.perf_counter()
+if index.refresh():
+    index.save()
+st.caption(f"{len(index.policies)} policies, {len(index.terms)} distinct terms, {index.size} references "
+           f"(checked for changes in {(time.perf_counter() - start) * 1000:.0f} ms)")
+
+col1, col2 = st.columns([2, 1])
+with col1:
+    query = st.text_input("Search", placeholder="e.g. finance, Department, PII")
+with col2:
+    kinds = st.multiselect("Look in", KINDS, default=list(KINDS), format_func=lambda kind: KIND_LABELS[kind])
+
+if query.strip():
+    start = time.perf_counter()
+    terms = index.matching_terms(query.strip(), kinds or KINDS)
+    hits = index.search(query.strip(), kinds or KINDS)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if not hits:
+        st.warning(f"No matches for '{query.strip()}'")
+    else:
+        st.success(f"✅ {len(hits)} reference(s) to {len(terms)} term(s) in "
+                   f"{len({hit.file for hit in hits})} policies ({elapsed_ms:.1f} ms)")
+        st.markdown("**Matching terms:** " + ", ".join(f"`{term}` ({KIND_LABELS[kind].lower()})"
+                                                        for kind, term in terms))
+        st.dataframe([{
+            "Term": hit.term,
+            "Kind": KIND_LABELS[hit.kind],
+            "Role": hit.role,
+            "File": hit.file,
+            "Dataset": hit.dataset_name,
+            "Rule": f"{hit.rule_number}. {hit.rule_type}" if hit.rule_number else "(policy)",
+        } for hit in hits], use_container_width=True, hide_index=True)
+else:
+    st.info("👆 Type a group, attribute, tag, field or value to search for")
+
+with st.expander("📊 Most referenced terms"):
+    kind = st.selectbox("Kind", KINDS, format_func=lambda kind: KIND_LABELS[kind])
+    counts = index.term_counts(kind)
+    if counts:
+        st.dataframe([{"Term": term, "Policies": count} for term, count in list(counts.items())[:100]],
+                     use_container_width=True, hide_index=True)
+    else:
+        st.info("No terms of this kind in the indexed policies")
+
+# Footer
+st.markdown("---")
+st.markdown("Built with ❤️ by MFEC for Immuta | Policy Search")
@@ -0,0 +1,87 @@
+import textwrap
+from typing import Any, Dict
+
+# Courier 8pt characters that fit the YAML block at letter width with 1" margins
+YAML_MAX_LINE_LENGTH = 88
+
+# Paragraph and table styles shared by every generated PDF, see get_pdf_styles()
+_styles = None
+
+
+def _build_pdf_styles() -> Dict[str, Any]:
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib import colors
+
+    sample = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('CustomTitle', parent=sample['Title'],
+                                fontSize=16, textColor=HexColor('#2C3E50'),
+                                spaceAfter=0.3*inch, alignment=1),
+        'heading1': ParagraphStyle('CustomHeading1', parent=sample['Heading1'],
+                                   fontSize=14, textColor=HexColor('#34495E'),
+                                   spaceAfter=0.2*inch, spaceBefore=0.3*inch),
+        'normal': ParagraphStyle('CustomNormal', parent=sample['Normal'],
+                                 fontSize=11, leading=14, textColor=HexColor('#2C3E50')),
+        'yaml': ParagraphStyle('YAMLStyle', parent=sample['Normal'],
+                               fontName='Courier', fontSize=8,
+                               leftIndent=15, backColor=HexColor('#F8F8F8'),
+                               borderWidth=0, borderColor=colors.lightgrey,
+                               borderPadding=12, leading=14,
+                               spaceBefore=12, spaceAfter=12),
+        'rule': ParagraphStyle('RuleStyle', parent=sample['Heading2'],
+                               fontSize=12, textColor=HexColor('#4472C4'),
+                               spaceAfter=0.1*inch, spaceBefore=0.15*inch,
+                               fontName='Helvetica-Bold'),
+        'step': ParagraphStyle('StepStyle', parent=sample['Heading3'],
+                               fontSize=11, textColor=HexColor('#70AD47'),
+                               spaceAfter=0.08*inch, spaceBefore=0.1*inch,
+                               fontName='Helvetica-Bold'),
+        'action': ParagraphStyle('ActionStyle', parent=sample['Normal'],
+                                 fontSize=10, leading=12, textColor=HexColor('#2C3E50'),
+                                 leftIndent=20, spaceAfter=0.03*inch),
+        'info_table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), HexColor('#E7F3FF')),
+            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#0078d4')),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+        ]),
+    }
+
+
+def get_pdf_styles() -> Dict[str, Any]:
+    """reportlab styles keyed by role (title, heading1, normal, yaml, rule, step, action, info_table)
+
+    Built on first use and reused for every line and document in the process.
+    Raises ImportError if reportlab is not installed.
+    """
+    global _styles
+    if _styles is None:
+        _styles = _build_pdf_styles()
+    return _styles
+
+
+def yaml_flowable(yaml_text: str):
+    """The YAML configuration as one preformatted block
+
+    Blank lines are dropped and long lines wrapped, indented two spaces past
+    the line they continue. The block keeps the grey background of the YAML
+    style and splits across pages like a paragraph.
+    """
+    from reportlab.platypus import XPreformatted
+    from xml.sax.saxutils import escape
+
+    lines = []
+    for line in yaml_text.split('\n'):
+        if not line.strip():
+            continue
+        indent = ' ' * (len(line) - len(line.lstrip()) + 2)
+        lines.extend(textwrap.wrap(line.rstrip(), YAML_MAX_LINE_LENGTH, subsequent_indent=indent,
+                                   break_on_hyphens=False) or [line])
+    return XPreformatted(escape('\n'.join(lines)), get_pdf_styles()['yaml'])
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import pickle
+import threading
+from typing import Any, Dict, Optional
+import yaml
+
+# Bump when the parsed structure or the text normalization changes
+POLICY_CACHE_SCHEMA = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'immuta-policy-cache')
+
+# libyaml's loader is ~10x faster and builds the same objects as SafeLoader
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def load_yaml(text: str) -> Any:
+    """yaml.safe_load using libyaml when it is available"""
+    return yaml.load(text, Loader=YAML_LOADER)
+
+
+def normalize_policy_text(content: str) -> str:
+    """Fix common YAML formatting issues: tabs and Windows line endings"""
+    return content.strip().replace('\t', '    ').replace('\r\n', '\n')
+
+
+class ParsedPolicyCache:
+    """Parsed policy configs pickled on disk, one file per content hash
+
+    Entries are keyed by the SHA-256 of the raw file bytes (plus the schema
+    version and whether the text was normalized), so an unchanged file is
+    never parsed twice, whichever tool reads it. The directory is private to
+    the user running the tools; pickles from elsewhere must not be copied in.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(data: bytes, normalized: bool) -> str:
+        digest = hashlib.sha256(f"{POLICY_CACHE_SCHEMA}:{int(normalized)}:".encode('ascii'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pickle")
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'rb') as file:
+                entry = pickle.load(file)
+            return entry if entry.get('schema') == POLICY_CACHE_SCHEMA else None
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable policy cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, config: Any):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as file:
+                pickle.dump({'schema': POLICY_CACHE_SCHEMA, 'config': config}, file,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not write policy cache entry: {e}")
+
+    def parse(self, data: bytes, normalize: bool = True) -> Any:
+        """Parsed config for raw YAML bytes, from the cache when possible
+
+        YAML errors are raised to the caller and not cached.
+        """
+        key = self.key(data, normalize)
+        entry = self.get(key)
+        if entry is not None:
+            return entry['config']
+
+        content = data.decode('utf-8')
+        if normalize:
+            content = normalize_policy_text(content)
+        config = load_yaml(content) if content else {}
+        self.set(key, config)
+        return config
+
+    def load_file(self, file_path: str, normalize: bool = True) -> Any:
+        """Read and parse a policy file; returns {} for an empty file"""
+        with open(file_path, 'rb') as file:
+            data = file.read()
+        return self.parse(data, normalize)
+
+    def parse_text(self, text: str, normalize: bool = False) -> Any:
+        """Parse YAML text (e.g. an uploaded file), from the cache when possible"""
+        return self.parse(text.encode('utf-8'), normalize)
+
+
+_default_cache = None
+
+
+def get_policy_cache() -> ParsedPolicyCache:
+    """Process-wide cache configured by IMMUTA_POLICY_CACHE_DIR (empty disables it)"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParsedPolicyCache(os.environ.get('IMMUTA_POLICY_CACHE_DIR', DEFAULT_CACHE_DIR) or None)
+    return _default_cache
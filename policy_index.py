@@ -0,0 +1,383 @@
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass, fields, is_dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import predicate_parser
+from generation_manifest import try_hash_file
+from immuta_rule_explainer_improved import ImmutaRuleExplainer
+
+# Bump when the indexed terms or the on-disk layout change
+POLICY_INDEX_SCHEMA = 1
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'immuta-policy-index')
+
+# What a term is, in display order
+GROUP = 'group'
+ATTRIBUTE = 'attribute'
+COLUMN_TAG = 'column_tag'
+CIRCUMSTANCE_TAG = 'circumstance_tag'
+FIELD = 'field'
+VALUE = 'value'
+KINDS = (GROUP, ATTRIBUTE, COLUMN_TAG, CIRCUMSTANCE_TAG, FIELD, VALUE)
+
+# Where in the policy a term appears
+ROLES = ('inclusion', 'exception', 'predicate', 'match', 'masking', 'circumstance')
+
+YAML_SUFFIXES = ('.yaml', '.yml')
+
+# Rule number used for policy-level terms such as circumstance tags
+POLICY_LEVEL = 0
+
+
+@dataclass(frozen=True)
+class IndexHit:
+    """One place a term appears: a rule (or the policy itself, rule_number 0)"""
+    file: str
+    policy_name: str
+    dataset_name: str
+    rule_number: int
+    rule_type: str
+    kind: str
+    term: str
+    role: str
+
+
+def _children(node) -> Iterable:
+    for item in fields(node):
+        value = getattr(node, item.name)
+        if isinstance(value, tuple):
+            yield from value
+        elif is_dataclass(value):
+            yield value
+
+
+def predicate_terms(predicate: str) -> List[Tuple[str, str]]:
+    """(kind, term) pairs for the fields, tags, attributes and literals in a predicate"""
+    try:
+        root = predicate_parser.parse_predicate(predicate)
+    except Exception:
+        return []
+    terms = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if not is_dataclass(node):
+            continue
+        if isinstance(node, predicate_parser.Column):
+            terms.append((FIELD, node.name))
+        elif isinstance(node, predicate_parser.Literal):
+            if node.value is not None and not isinstance(node.value, bool):
+                terms.append((VALUE, str(node.value)))
+        elif isinstance(node, predicate_parser.ColumnTagged):
+            terms.append((COLUMN_TAG, node.tag))
+        elif isinstance(node, predicate_parser.AttributeValuesContains):
+            terms.append((ATTRIBUTE, node.attribute))
+            terms.append((FIELD, node.expression))
+        elif isinstance(node, (predicate_parser.Like, predicate_parser.RegexpContains)):
+            terms.append((VALUE, node.pattern))
+        stack.extend(_children(node))
+    return terms
+
+
+def rule_terms(rule: Dict) -> List[Tuple[str, str, str]]:
+    """(kind, term, role) triples for one rule, read the same way the explainer reads it"""
+    config = rule.get('config', {}) or {}
+    inclusions = rule.get('inclusions', config.get('inclusions', {})) or {}
+    exceptions = rule.get('exceptions', config.get('exceptions', {})) or {}
+    terms = []
+
+    for role, section in (('inclusion', inclusions), ('exception', exceptions)):
+        for group in section.get('groups', []) or []:
+            terms.append((GROUP, str(group), role))
+        for attribute in section.get('attributes', []) or []:
+            if isinstance(attribute, dict):
+                if attribute.get('name'):
+                    terms.append((ATTRIBUTE, str(attribute['name']), role))
+                if attribute.get('value') not in (None, ''):
+                    terms.append((VALUE, str(attribute['value']), role))
+
+    predicate = config.get('predicate')
+    if predicate:
+        terms.extend((kind, term, 'predicate') for kind, term in predicate_terms(str(predicate)))
+
+    for match in config.get('matches', []) or []:
+        if isinstance(match, dict):
+            if match.get('attribute'):
+                terms.append((ATTRIBUTE, str(match['attribute']), 'match'))
+            if match.get('tag'):
+                terms.append((COLUMN_TAG, str(match['tag']), 'match'))
+
+    for field in config.get('fields', []) or []:
+        if isinstance(field, dict) and field.get('columnTag'):
+            terms.append((COLUMN_TAG, str(field['columnTag']), 'masking'))
+
+    return list(dict.fromkeys(terms))
+
+
+class PolicyIndex:
+    """Inverted index from groups, attributes, tags, predicate fields and values to policy rules
+
+    Terms are stored column-wise, one row per (policy, rule, term, role), and
+    sorted by term so a lookup is a binary search plus a slice. Lookups are
+    case-insensitive. The index is saved next to other caches and refreshed
+    incrementally: only files whose size, mtime and then content hash changed
+    are parsed again.
+    """
+
+    def __init__(self, policy_dir: str, index_path: Optional[str] = None):
+        self.policy_dir = os.path.abspath(policy_dir)
+        self.index_path = index_path or self.default_path(self.policy_dir)
+        self.policies: List[Dict] = []
+        self.terms: List[Tuple[str, str]] = []
+        self._term_ids: Dict[Tuple[str, str], int] = {}
+        self._columns = {name: np.zeros(0, dtype=dtype) for name, dtype in self._COLUMN_TYPES.items()}
+        self._order = np.zeros(0, dtype=np.int64)
+        self._starts = np.zeros(1, dtype=np.int64)
+        self._explainer = None
+
+    _COLUMN_TYPES = {'policy': np.int32, 'rule': np.int16, 'term': np.int32, 'role': np.int8}
+
+    @staticmethod
+    def default_path(policy_dir: str) -> str:
+        digest = hashlib.sha256(os.path.abspath(policy_dir).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(DEFAULT_INDEX_DIR, f"{digest}.npz")
+
+    @classmethod
+    def open(cls, policy_dir: str, index_path: Optional[str] = None) -> 'PolicyIndex':
+        """Load the saved index for a folder, bring it up to date and save it if anything changed"""
+        index = cls(policy_dir, index_path)
+        index.load()
+        if index.refresh():
+            index.save()
+        return index
+
+    # --- Persistence -----------------------------------------------------
+
+    def load(self) -> bool:
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                meta = json.loads(bytes(data['meta']).decode('utf-8'))
+                if meta.get('schema') != POLICY_INDEX_SCHEMA or meta.get('policy_dir') != self.policy_dir:
+                    return False
+                columns = {name: data[name].astype(dtype) for name, dtype in self._COLUMN_TYPES.items()}
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Ignoring unreadable policy index {self.index_path}: {e}")
+            return False
+        self.policies = meta['policies']
+        self._set_terms([tuple(term) for term in meta['terms']])
+        self._columns = columns
+        self._sort()
+        return True
+
+    def save(self):
+        meta = {
+            'schema': POLICY_INDEX_SCHEMA,
+            'policy_dir': self.policy_dir,
+            'policies': self.policies,
+            'terms': self.terms,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            temp_path = f"{self.index_path}.{os.getpid()}.tmp.npz"
+            np.savez_compressed(temp_path, meta=np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8),
+                                **self._columns)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Could not save policy index {self.index_path}: {e}")
+
+    # --- Building ----------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Re-index added and changed files and drop removed ones; True if anything changed"""
+        current = self._scan()
+
+        keep, changed = [], []
+        for policy_id, policy in enumerate(self.policies):
+            stat = current.pop(policy['file'], None)
+            if stat is None:
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == (policy['mtime_ns'], policy['size']):
+                keep.append(policy_id)
+                continue
+            digest = try_hash_file(os.path.join(self.policy_dir, policy['file']))
+            if digest == policy['digest']:
+                policy['mtime_ns'], policy['size'] = stat.st_mtime_ns, stat.st_size
+                keep.append(policy_id)
+            else:
+                changed.append(policy['file'])
+        added = sorted(changed + list(current))
+        if len(keep) == len(self.policies) and not added:
+            return False
+
+        # Renumber the policies that stay, then append the re-parsed ones
+        remap = np.full(len(self.policies) + 1, -1, dtype=np.int32)
+        remap[keep] = np.arange(len(keep), dtype=np.int32)
+        kept_rows = np.isin(self._columns['policy'], keep)
+        columns = {name: column[kept_rows] for name, column in self._columns.items()}
+        columns['policy'] = remap[columns['policy']]
+        self.policies = [self.policies[policy_id] for policy_id in keep]
+
+        new_rows = {name: [] for name in self._COLUMN_TYPES}
+        for relative_path in added:  # already sorted, like find_yaml_files
+            self._index_file(relative_path, new_rows)
+        for name, dtype in self._COLUMN_TYPES.items():
+            columns[name] = np.concatenate([columns[name], np.asarray(new_rows[name], dtype=dtype)])
+
+        # Drop terms no longer referenced so the table doesn't grow with edits
+        used, inverse = np.unique(columns['term'], return_inverse=True)
+        columns['term'] = inverse.astype(np.int32)
+        self._set_terms([self.terms[term_id] for term_id in used])
+        self._columns = columns
+        self._sort()
+        return True
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        """stat of every YAML file in the folder (same files as find_yaml_files), by name"""
+        current = {}
+        try:
+            entries = list(os.scandir(self.policy_dir))
+        except OSError as e:
+            print(f"Cannot read policy folder {self.policy_dir}: {e}")
+            return current
+        for entry in entries:
+            if entry.name.endswith(YAML_SUFFIXES):
+                try:
+                    if entry.is_file():
+                        current[entry.name] = entry.stat()
+                except OSError:
+                    continue
+        return current
+
+    def _index_file(self, relative_path: str, rows: Dict[str, List]):
+        if self._explainer is None:
+            self._explainer = ImmutaRuleExplainer()
+        explainer = self._explainer
+        file_path = os.path.join(self.policy_dir, relative_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        config = explainer.parse_yaml_file(file_path)
+        config = config if isinstance(config, dict) else {}
+        rules = [rule for rule in explainer.extract_rules(config) if isinstance(rule, dict)] if config else []
+        policy_id = len(self.policies)
+        self.policies.append({
+            'file': relative_path,
+            'name': str(config.get('name', '')),
+            'dataset_name': explainer.get_dataset_name(config) if config else os.path.splitext(relative_path)[0],
+            'rule_types': [str(rule.get('type', (rule.get('config') or {}).get('type', 'Unknown'))) for rule in rules],
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'digest': try_hash_file(file_path),
+        })
+
+        def add(rule_number: int, kind: str, term: str, role: str):
+            rows['policy'].append(policy_id)
+            rows['rule'].append(rule_number)
+            rows['term'].append(self._term_id(kind, term))
+            rows['role'].append(ROLES.index(role))
+
+        for circumstance in config.get('circumstances', []) or []:
+            if isinstance(circumstance, dict) and circumstance.get('tag'):
+                add(POLICY_LEVEL, CIRCUMSTANCE_TAG, str(circumstance['tag']), 'circumstance')
+        for number, rule in enumerate(rules, start=1):
+            for kind, term, role in rule_terms(rule):
+                add(number, kind, term, role)
+
+    def _term_id(self, kind: str, term: str) -> int:
+        key = (kind, term.lower())
+        term_id = self._term_ids.get(key)
+        if term_id is None:
+            term_id = self._term_ids[key] = len(self.terms)
+            self.terms.append((kind, term))
+        return term_id
+
+    def _set_terms(self, terms: List[Tuple[str, str]]):
+        self.terms = terms
+        self._term_ids = {(kind, term.lower()): term_id for term_id, (kind, term) in enumerate(terms)}
+
+    def _sort(self):
+        columns = self._columns
+        self._order = np.lexsort((columns['rule'], columns['policy'], columns['term']))
+        sorted_terms = columns['term'][self._order]
+        self._starts = np.searchsorted(sorted_terms, np.arange(len(self.terms) + 1))
+
+    # --- Queries -----------------------------------------------------------
+
+    def _hits(self, term_ids: Iterable[int]) -> List[IndexHit]:
+        columns = self._columns
+        hits = []
+        for term_id in term_ids:
+            kind, term = self.terms[term_id]
+            rows = self._order[self._starts[term_id]:self._starts[term_id + 1]]
+            for policy_id, rule_number, role in zip(columns['policy'][rows].tolist(), columns['rule'][rows].tolist(),
+                                                    columns['role'][rows].tolist()):
+                policy = self.policies[policy_id]
+                rule_type = policy['rule_types'][rule_number - 1] if rule_number > POLICY_LEVEL else ''
+                hits.append(IndexHit(policy['file'], policy['name'], policy['dataset_name'], rule_number,
+                                     rule_type, kind, term, ROLES[role]))
+        return hits
+
+    def lookup(self, kind: str, term: str) -> List[IndexHit]:
+        """Every rule (or policy, for circumstance tags) where this exact term appears"""
+        term_id = self._term_ids.get((kind, term.lower()))
+        return self._hits([term_id]) if term_id is not None else []
+
+    def matching_terms(self, text: str, kinds: Optional[Iterable[str]] = None, limit: int = 50) -> List[Tuple[str, str]]:
+        """(kind, term) pairs containing text, case-insensitive; exact matches first"""
+        needle = text.lower()
+        kinds = set(kinds or KINDS)
+        matches = [(kind, term) for kind, term in self.terms if kind in kinds and needle in term.lower()]
+        matches.sort(key=lambda item: (item[1].lower() != needle, KINDS.index(item[0]), item[1].lower()))
+        return matches[:limit]
+
+    def search(self, text: str, kinds: Optional[Iterable[str]] = None, limit: int = 50) -> List[IndexHit]:
+        """Hits for every term containing text (up to limit terms)"""
+        return self._hits(self._term_ids[(kind, term.lower())]
+                          for kind, term in self.matching_terms(text, kinds, limit))
+
+    def policies_for(self, kind: str, term: str) -> List[str]:
+        """Files that reference the term, in index order"""
+        return list(dict.fromkeys(hit.file for hit in self.lookup(kind, term)))
+
+    def term_counts(self, kind: str) -> Dict[str, int]:
+        """Number of distinct policies per term of one kind, most used first"""
+        columns = self._columns
+        counts = {}
+        for term_id, (term_kind, term) in enumerate(self.terms):
+            if term_kind == kind:
+                rows = self._order[self._starts[term_id]:self._starts[term_id + 1]]
+                counts[term] = len(np.unique(columns['policy'][rows]))
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0].lower())))
+
+    @property
+    def size(self) -> int:
+        return len(self._columns['term'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find which policies reference a group, attribute, tag, field or value")
+    parser.add_argument("policy_dir", help="Folder of policy YAML files")
+    parser.add_argument("text", help="Term to look for (substring, case-insensitive)")
+    parser.add_argument("--kind", choices=KINDS, action="append", help="Only search these kinds of terms")
+    parser.add_argument("--exact", action="store_true", help="Match the whole term instead of a substring")
+    args = parser.parse_args()
+
+    index = PolicyIndex.open(args.policy_dir)
+    if args.exact:
+        hits = [hit for kind in (args.kind or KINDS) for hit in index.lookup(kind, args.text)]
+    else:
+        hits = index.search(args.text, args.kind)
+    for hit in hits:
+        rule = f"rule {hit.rule_number} ({hit.rule_type})" if hit.rule_number else "policy"
+        print(f"{hit.kind}\t{hit.term}\t{hit.file}\t{rule}\t{hit.role}")
+    print(f"{len(hits)} match(es) in {len(index.policies)} indexed policies")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,745 @@
+"""Tokenizer, parser and explainer for Immuta row-restriction predicates
+
+Predicates are BigQuery-flavoured SQL boolean expressions with a couple of
+Immuta extensions (``@attributeValuesContains``, ``@columnTagged``).  They are
+parsed into a small immutable AST that can be explained in plain English,
+compared between policy versions and evaluated against sample data.
+
+Parsing is memoized on the whitespace-normalized predicate text, so identical
+predicates that appear across many policy files are only parsed once.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+PREDICATE_CACHE_SIZE = 4096
+
+KEYWORDS = {'AND', 'OR', 'NOT', 'IN', 'LIKE', 'IS', 'NULL', 'TRUE', 'FALSE', 'FROM'}
+COMPARISON_OPERATORS = ('=', '!=', '<>', '<', '<=', '>', '>=')
+
+_TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<string>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*")
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<function>@[A-Za-z_]\w*)
+  | (?P<quoted>`[^`]+`)
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<op><=|>=|<>|!=|=|<|>)
+  | (?P<punct>[()\[\],])
+""", re.VERBOSE)
+
+_WHITESPACE = re.compile(r"\s+")
+_QUOTED = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+
+_ORDINALS = {0: 'first', 1: 'second', 2: 'third', 3: 'fourth', 4: 'fifth'}
+
+_COMPARISON_WORDS = {
+    '=': 'equals',
+    '!=': 'is not',
+    '<>': 'is not',
+    '<': 'is less than',
+    '<=': 'is at most',
+    '>': 'is greater than',
+    '>=': 'is at least',
+}
+
+
+class PredicateParseError(ValueError):
+    """Raised when a predicate is not valid in the supported SQL dialect"""
+
+
+# --- AST -------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Literal:
+    value: Any
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+
+
+@dataclass(frozen=True)
+class Call:
+    name: str
+    args: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class Split:
+    """``split(expr, 'delimiter')[safe_offset(n)]`` with ``offset`` zero-based"""
+    expr: Any
+    delimiter: str
+    offset: int
+
+
+@dataclass(frozen=True)
+class Extract:
+    part: str
+    expr: Any
+
+
+@dataclass(frozen=True)
+class ColumnTagged:
+    tag: str
+
+
+@dataclass(frozen=True)
+class AttributeValuesContains:
+    attribute: str
+    expression: str
+
+
+@dataclass(frozen=True)
+class RegexpContains:
+    expr: Any
+    pattern: str
+
+
+@dataclass(frozen=True)
+class Comparison:
+    left: Any
+    op: str
+    right: Any
+
+
+@dataclass(frozen=True)
+class InList:
+    expr: Any
+    values: Tuple[Any, ...]
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Like:
+    expr: Any
+    pattern: str
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class IsNull:
+    expr: Any
+    negated: bool = False
+
+
+@dataclass(frozen=True)
+class Truth:
+    """A bare value used as a condition, e.g. ``true`` or a boolean function"""
+    expr: Any
+
+
+@dataclass(frozen=True)
+class And:
+    items: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class Or:
+    items: Tuple[Any, ...]
+
+
+@dataclass(frozen=True)
+class Not:
+    item: Any
+
+
+# --- Tokenizer -------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Token:
+    kind: str
+    text: str
+    position: int
+
+    @property
+    def keyword(self) -> Optional[str]:
+        if self.kind == 'name' and self.text.upper() in KEYWORDS:
+            return self.text.upper()
+        return None
+
+
+def tokenize(text: str) -> List[Token]:
+    """Split predicate text into tokens"""
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise PredicateParseError(f"Unexpected character {text[position]!r} at position {position}")
+        kind = match.lastgroup
+        if kind != 'ws':
+            tokens.append(Token(kind, match.group(), position))
+        position = match.end()
+    return tokens
+
+
+def _unquote(text: str) -> str:
+    quote = text[0]
+    body = text[1:-1]
+    return body.replace(quote * 2, quote).replace('\\' + quote, quote)
+
+
+def normalize_predicate(text: str) -> str:
+    """Collapse whitespace outside string literals so equivalent predicates share a cache entry"""
+    parts = []
+    position = 0
+    for match in _QUOTED.finditer(text):
+        parts.append(_WHITESPACE.sub(' ', text[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(_WHITESPACE.sub(' ', text[position:]))
+    return ''.join(parts).strip()
+
+
+# --- Parser ----------------------------------------------------------------
+
+class _Parser:
+    def __init__(self, text: str):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise PredicateParseError("Empty predicate")
+        node = self.parse_or()
+        if self.peek() is not None:
+            token = self.peek()
+            raise PredicateParseError(f"Unexpected {token.text!r} at position {token.position}")
+        return node
+
+    # token helpers
+    def peek(self, offset: int = 0) -> Optional[Token]:
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def advance(self) -> Token:
+        token = self.peek()
+        if token is None:
+            raise PredicateParseError("Unexpected end of predicate")
+        self.position += 1
+        return token
+
+    def accept_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        if token is not None and token.keyword == keyword:
+            self.position += 1
+            return True
+        return False
+
+    def accept(self, text: str) -> bool:
+        token = self.peek()
+        if token is not None and token.kind in ('punct', 'op') and token.text == text:
+            self.position += 1
+            return True
+        return False
+
+    def expect(self, text: str):
+        if not self.accept(text):
+            token = self.peek()
+            found = repr(token.text) if token else 'end of predicate'
+            raise PredicateParseError(f"Expected {text!r} but found {found}")
+
+    # boolean structure
+    def parse_or(self):
+        items = [self.parse_and()]
+        while self.accept_keyword('OR'):
+            items.append(self.parse_and())
+        return items[0] if len(items) == 1 else Or(tuple(items))
+
+    def parse_and(self):
+        items = [self.parse_not()]
+        while self.accept_keyword('AND'):
+            items.append(self.parse_not())
+        return items[0] if len(items) == 1 else And(tuple(items))
+
+    def parse_not(self):
+        if self.accept_keyword('NOT'):
+            return Not(self.parse_not())
+        return self.parse_condition()
+
+    def parse_condition(self):
+        token = self.peek()
+        if token is not None and token.kind == 'punct' and token.text == '(':
+            # A parenthesised group is boolean unless a comparison follows it
+            start = self.position
+            self.advance()
+            node = self.parse_or()
+            self.expect(')')
+            if not self._comparison_follows():
+                return node
+            self.position = start
+
+        left = self.parse_value()
+        return self.parse_comparison(left)
+
+    def _comparison_follows(self) -> bool:
+        token = self.peek()
+        if token is None:
+            return False
+        if token.kind == 'op':
+            return True
+        return token.keyword in ('IN', 'LIKE', 'IS') or (
+            token.keyword == 'NOT' and self.peek(1) is not None and self.peek(1).keyword in ('IN', 'LIKE'))
+
+    def parse_comparison(self, left):
+        token = self.peek()
+        if token is not None and token.kind == 'op':
+            op = self.advance().text
+            return Comparison(left, op, self.parse_value())
+
+        negated = False
+        if token is not None and token.keyword == 'NOT' and self.peek(1) is not None \
+                and self.peek(1).keyword in ('IN', 'LIKE'):
+            self.advance()
+            negated = True
+
+        if self.accept_keyword('IN'):
+            self.expect('(')
+            values = [self.parse_value()]
+            while self.accept(','):
+                values.append(self.parse_value())
+            self.expect(')')
+            return InList(left, tuple(values), negated)
+
+        if self.accept_keyword('LIKE'):
+            pattern = self.parse_value()
+            if not isinstance(pattern, Literal):
+                raise PredicateParseError("LIKE pattern must be a string literal")
+            return Like(left, str(pattern.value), negated)
+
+        if self.accept_keyword('IS'):
+            negated = self.accept_keyword('NOT')
+            if not self.accept_keyword('NULL'):
+                raise PredicateParseError("Expected NULL after IS")
+            return IsNull(left, negated)
+
+        return Truth(left)
+
+    # values
+    def parse_value(self):
+        token = self.advance()
+
+        if token.kind == 'string':
+            value = Literal(_unquote(token.text))
+        elif token.kind == 'number':
+            value = Literal(float(token.text) if '.' in token.text else int(token.text))
+        elif token.kind == 'punct' and token.text == '(':
+            value = self.parse_value()
+            self.expect(')')
+        elif token.kind == 'quoted':
+            value = Column(token.text[1:-1])
+        elif token.kind == 'function':
+            value = self.parse_immuta_function(token.text[1:])
+        elif token.kind == 'name':
+            keyword = token.keyword
+            if keyword in ('TRUE', 'FALSE'):
+                value = Literal(keyword == 'TRUE')
+            elif keyword == 'NULL':
+                value = Literal(None)
+            elif keyword is not None:
+                raise PredicateParseError(f"Unexpected keyword {token.text!r} at position {token.position}")
+            elif self.accept('('):
+                value = self.parse_call(token.text)
+            else:
+                value = Column(token.text)
+        else:
+            raise PredicateParseError(f"Unexpected {token.text!r} at position {token.position}")
+
+        if self.accept('['):
+            value = self.parse_subscript(value)
+        return value
+
+    def parse_arguments(self) -> List[Any]:
+        args = []
+        if self.accept(')'):
+            return args
+        args.append(self.parse_value())
+        while self.accept(','):
+            args.append(self.parse_value())
+        self.expect(')')
+        return args
+
+    def parse_call(self, name: str):
+        upper = name.upper()
+        if upper == 'EXTRACT':
+            part = self.advance().text.upper()
+            if not self.accept_keyword('FROM'):
+                raise PredicateParseError("Expected FROM in EXTRACT")
+            expr = self.parse_value()
+            self.expect(')')
+            return Extract(part, expr)
+
+        args = self.parse_arguments()
+        if upper == 'REGEXP_CONTAINS' and len(args) == 2 and isinstance(args[1], Literal):
+            return RegexpContains(args[0], str(args[1].value))
+        return Call(name, tuple(args))
+
+    def parse_immuta_function(self, name: str):
+        self.expect('(')
+        args = self.parse_arguments()
+        literal_args = [arg.value for arg in args if isinstance(arg, Literal)]
+        if name == 'attributeValuesContains' and len(literal_args) == 2 == len(args):
+            return AttributeValuesContains(str(literal_args[0]), str(literal_args[1]))
+        if name == 'columnTagged' and len(literal_args) == 1 == len(args):
+            return ColumnTagged(str(literal_args[0]))
+        return Call('@' + name, tuple(args))
+
+    def parse_subscript(self, value):
+        token = self.advance()
+        if token.kind == 'number':
+            offset = int(token.text)
+        elif token.kind == 'name' and token.text.upper() in ('SAFE_OFFSET', 'OFFSET', 'SAFE_ORDINAL', 'ORDINAL'):
+            self.expect('(')
+            number = self.advance()
+            if number.kind != 'number':
+                raise PredicateParseError("Array subscript must be a number")
+            self.expect(')')
+            offset = int(number.text) - (1 if 'ORDINAL' in token.text.upper() else 0)
+        else:
+            raise PredicateParseError(f"Unsupported array subscript {token.text!r}")
+        self.expect(']')
+
+        if isinstance(value, Call) and value.name.upper() == 'SPLIT' and len(value.args) == 2 \
+                and isinstance(value.args[1], Literal):
+            return Split(value.args[0], str(value.args[1].value), offset)
+        return Call('OFFSET', (value, Literal(offset)))
+
+
+@lru_cache(maxsize=PREDICATE_CACHE_SIZE)
+def _parse_normalized(text: str):
+    try:
+        return _Parser(text).parse(), None
+    except PredicateParseError as e:
+        return None, str(e)
+
+
+def parse_predicate(predicate: str):
+    """Parse a predicate into an AST, raising PredicateParseError if unsupported"""
+    node, error = _parse_normalized(normalize_predicate(str(predicate)))
+    if node is None:
+        raise PredicateParseError(error)
+    return node
+
+
+# --- SQL and English rendering --------------------------------------------
+
+def _sql_literal(value: Any) -> str:
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def to_sql(node) -> str:
+    """Render an AST node back to canonical SQL text"""
+    if isinstance(node, Literal):
+        return _sql_literal(node.value)
+    if isinstance(node, Column):
+        return node.name
+    if isinstance(node, Call):
+        return f"{node.name}({', '.join(to_sql(arg) for arg in node.args)})"
+    if isinstance(node, Split):
+        return f"split({to_sql(node.expr)}, {_sql_literal(node.delimiter)})[safe_offset({node.offset})]"
+    if isinstance(node, Extract):
+        return f"EXTRACT({node.part} FROM {to_sql(node.expr)})"
+    if isinstance(node, ColumnTagged):
+        return f"@columnTagged({_sql_literal(node.tag)})"
+    if isinstance(node, AttributeValuesContains):
+        return f"@attributeValuesContains({_sql_literal(node.attribute)}, {_sql_literal(node.expression)})"
+    if isinstance(node, RegexpContains):
+        return f"REGEXP_CONTAINS({to_sql(node.expr)}, {_sql_literal(node.pattern)})"
+    if isinstance(node, Comparison):
+        return f"{to_sql(node.left)} {node.op} {to_sql(node.right)}"
+    if isinstance(node, InList):
+        keyword = 'NOT IN' if node.negated else 'IN'
+        return f"{to_sql(node.expr)} {keyword} ({', '.join(to_sql(v) for v in node.values)})"
+    if isinstance(node, Like):
+        keyword = 'NOT LIKE' if node.negated else 'LIKE'
+        return f"{to_sql(node.expr)} {keyword} {_sql_literal(node.pattern)}"
+    if isinstance(node, IsNull):
+        return f"{to_sql(node.expr)} IS {'NOT ' if node.negated else ''}NULL"
+    if isinstance(node, Truth):
+        return to_sql(node.expr)
+    if isinstance(node, Not):
+        return f"NOT ({to_sql(node.item)})"
+    if isinstance(node, (And, Or)):
+        joiner = ' AND ' if isinstance(node, And) else ' OR '
+        return joiner.join(_wrap_sql(item, node) for item in node.items)
+    raise TypeError(f"Unknown predicate node: {node!r}")
+
+
+def _wrap_sql(item, parent) -> str:
+    text = to_sql(item)
+    if isinstance(item, (And, Or)) and type(item) is not type(parent):
+        return f"({text})"
+    return text
+
+
+def _describe_value(node) -> str:
+    if isinstance(node, Literal):
+        if node.value is None or isinstance(node.value, bool):
+            return _sql_literal(node.value)
+        return str(node.value)
+    if isinstance(node, Column):
+        return node.name
+    if isinstance(node, Split):
+        position = _ORDINALS.get(node.offset, f"number {node.offset + 1}")
+        return f"the {position} part of {_describe_value(node.expr)} (split by '{node.delimiter}')"
+    if isinstance(node, Extract):
+        return f"the {node.part.lower()} of {_describe_value(node.expr)}"
+    if isinstance(node, ColumnTagged):
+        return f"the column tagged '{node.tag}'"
+    return to_sql(node)
+
+
+def describe(node) -> str:
+    """Explain a predicate AST in plain English"""
+    if isinstance(node, Or):
+        return ' or '.join(_wrap_description(item, node) for item in node.items)
+    if isinstance(node, And):
+        return ' and '.join(_wrap_description(item, node) for item in node.items)
+    if isinstance(node, Not):
+        return f"not ({describe(node.item)})"
+    if isinstance(node, InList):
+        values = ', '.join(_describe_value(value) for value in node.values)
+        verb = 'is not one of' if node.negated else 'is one of'
+        return f"{_describe_value(node.expr)} {verb}: {values}"
+    if isinstance(node, Comparison):
+        if isinstance(node.left, Literal) and isinstance(node.right, Literal):
+            # Constant conditions such as 1=1 read best as written
+            return f"{to_sql(node.left)}{node.op}{to_sql(node.right)}"
+        return f"{_describe_value(node.left)} {_COMPARISON_WORDS[node.op]} {_describe_value(node.right)}"
+    if isinstance(node, Like):
+        verb = 'does not match' if node.negated else 'matches'
+        return f"{_describe_value(node.expr)} {verb} the pattern '{node.pattern}'"
+    if isinstance(node, IsNull):
+        return f"{_describe_value(node.expr)} is {'not ' if node.negated else ''}empty"
+    if isinstance(node, Truth):
+        return describe(node.expr)
+    if isinstance(node, AttributeValuesContains):
+        return f"the user's {node.attribute} matches values in {_describe_expression(node.expression)}"
+    if isinstance(node, RegexpContains):
+        return f"{_describe_value(node.expr)} contains a match for the pattern '{node.pattern}'"
+    return _describe_value(node)
+
+
+def _wrap_description(item, parent) -> str:
+    text = describe(item)
+    if isinstance(item, (And, Or)) and type(item) is not type(parent):
+        return f"({text})"
+    return text
+
+
+@lru_cache(maxsize=PREDICATE_CACHE_SIZE)
+def parse_expression(text: str):
+    """Parse a column expression such as the second argument of @attributeValuesContains"""
+    parser = _Parser(normalize_predicate(text))
+    value = parser.parse_value()
+    if parser.peek() is not None:
+        raise PredicateParseError(f"Unexpected {parser.peek().text!r} in expression")
+    return value
+
+
+def _describe_expression(text: str) -> str:
+    try:
+        return _describe_value(parse_expression(text))
+    except PredicateParseError:
+        return text
+
+
+@lru_cache(maxsize=PREDICATE_CACHE_SIZE)
+def _explain_normalized(text: str) -> Optional[str]:
+    node, _ = _parse_normalized(text)
+    return describe(node) if node is not None else None
+
+
+def explain_predicate(predicate: str) -> str:
+    """Convert predicate logic to a human-readable explanation
+
+    Predicates outside the supported dialect are returned unchanged.
+    """
+    if not predicate:
+        return predicate
+    explanation = _explain_normalized(normalize_predicate(str(predicate)))
+    return explanation if explanation is not None else predicate
+
+
+def clear_caches():
+    """Drop memoized parse and explanation results"""
+    _parse_normalized.cache_clear()
+    _explain_normalized.cache_clear()
+    parse_expression.cache_clear()
+
+
+# --- Value sets and comparison --------------------------------------------
+
+EQUIVALENT = 'EQUIVALENT'
+EXPANDED = 'EXPANDED'
+RESTRICTED = 'RESTRICTED'
+MIXED = 'MIXED'
+UNKNOWN = 'UNKNOWN'
+
+
+@dataclass(frozen=True)
+class ValueSets:
+    """Allowed values per expression for membership-style predicates
+
+    ``combinator`` is 'OR' or 'AND' (how the memberships are joined) and
+    ``values`` maps the canonical SQL of each expression to its allowed
+    values. ``always_true`` marks predicates such as ``1=1`` that allow
+    every row.
+    """
+    combinator: str
+    values: Tuple[Tuple[str, frozenset], ...]
+    always_true: bool = False
+
+    def as_dict(self) -> dict:
+        return dict(self.values)
+
+
+@dataclass(frozen=True)
+class PredicateDiff:
+    """Difference between two predicates in terms of allowed values
+
+    ``added`` and ``removed`` map expression SQL to the sorted values that
+    became allowed or stopped being allowed; ``change`` is one of
+    EQUIVALENT, EXPANDED, RESTRICTED, MIXED or UNKNOWN.
+    """
+    change: str
+    added: Tuple[Tuple[str, Tuple[Any, ...]], ...] = ()
+    removed: Tuple[Tuple[str, Tuple[Any, ...]], ...] = ()
+    old_always_true: bool = False
+    new_always_true: bool = False
+
+
+def _flatten(node, kind) -> List[Any]:
+    if isinstance(node, kind):
+        return [term for item in node.items for term in _flatten(item, kind)]
+    return [node]
+
+
+def _is_always_true(node) -> bool:
+    if isinstance(node, Truth):
+        return isinstance(node.expr, Literal) and node.expr.value is True
+    if isinstance(node, Comparison) and node.op == '=':
+        return isinstance(node.left, Literal) and isinstance(node.right, Literal) \
+            and node.left.value == node.right.value
+    return False
+
+
+def _membership(node) -> Optional[Tuple[str, frozenset]]:
+    """(expression SQL, values) for ``expr IN (...)`` and ``expr = literal``"""
+    if isinstance(node, InList) and not node.negated and not isinstance(node.expr, Literal) \
+            and all(isinstance(value, Literal) for value in node.values):
+        return to_sql(node.expr), frozenset(value.value for value in node.values)
+    if isinstance(node, Comparison) and node.op == '=':
+        if isinstance(node.right, Literal) and not isinstance(node.left, Literal):
+            return to_sql(node.left), frozenset([node.right.value])
+        if isinstance(node.left, Literal) and not isinstance(node.right, Literal):
+            return to_sql(node.right), frozenset([node.left.value])
+    return None
+
+
+def value_sets(node) -> Optional[ValueSets]:
+    """Allowed values of a predicate made of IN lists and equalities
+
+    Supports a single membership, memberships joined only by OR or only by
+    AND, and always-true predicates. Returns None for anything else
+    (negations, ranges, LIKE, mixed AND/OR), which callers treat as
+    not comparable.
+    """
+    if _is_always_true(node):
+        return ValueSets('ALL', (), always_true=True)
+
+    combinator = 'AND' if isinstance(node, And) else 'OR'
+    terms = _flatten(node, And if combinator == 'AND' else Or)
+    values = {}
+    for term in terms:
+        membership = _membership(term)
+        if membership is None:
+            return None
+        key, allowed = membership
+        if key not in values:
+            values[key] = allowed
+        elif combinator == 'OR':
+            values[key] = values[key] | allowed
+        else:
+            values[key] = values[key] & allowed
+    return ValueSets(combinator, tuple(sorted(values.items())))
+
+
+def _sorted_values(values) -> Tuple[Any, ...]:
+    return tuple(sorted(values, key=lambda value: (str(type(value)), str(value))))
+
+
+def compare_predicates(old_predicate: str, new_predicate: str) -> PredicateDiff:
+    """Compare two predicates by the values they allow
+
+    Whitespace-only and formatting edits are EQUIVALENT. Expansion and
+    restriction are decided by set containment per expression, so adding a
+    department code to an IN list is EXPANDED and dropping one is
+    RESTRICTED. Predicates outside the supported shapes give UNKNOWN.
+    """
+    old_text = normalize_predicate(str(old_predicate))
+    new_text = normalize_predicate(str(new_predicate))
+    if old_text == new_text:
+        return PredicateDiff(EQUIVALENT)
+
+    old_node, _ = _parse_normalized(old_text)
+    new_node, _ = _parse_normalized(new_text)
+    if old_node is None or new_node is None:
+        return PredicateDiff(UNKNOWN)
+    if old_node == new_node:
+        return PredicateDiff(EQUIVALENT)
+
+    old_sets, new_sets = value_sets(old_node), value_sets(new_node)
+    if old_sets is None or new_sets is None:
+        return PredicateDiff(UNKNOWN, old_always_true=_is_always_true(old_node),
+                             new_always_true=_is_always_true(new_node))
+    if old_sets.always_true or new_sets.always_true:
+        if old_sets.always_true and new_sets.always_true:
+            change = EQUIVALENT
+        else:
+            change = EXPANDED if new_sets.always_true else RESTRICTED
+        return PredicateDiff(change, old_always_true=old_sets.always_true,
+                             new_always_true=new_sets.always_true)
+
+    old_values, new_values = old_sets.as_dict(), new_sets.as_dict()
+    # A single membership reads the same under either combinator
+    combinators = {sets.combinator for sets in (old_sets, new_sets) if len(sets.values) > 1}
+    if len(combinators) > 1:
+        return PredicateDiff(UNKNOWN)
+    combinator = combinators.pop() if combinators else 'OR'
+
+    added, removed = [], []
+    expanded = restricted = False
+    for key in sorted(set(old_values) | set(new_values)):
+        if combinator == 'AND' and (key not in old_values or key not in new_values):
+            # Dropping an AND condition allows more rows; adding one allows fewer
+            expanded |= key not in new_values
+            restricted |= key not in old_values
+            continue
+        before = old_values.get(key, frozenset())
+        after = new_values.get(key, frozenset())
+        if after - before:
+            added.append((key, _sorted_values(after - before)))
+            expanded = True
+        if before - after:
+            removed.append((key, _sorted_values(before - after)))
+            restricted = True
+
+    if expanded and restricted:
+        change = MIXED
+    elif expanded:
+        change = EXPANDED
+    elif restricted:
+        change = RESTRICTED
+    else:
+        change = EQUIVALENT
+    return PredicateDiff(change, tuple(added), tuple(removed))
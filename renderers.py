@@ -0,0 +1,515 @@
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+from document_model import ExplanationLine, PolicyDocument
+from brand_assets import get_logo
+from pdf_styles import get_pdf_styles, yaml_flowable
+
+# Output format -> {style name: render(document, output_path)}; the first
+# style registered for a format is its default. Renderers write silently and
+# return output_path; reporting where documents went is up to the caller.
+_renderers: Dict[str, Dict[str, Callable]] = {}
+
+# Base DOCX (styles, logo header) per look, built once per process
+_docx_templates: Dict[str, bytes] = {}
+
+# The PDF logo is drawn one inch wide; 300 px keeps it sharp at print
+# resolution. reportlab decodes and recompresses the image for every PDF, so
+# embedding the 3700 px original cost about 300 ms per document.
+PDF_LOGO_MAX_PX = 300
+
+
+def register_renderer(fmt: str, style: str = 'default'):
+    """Decorator adding a renderer for an output format, optionally as a named style"""
+    def decorator(func):
+        _renderers.setdefault(fmt, {})[style] = func
+        return func
+    return decorator
+
+
+def get_renderer(fmt: str, style: Optional[str] = None) -> Callable:
+    """Renderer for fmt in the given style, or the format's default style"""
+    styles = _renderers.get(fmt)
+    if not styles:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    if style in styles:
+        return styles[style]
+    if style is not None and len(styles) > 1:
+        raise ValueError(f"Unknown {fmt} style {style!r}; choose from {', '.join(styles)}")
+    return next(iter(styles.values()))
+
+
+def renderer_styles(fmt: str) -> List[str]:
+    return list(_renderers.get(fmt, {}))
+
+
+def _outer_parens(text: str) -> bool:
+    """True when the whole text is wrapped in one matching pair of parentheses"""
+    depth = 0
+    for i, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0 and i != len(text) - 1:
+                return False
+    return depth == 0 and text.endswith(')')
+
+
+# --- Markdown ---------------------------------------------------------------
+
+@register_renderer('md')
+def render_markdown(document: PolicyDocument, output_path: str):
+    with open(output_path, 'w', encoding='utf-8') as file:
+        file.write(document.to_markdown())
+    return output_path
+
+
+# --- DOCX -------------------------------------------------------------------
+
+def _docx_template(style: str, build: Callable[[], bytes]) -> bytes:
+    template = _docx_templates.get(style)
+    if template is None:
+        template = _docx_templates[style] = build()
+    return template
+
+
+def _new_template_document():
+    """Empty document with one-inch margins; _finish_template() adds the logo header"""
+    from docx import Document
+    from docx.shared import Inches
+
+    doc = Document()
+
+    # Set document margins
+    for section in doc.sections:
+        section.top_margin = Inches(1)
+        section.bottom_margin = Inches(1)
+        section.left_margin = Inches(1)
+        section.right_margin = Inches(1)
+    return doc
+
+
+def _finish_template(doc) -> bytes:
+    from docx.shared import Inches
+    from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+
+    # Add MFEC logo
+    try:
+        logo = get_logo()
+        if logo:
+            max_width = Inches(1.5)
+
+            paragraph = doc.add_paragraph()
+            paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
+            run = paragraph.add_run()
+            run.add_picture(logo.stream(), width=max_width)
+
+            doc.add_paragraph()
+    except:
+        pass
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _add_paragraph_style(doc, name: str, font_name: str, size: int, color=None, bold: bool = False,
+                         space_before: Optional[int] = None, space_after: Optional[int] = None,
+                         line_spacing: Optional[float] = None, left_indent: Optional[float] = None):
+    from docx.shared import Inches, Pt, RGBColor
+    from docx.enum.style import WD_STYLE_TYPE
+
+    style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+    style.font.name = font_name
+    style.font.size = Pt(size)
+    if bold:
+        style.font.bold = True
+    if color:
+        style.font.color.rgb = RGBColor(*color)
+    if space_after is not None:
+        style.paragraph_format.space_after = Pt(space_after)
+    if space_before is not None:
+        style.paragraph_format.space_before = Pt(space_before)
+    if line_spacing is not None:
+        style.paragraph_format.line_spacing = line_spacing
+    if left_indent is not None:
+        style.paragraph_format.left_indent = Inches(left_indent)
+
+
+def _build_enhanced_template() -> bytes:
+    """Segoe UI styles matching the PDF output"""
+    doc = _new_template_document()
+    _add_paragraph_style(doc, 'CustomTitle', 'Segoe UI', 16, (44, 62, 80), bold=True, space_after=18, space_before=0)
+    _add_paragraph_style(doc, 'SectionHeading', 'Segoe UI', 14, (52, 73, 94), bold=True, space_after=12, space_before=18)
+    _add_paragraph_style(doc, 'RuleHeading', 'Segoe UI', 12, (68, 114, 196), bold=True, space_after=6, space_before=12)
+    _add_paragraph_style(doc, 'StepHeading', 'Segoe UI', 11, (112, 173, 71), bold=True, space_after=6, space_before=9)
+    _add_paragraph_style(doc, 'BodyText', 'Segoe UI', 11, (44, 62, 80), space_after=6, line_spacing=1.15)
+    _add_paragraph_style(doc, 'ActionText', 'Segoe UI', 11, (44, 62, 80), left_indent=0.25, space_after=3,
+                         line_spacing=1.15)
+    _add_paragraph_style(doc, 'YAMLText', 'Consolas', 9, (44, 62, 80), space_after=3, line_spacing=1.2)
+    return _finish_template(doc)
+
+
+def _build_classic_template() -> bytes:
+    """The original Calibri look with blue headings"""
+    doc = _new_template_document()
+    _add_paragraph_style(doc, 'CustomTitle', 'Calibri', 20, (0, 120, 212), bold=True, space_after=18, space_before=0)
+    _add_paragraph_style(doc, 'SectionHeading', 'Calibri', 16, (0, 120, 212), bold=True, space_after=12, space_before=18)
+    _add_paragraph_style(doc, 'RuleHeading', 'Calibri', 14, (68, 114, 196), bold=True, space_after=6, space_before=12)
+    _add_paragraph_style(doc, 'StepHeading', 'Calibri', 12, (112, 173, 71), bold=True, space_after=6, space_before=9)
+    _add_paragraph_style(doc, 'BodyText', 'Calibri', 11, space_after=6, line_spacing=1.15)
+    _add_paragraph_style(doc, 'CustomBullet', 'Calibri', 11, left_indent=0.25, space_after=3, line_spacing=1.15)
+    return _finish_template(doc)
+
+
+class _DocxWriter:
+    """A document plus the ids of the styles it uses, looked up once per document
+
+    python-docx resolves a style name and then scans every style in the
+    document for the default on each ``style=`` assignment, which was most
+    of the DOCX render time. Style ids are resolved on first use and set
+    directly on the paragraph and table elements.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self._style_ids: Dict[str, Optional[str]] = {}
+
+    def style_id(self, name: str, style_type) -> Optional[str]:
+        if name not in self._style_ids:
+            self._style_ids[name] = self.doc.part.get_style_id(self.doc.styles[name], style_type)
+        return self._style_ids[name]
+
+    def add_paragraph(self, text: str = '', style: Optional[str] = None):
+        from docx.enum.style import WD_STYLE_TYPE
+        paragraph = self.doc.add_paragraph(text)
+        if style is not None:
+            paragraph._p.style = self.style_id(style, WD_STYLE_TYPE.PARAGRAPH)
+        return paragraph
+
+    def add_table(self, rows: int, cols: int, style: str):
+        from docx.enum.style import WD_STYLE_TYPE
+        table = self.doc.add_table(rows=rows, cols=cols)
+        table._tbl.tblStyle_val = self.style_id(style, WD_STYLE_TYPE.TABLE)
+        return table
+
+
+def _add_run(paragraph, text: str, label: bool = False, size: int = 11):
+    from docx.shared import Pt, RGBColor
+    run = paragraph.add_run(text)
+    run.font.name = 'Segoe UI'
+    run.font.size = Pt(size)
+    if label:
+        run.bold = True
+        run.font.color.rgb = RGBColor(0, 120, 212)
+    return run
+
+
+def _add_enhanced_line(writer: _DocxWriter, line: ExplanationLine):
+    """Add one explanation line; a parenthesised condition gets lines of its own"""
+    from docx.shared import Inches, Pt
+    if not line.bullet:
+        p = writer.add_paragraph(style='BodyText')
+        if line.label:
+            _add_run(p, line.label, label=True)
+            p.add_run(' ' + line.sentence)
+        else:
+            p.add_run(line.sentence)
+        if line.indent:
+            p.paragraph_format.left_indent = Inches(0.25)
+            p.paragraph_format.space_after = Pt(6)
+        return
+
+    p = writer.add_paragraph(style='ActionText')
+    if line.label:
+        _add_run(p, line.label, label=True)
+
+    condition = (line.condition or '').strip()
+    if condition.startswith('(') and _outer_parens(condition):
+        # Lay a parenthesised condition out on its own lines for readability
+        _add_run(p, f" {line.text} (\n    ")
+        _add_run(p, condition[1:-1].strip())
+        _add_run(p, '\n).')
+    else:
+        _add_run(p, f" {line.sentence}" if line.label else line.sentence)
+
+
+def _add_classic_line(writer: _DocxWriter, line: ExplanationLine):
+    """Add one explanation line as Word bullets with bold blue labels"""
+    from docx.shared import Inches, Pt
+    if not line.bullet:
+        p = writer.add_paragraph(style='BodyText')
+        if line.label:
+            _add_run(p, line.label, label=True, size=10)
+            p.add_run(' ' + line.sentence)
+        else:
+            p.add_run(line.sentence)
+        if line.indent:
+            p.paragraph_format.left_indent = Inches(0.25)
+            p.paragraph_format.space_after = Pt(6)
+        return
+
+    p = writer.add_paragraph(style='List Bullet')
+    p.paragraph_format.left_indent = Inches(0.25)
+    if line.label:
+        _add_run(p, line.label, label=True, size=10)
+        _add_run(p, f" {line.sentence}", size=10)
+    else:
+        _add_run(p, line.sentence, size=10)
+
+
+def _add_yaml_borders(cell):
+    from docx.oxml.shared import OxmlElement, qn
+    tcPr = cell._tc.get_or_add_tcPr()
+    tcBorders = OxmlElement('w:tcBorders')
+    for border_name in ['top', 'left', 'bottom', 'right']:
+        border = OxmlElement(f'w:{border_name}')
+        border.set(qn('w:val'), 'single')
+        border.set(qn('w:sz'), '4')
+        border.set(qn('w:space'), '0')
+        border.set(qn('w:color'), 'CCCCCC')
+        tcBorders.append(border)
+    tcPr.append(tcBorders)
+
+
+def _write_docx(document: PolicyDocument, output_path: str, template: bytes,
+                add_line: Callable, bullet_style: str, yaml_borders: bool = False):
+    """Title, info table, YAML, rules, sections and footer; the look comes from template and add_line"""
+    from docx import Document
+    from docx.shared import Pt, RGBColor
+    from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+    from docx.enum.table import WD_TABLE_ALIGNMENT
+    from docx.oxml.ns import nsdecls
+    from docx.oxml import parse_xml
+
+    doc = Document(BytesIO(template))
+    writer = _DocxWriter(doc)
+
+    # Add title with professional styling
+    title = writer.add_paragraph('Immuta Rule Configuration Analysis', style='CustomTitle')
+    title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+
+    writer.add_paragraph()
+
+    # Add professional info table matching PDF style
+    info_table = writer.add_table(3, 2, 'Light Grid Accent 1')
+    info_table.alignment = WD_TABLE_ALIGNMENT.CENTER
+
+    # Header row
+    header_cells = info_table.rows[0].cells
+    header_cells[0].text = 'Document Information'
+    header_cells[1].text = ''
+    header_cells[0].merge(header_cells[1])
+
+    # Style header
+    header_para = header_cells[0].paragraphs[0]
+    header_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    header_run = header_para.runs[0]
+    header_run.font.name = 'Segoe UI'
+    header_run.font.size = Pt(12)
+    header_run.font.bold = True
+    header_run.font.color.rgb = RGBColor(255, 255, 255)
+
+    # Blue background for header
+    shading_elm = parse_xml(r'<w:shd {} w:fill="0078D4"/>'.format(nsdecls('w')))
+    header_cells[0]._tc.get_or_add_tcPr().append(shading_elm)
+
+    # Data rows
+    info_table.cell(1, 0).text = 'Dataset/Table:'
+    info_table.cell(1, 1).text = document.dataset_name
+    info_table.cell(2, 0).text = 'File Name:'
+    info_table.cell(2, 1).text = document.file_name
+
+    # Style data rows
+    for i in range(1, 3):
+        for j in range(2):
+            cell = info_table.cell(i, j)
+            para = cell.paragraphs[0]
+            run = para.runs[0] if para.runs else para.add_run(cell.text)
+            run.font.name = 'Segoe UI'
+            run.font.size = Pt(10)
+
+            if j == 0:  # First column - labels
+                run.font.bold = True
+                run.font.color.rgb = RGBColor(0, 120, 212)
+                # Light blue background for labels
+                shading_elm = parse_xml(r'<w:shd {} w:fill="E7F3FF"/>'.format(nsdecls('w')))
+                cell._tc.get_or_add_tcPr().append(shading_elm)
+
+    writer.add_paragraph()
+
+    if document.yaml_text:
+        # YAML Configuration Section
+        writer.add_paragraph('YAML Configuration', style='SectionHeading')
+        writer.add_paragraph()
+
+        # Create professional YAML display table
+        yaml_table = writer.add_table(1, 1, 'Table Grid')
+        yaml_cell = yaml_table.cell(0, 0)
+
+        # Clear default paragraph and add YAML content
+        yaml_cell.paragraphs[0].clear()
+        yaml_para = yaml_cell.paragraphs[0]
+        yaml_run = yaml_para.add_run(document.yaml_text.strip())
+        yaml_run.font.name = 'Consolas'
+        yaml_run.font.size = Pt(9)
+
+        # Set cell background
+        shading_elm = parse_xml(r'<w:shd {} w:fill="F8F8F8"/>'.format(nsdecls('w')))
+        yaml_cell._tc.get_or_add_tcPr().append(shading_elm)
+        if yaml_borders:
+            _add_yaml_borders(yaml_cell)
+
+    if document.rules:
+        # Rule Explanations Section
+        writer.add_paragraph('Rule Explanations', style='SectionHeading')
+        writer.add_paragraph()
+
+        for rule in document.rules:
+            if rule.number > 1:
+                writer.add_paragraph()
+
+            writer.add_paragraph(f"Rule {rule.number}:", style='RuleHeading')
+
+            # Add rule number box
+            rule_table = writer.add_table(1, 1, 'Table Grid')
+            rule_cell = rule_table.cell(0, 0)
+            rule_cell.text = f"Rule {rule.number}"
+
+            # Style rule number box
+            rule_cell_para = rule_cell.paragraphs[0]
+            rule_cell_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            rule_cell_run = rule_cell_para.runs[0]
+            rule_cell_run.font.name = 'Segoe UI'
+            rule_cell_run.font.size = Pt(11)
+            rule_cell_run.font.bold = True
+            rule_cell_run.font.color.rgb = RGBColor(255, 255, 255)
+
+            # Blue background for rule number
+            shading_elm = parse_xml(r'<w:shd {} w:fill="4472C4"/>'.format(nsdecls('w')))
+            rule_cell._tc.get_or_add_tcPr().append(shading_elm)
+
+            for step in rule.steps:
+                writer.add_paragraph(step.title, style='StepHeading')
+                for line in step.lines:
+                    add_line(writer, line)
+
+    # Free-form sections (errors, analysis notes)
+    for section in document.sections:
+        writer.add_paragraph(section.heading, style='SectionHeading')
+        for paragraph in section.paragraphs:
+            writer.add_paragraph(paragraph, style='BodyText')
+        for bullet in section.bullets:
+            writer.add_paragraph(bullet, style=bullet_style)
+
+    # Add footer with generation info
+    writer.add_paragraph()
+    footer_para = writer.add_paragraph()
+    footer_para.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    footer_run = footer_para.add_run('Generated by Immuta Rule Configuration Explainer')
+    footer_run.font.name = 'Segoe UI'
+    footer_run.font.size = Pt(8)
+    footer_run.font.italic = True
+    footer_run.font.color.rgb = RGBColor(128, 128, 128)
+
+    doc.save(output_path)
+
+
+@register_renderer('docx', 'enhanced')
+def render_docx_enhanced(document: PolicyDocument, output_path: str):
+    """Word document with formatting matching the PDF"""
+    _write_docx(document, output_path, _docx_template('enhanced', _build_enhanced_template),
+                _add_enhanced_line, 'ActionText')
+    return output_path
+
+
+@register_renderer('docx', 'classic')
+def render_docx_classic(document: PolicyDocument, output_path: str):
+    """Word document in the original Calibri style with Word bullets"""
+    _write_docx(document, output_path, _docx_template('classic', _build_classic_template),
+                _add_classic_line, 'List Bullet', yaml_borders=True)
+    return output_path
+
+
+# --- PDF --------------------------------------------------------------------
+
+@register_renderer('pdf')
+def render_pdf(document: PolicyDocument, output_path: str):
+    """PDF document using reportlab"""
+    try:
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table
+        from reportlab.lib.units import inch
+        from xml.sax.saxutils import escape
+
+        styles = get_pdf_styles()
+        title_style = styles['title']
+        heading1_style = styles['heading1']
+        normal_style = styles['normal']
+        rule_style = styles['rule']
+        step_style = styles['step']
+        action_style = styles['action']
+
+        doc = SimpleDocTemplate(output_path, pagesize=letter,
+                              topMargin=1*inch, bottomMargin=1*inch,
+                              leftMargin=1*inch, rightMargin=1*inch)
+        story = []
+
+        # Add MFEC logo if exists
+        try:
+            logo_asset = get_logo(PDF_LOGO_MAX_PX)
+            if logo_asset:
+                max_width = 1*inch
+                logo_height = max_width / logo_asset.aspect_ratio
+
+                logo = Image(logo_asset.stream(), width=max_width, height=logo_height)
+                logo.hAlign = 'RIGHT'
+                story.append(logo)
+                story.append(Spacer(1, 0.2*inch))
+        except:
+            pass
+
+        # Add info table
+        info_data = [['Dataset/Table:', document.dataset_name], ['File Name:', document.file_name]]
+        info_table = Table(info_data, colWidths=[2*inch, 4*inch])
+        info_table.setStyle(styles['info_table'])
+        story.append(info_table)
+        story.append(Spacer(1, 0.3*inch))
+
+        story.append(Paragraph(escape(document.title), title_style))
+
+        if document.yaml_text:
+            story.append(Paragraph('Configuration', heading1_style))
+            story.append(yaml_flowable(document.yaml_text))
+            story.append(Spacer(1, 0.2*inch))
+
+        if document.rules:
+            story.append(Paragraph('Explanation', heading1_style))
+            for rule in document.rules:
+                story.append(Paragraph(f"Rule {rule.number}:", rule_style))
+                for step in rule.steps:
+                    story.append(Paragraph(escape(step.title), step_style))
+                    for line in step.lines:
+                        text = escape(line.sentence)
+                        if line.label:
+                            text = f"<b>{escape(line.label)}</b> {text}"
+                        if line.bullet:
+                            story.append(Paragraph(f'• {text}', action_style))
+                        elif line.indent:
+                            story.append(Paragraph(text, action_style))
+                        else:
+                            story.append(Paragraph(text, normal_style))
+
+        for section in document.sections:
+            story.append(Paragraph(escape(section.heading), heading1_style))
+            for paragraph in section.paragraphs:
+                story.append(Paragraph(escape(paragraph), normal_style))
+            for bullet in section.bullets:
+                story.append(Paragraph(f'• {escape(bullet)}', action_style))
+
+        doc.build(story)
+    except ImportError:
+        raise Exception("reportlab not installed")
+    except Exception as e:
+        raise Exception(f"PDF generation failed: {e}")
+    return output_path
@@ -0,0 +1,93 @@
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+# Alignment operations
+EQUAL = 'EQUAL'
+MODIFIED = 'MODIFIED'
+ADDED = 'ADDED'
+REMOVED = 'REMOVED'
+
+# (operation, old index or None, new index or None)
+AlignedPair = Tuple[str, Optional[int], Optional[int]]
+
+
+def align_rules(old_fingerprints: Sequence[Hashable], new_fingerprints: Sequence[Hashable],
+                can_modify: Optional[Callable[[int, int], bool]] = None) -> List[AlignedPair]:
+    """Align two rule lists by minimum edit distance over rule fingerprints
+
+    Rules with equal fingerprints align at no cost; inserting or deleting a
+    rule costs 1, and turning one rule into another (MODIFIED) costs 1 when
+    ``can_modify(old_index, new_index)`` allows it (e.g. same rule type) and
+    is otherwise not considered. A common prefix and suffix are trimmed
+    before the quadratic step, so typical edits to long policies are
+    close to linear.
+    """
+    old_count, new_count = len(old_fingerprints), len(new_fingerprints)
+
+    prefix = 0
+    while prefix < old_count and prefix < new_count and old_fingerprints[prefix] == new_fingerprints[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < old_count - prefix and suffix < new_count - prefix
+           and old_fingerprints[old_count - 1 - suffix] == new_fingerprints[new_count - 1 - suffix]):
+        suffix += 1
+
+    head = [(EQUAL, i, i) for i in range(prefix)]
+    tail = [(EQUAL, old_count - suffix + i, new_count - suffix + i) for i in range(suffix)]
+    middle = _align_middle(old_fingerprints, new_fingerprints, prefix, old_count - suffix,
+                           prefix, new_count - suffix, can_modify)
+    return head + middle + tail
+
+
+def _align_middle(old_fingerprints, new_fingerprints, old_start, old_end, new_start, new_end,
+                  can_modify) -> List[AlignedPair]:
+    rows, cols = old_end - old_start, new_end - new_start
+    if rows == 0:
+        return [(ADDED, None, new_start + j) for j in range(cols)]
+    if cols == 0:
+        return [(REMOVED, old_start + i, None) for i in range(rows)]
+
+    infinity = rows + cols + 1
+    cost = [[0] * (cols + 1) for _ in range(rows + 1)]
+    for i in range(1, rows + 1):
+        cost[i][0] = i
+    for j in range(1, cols + 1):
+        cost[0][j] = j
+
+    for i in range(1, rows + 1):
+        old_index = old_start + i - 1
+        old_fp = old_fingerprints[old_index]
+        row, previous = cost[i], cost[i - 1]
+        for j in range(1, cols + 1):
+            new_index = new_start + j - 1
+            if old_fp == new_fingerprints[new_index]:
+                diagonal = previous[j - 1]
+            elif can_modify is None or can_modify(old_index, new_index):
+                diagonal = previous[j - 1] + 1
+            else:
+                diagonal = infinity
+            row[j] = min(diagonal, previous[j] + 1, row[j - 1] + 1)
+
+    # Walk back from the end, preferring matches, then modifications
+    aligned = []
+    i, j = rows, cols
+    while i > 0 or j > 0:
+        old_index, new_index = old_start + i - 1, new_start + j - 1
+        if i > 0 and j > 0:
+            equal = old_fingerprints[old_index] == new_fingerprints[new_index]
+            if equal and cost[i][j] == cost[i - 1][j - 1]:
+                aligned.append((EQUAL, old_index, new_index))
+                i, j = i - 1, j - 1
+                continue
+            if (not equal and cost[i][j] == cost[i - 1][j - 1] + 1
+                    and (can_modify is None or can_modify(old_index, new_index))):
+                aligned.append((MODIFIED, old_index, new_index))
+                i, j = i - 1, j - 1
+                continue
+        if i > 0 and cost[i][j] == cost[i - 1][j] + 1:
+            aligned.append((REMOVED, old_index, None))
+            i -= 1
+        else:
+            aligned.append((ADDED, None, new_index))
+            j -= 1
+    aligned.reverse()
+    return aligned
@@ -16,6 +16,10 @@ with st.expander("📋 Available Tools"):
     **Document Generation**: Upload YAML files to generate professional explanations
     
     **Impact Analysis**: Compare old vs new YAML files to analyze policy changes indevelopment
+    
+    **Bulk Impact Analysis**: Pair DEV/PRD policy files automatically and get one report for a whole release
+    
+    **Policy Search**: Find every policy and rule that references a group, attribute, tag, field or value
     """)
 
 st.markdown("---")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep parsed policies out of the user's cache folder
+os.environ.setdefault('IMMUTA_POLICY_CACHE_DIR', '')
@@ -0,0 +1,50 @@
+from access_simulator import AccessSimulator, RowTable, UserTable, compare_access
+
+ROWS = RowTable([
+    {"Plant": "1101", "Dept": "EMI/A"},
+    {"Plant": "2000", "Dept": "ECM/B"},
+    {"Plant": "1602", "Dept": "OTF/C"},
+])
+USERS = UserTable([
+    {"name": "analyst", "groups": ["analysts"]},
+    {"name": "viewer", "groups": ["viewers"]},
+])
+
+
+def _policy(*rules):
+    lines = ["actions:", "  - rules:"]
+    for groups, predicate in rules:
+        lines += [
+            "      - type: Row Restriction by Where Clause",
+            "        config:",
+            f"          predicate: {predicate!r}",
+            "        inclusions:",
+            f"          groups: [{', '.join(groups)}]",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def test_regexp_contains_rule_is_evaluated():
+    simulator = AccessSimulator(_policy((["analysts"], "REGEXP_CONTAINS(Plant, '1101|1602')")))
+    visible = simulator.visible(USERS, ROWS)
+    assert visible[0].tolist() == [True, False, True]
+    assert visible[1].tolist() == [False, False, False]
+    assert simulator.warnings == []
+
+
+def test_regexp_contains_inside_or():
+    predicate = "split(Dept, '/')[safe_offset(0)] in ('ECM') or REGEXP_CONTAINS(Plant, ('1101'))"
+    visible = AccessSimulator(_policy((["analysts"], predicate))).visible(USERS, ROWS)
+    assert visible[0].tolist() == [True, True, False]
+
+
+def test_unevaluable_rule_reports_users_as_undetermined():
+    old = _policy((["analysts"], "Plant = '1101'"), (["viewers"], "Plant = '2000'"))
+    new = _policy((["analysts"], "NOT_A_FUNCTION(Plant) = 1"), (["viewers"], "Plant = '2000'"))
+    delta = compare_access(old, new, USERS, ROWS)
+    assert delta.changed_users() == []
+    assert delta.undetermined_users() == ["analyst"]
+    summary = delta.summary()
+    assert summary["users_lost_rows"] == 0
+    assert summary["users_undetermined"] == 1
+    assert any("could not be evaluated" in warning for warning in summary["warnings"])
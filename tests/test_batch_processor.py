@@ -0,0 +1,71 @@
+import os
+from batch_processor import BatchProcessor, _new_result
+
+
+def _policy(table, predicate):
+    return (
+        "name: Test policy\n"
+        "circumstances:\n"
+        f"  - tag: Data Entity.PO.Table.{table}\n"
+        "    type: tags\n"
+        "actions:\n"
+        "  - rules:\n"
+        "      - type: Row Restriction by Custom Where Clause\n"
+        "        config:\n"
+        f"          predicate: \"{predicate}\"\n"
+        "        inclusions:\n"
+        "          groups: [team.a]\n"
+    )
+
+
+def _pending_result(tmp_path, index, final_path):
+    result = _new_result(index, f'input{index}.yaml')
+    partial = tmp_path / f'out.md.{index}.partial'
+    partial.write_text(f'from input {index}')
+    result["pending"] = [(str(partial), final_path)]
+    return result
+
+
+def test_commit_outputs_later_input_wins_in_any_completion_order(tmp_path):
+    final_path = str(tmp_path / 'out.md')
+    processor = BatchProcessor(str(tmp_path), formats=['md'], workers=1)
+
+    later = _pending_result(tmp_path, 1, final_path)
+    processor._commit_outputs(later)
+    earlier = _pending_result(tmp_path, 0, final_path)
+    processor._commit_outputs(earlier)
+
+    assert open(final_path).read() == 'from input 1'
+    assert later["outputs"] == [final_path]
+    assert earlier["outputs"] == []
+    assert sorted(os.listdir(tmp_path)) == ['out.md']
+
+    processor._owners = {}
+    processor._commit_outputs(_pending_result(tmp_path, 0, final_path))
+    processor._commit_outputs(_pending_result(tmp_path, 1, final_path))
+    assert open(final_path).read() == 'from input 1'
+
+
+def test_changed_only_regenerates_inputs_sharing_an_output(tmp_path):
+    dev = tmp_path / 'dev.yaml'
+    prd = tmp_path / 'prd.yaml'
+    other = tmp_path / 'other.yaml'
+    dev.write_text(_policy('orders', "Dept in ('DEV')"))
+    prd.write_text(_policy('orders', "Dept in ('PRD')"))
+    other.write_text(_policy('invoices', "Dept in ('A')"))
+    inputs = [str(dev), str(prd), str(other)]
+    output_dir = tmp_path / 'out'
+
+    results = BatchProcessor(str(output_dir), formats=['md'], workers=1).run(inputs)
+    assert all(r["success"] for r in results)
+    assert "PRD" in (output_dir / 'orders_explanation.md').read_text()
+
+    results = BatchProcessor(str(output_dir), formats=['md'], workers=1).run(inputs, changed_only=True)
+    assert [r["skipped"] for r in results] == [True, True, True]
+
+    dev.write_text(_policy('orders', "Dept in ('DEV2')"))
+    results = BatchProcessor(str(output_dir), formats=['md'], workers=1).run(inputs, changed_only=True)
+    assert [r["skipped"] for r in results] == [False, False, True]
+    # The later input still owns the shared document, as in a full run
+    document = (output_dir / 'orders_explanation.md').read_text()
+    assert "PRD" in document and "DEV2" not in document
@@ -0,0 +1,69 @@
+from generation_manifest import MANIFEST_FILE_NAME, GenerationManifest, hash_file, plan_incremental
+
+
+def _write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_round_trip_and_up_to_date(tmp_path):
+    source = _write(tmp_path / 'policy.yaml', 'name: one\n')
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    (output_dir / 'one.md').write_text('doc')
+
+    manifest = GenerationManifest(str(output_dir), 'v1')
+    manifest.record(source, hash_file(source), {'md': str(output_dir / 'one.md')})
+    manifest.save()
+    assert (output_dir / MANIFEST_FILE_NAME).exists()
+
+    loaded = GenerationManifest.load(str(output_dir), 'v1')
+    assert loaded.outputs_for(source) == {'md': 'one.md'}
+    assert loaded.is_up_to_date(source, hash_file(source), ['md'])
+    assert not loaded.is_up_to_date(source, 'other-digest', ['md'])
+    assert not loaded.is_up_to_date(source, hash_file(source), ['md', 'pdf'])
+    assert not GenerationManifest.load(str(output_dir), 'v2').is_up_to_date(source, hash_file(source), ['md'])
+
+    (output_dir / 'one.md').unlink()
+    assert not loaded.is_up_to_date(source, hash_file(source), ['md'])
+
+
+def test_record_keeps_other_formats_until_the_input_changes(tmp_path):
+    manifest = GenerationManifest(str(tmp_path), 'v1')
+    manifest.record('policy.yaml', 'a', {'md': '/out/one.md'})
+    manifest.record('policy.yaml', 'a', {'pdf': '/out/one.pdf'})
+    assert manifest.outputs_for('policy.yaml') == {'md': 'one.md', 'pdf': 'one.pdf'}
+    manifest.record('policy.yaml', 'b', {'pdf': '/out/one.pdf'})
+    assert manifest.outputs_for('policy.yaml') == {'pdf': 'one.pdf'}
+
+
+def test_unreadable_manifest_is_ignored(tmp_path):
+    (tmp_path / MANIFEST_FILE_NAME).write_text('{not json')
+    assert GenerationManifest.load(str(tmp_path), 'v1').entries == {}
+
+
+def test_plan_skips_unchanged_inputs(tmp_path):
+    manifest = GenerationManifest(str(tmp_path), 'v1')
+    for name in ('a', 'b'):
+        (tmp_path / f'{name}.md').write_text('doc')
+        manifest.record(f'{name}.yaml', name, {'md': f'{name}.md'})
+
+    to_generate, to_skip = plan_incremental(manifest, ['a.yaml', 'b.yaml', 'c.yaml'], ['md'],
+                                            {'a.yaml': 'a', 'b.yaml': 'changed', 'c.yaml': None})
+    assert to_generate == ['b.yaml', 'c.yaml']
+    assert to_skip == ['a.yaml']
+
+
+def test_plan_regenerates_unchanged_input_sharing_an_output(tmp_path):
+    # DEV and PRD files of the same table write the same document
+    manifest = GenerationManifest(str(tmp_path), 'v1')
+    (tmp_path / 'table.md').write_text('doc')
+    (tmp_path / 'other.md').write_text('doc')
+    manifest.record('dev.yaml', 'dev', {'md': 'table.md'})
+    manifest.record('prd.yaml', 'prd', {'md': 'table.md'})
+    manifest.record('other.yaml', 'other', {'md': 'other.md'})
+
+    to_generate, to_skip = plan_incremental(manifest, ['dev.yaml', 'prd.yaml', 'other.yaml'], ['md'],
+                                            {'dev.yaml': 'dev', 'prd.yaml': 'edited', 'other.yaml': 'other'})
+    assert to_generate == ['dev.yaml', 'prd.yaml']
+    assert to_skip == ['other.yaml']
@@ -0,0 +1,20 @@
+import json
+import os
+import immuta_cli
+
+INPUT_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Input',
+                          'Contract----Official--Mart--DEV.yaml')
+
+
+def test_main_restores_stdout(tmp_path, capfd):
+    code = immuta_cli.main([INPUT_FILE, '-o', str(tmp_path), '--formats', 'md', '-j', '1', '-q'])
+    out, err = capfd.readouterr()
+    assert code == immuta_cli.EXIT_OK
+    assert json.loads(out)["generated"] == 1
+    assert err == ''
+
+    print("after main")
+    os.write(1, b"raw fd write\n")
+    out, err = capfd.readouterr()
+    assert out == "after main\nraw fd write\n"
+    assert err == ''
@@ -0,0 +1,71 @@
+from impact_analyzer import ImpactAnalyzer
+from rule_alignment import ADDED, EQUAL, MODIFIED, REMOVED, align_rules
+
+ROW_RULE = "Row Restriction by Custom Where Clause"
+MASK_RULE = "Mask by Hashing"
+
+
+def _records(*rules):
+    """Rule records for (type, groups, predicate) tuples"""
+    analyzer = ImpactAnalyzer()
+    return analyzer._build_records([
+        {"type": rule_type, "config": {"predicate": predicate}, "inclusions": {"groups": list(groups)}}
+        for rule_type, groups, predicate in rules
+    ])
+
+
+def test_align_rules_insert_at_top_is_one_addition():
+    assert align_rules(['a', 'b', 'c'], ['x', 'a', 'b', 'c']) == [
+        (ADDED, None, 0), (EQUAL, 0, 1), (EQUAL, 1, 2), (EQUAL, 2, 3),
+    ]
+
+
+def test_align_rules_removal_and_modification():
+    assert align_rules(['a', 'b', 'c'], ['a', 'c']) == [(EQUAL, 0, 0), (REMOVED, 1, None), (EQUAL, 2, 1)]
+    assert align_rules(['a', 'b', 'c'], ['a', 'B', 'c']) == [(EQUAL, 0, 0), (MODIFIED, 1, 1), (EQUAL, 2, 2)]
+
+
+def test_align_rules_without_modify_pairs_adds_and_removes():
+    aligned = align_rules(['a', 'b'], ['a', 'B'], lambda i, j: False)
+    assert sorted(aligned, key=str) == sorted([(EQUAL, 0, 0), (ADDED, None, 1), (REMOVED, 1, None)], key=str)
+
+
+def test_diff_records_inserted_rule_does_not_shift_later_rules():
+    old = _records((ROW_RULE, ['team.a'], "Dept in ('A')"),
+                   (ROW_RULE, ['team.b'], "Plant = '1101'"))
+    new = _records((ROW_RULE, ['team.new'], "Dept in ('Z')"),
+                   (ROW_RULE, ['team.a'], "Dept in ('A')"),
+                   (ROW_RULE, ['team.b'], "Plant in ('1101', '1602')"))
+    impact = ImpactAnalyzer()._diff_records(old, new)
+
+    assert impact["summary"] == {"old_rule_count": 2, "new_rule_count": 3, "rules_added": 1,
+                                 "rules_removed": 0, "impact_level": "HIGH"}
+    added, modified = impact["rule_changes"]
+    assert (added["change_type"], added["rule_number"]) == ("ADDED", 1)
+    assert (modified["change_type"], modified["rule_number"], modified["old_rule_number"]) == ("MODIFIED", 3, 2)
+    assert modified["predicate_diff"]["added"] == {"Plant": ["1602"]}
+    assert impact["access_impact"]["access_expanded"]
+    assert not impact["access_impact"]["access_restricted"]
+    assert impact["affected_users"] == ["team.new"]
+
+
+def test_diff_records_ignores_whitespace_only_edits():
+    old = _records((ROW_RULE, ['team.a'], "Dept in ('A','B')"))
+    new = _records((ROW_RULE, ['team.a'], "Dept  in ('A',\n 'B')"))
+    impact = ImpactAnalyzer()._diff_records(old, new)
+    assert impact["rule_changes"] == []
+    assert impact["summary"]["impact_level"] == "NONE"
+    assert impact["access_impact"]["access_unchanged"]
+
+
+def test_diff_records_restriction_and_type_change():
+    old = _records((ROW_RULE, ['team.a'], "Dept in ('A','B')"), (ROW_RULE, ['team.b'], "1=1"))
+    new = _records((ROW_RULE, ['team.a'], "Dept in ('A')"), (MASK_RULE, ['team.b'], "1=1"))
+    impact = ImpactAnalyzer()._diff_records(old, new)
+
+    by_type = {change["change_type"]: change for change in impact["rule_changes"]}
+    assert set(by_type) == {"MODIFIED", "ADDED", "REMOVED"}
+    assert by_type["MODIFIED"]["impact"] == "MEDIUM"
+    assert by_type["MODIFIED"]["predicate_diff"]["removed"] == {"Dept": ["B"]}
+    assert impact["access_impact"]["access_restricted"]
+    assert not impact["access_impact"]["access_expanded"]
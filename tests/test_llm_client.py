@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from llm_client import LLMClient
+
+
+class StubServer:
+    """Chat completion endpoint that counts requests and can hold or delay them"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+        self.requests = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with stub._lock:
+                    stub.requests += 1
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    stub.release.wait(5)
+                    time.sleep(stub.delay)
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+                payload = json.dumps({
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": f"analysis {stub.requests}"}}],
+                }).encode('utf-8')
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.release.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def _client(server: StubServer, tmp_path, **kwargs) -> LLMClient:
+    kwargs.setdefault('timeout', 5)
+    return LLMClient(base_url=server.base_url, api_key='test', cache_dir=str(tmp_path), **kwargs)
+
+
+def test_cache_hit_skips_the_endpoint(stub, tmp_path):
+    client = _client(stub, tmp_path)
+    first = client.submit_impact_analysis('a: 1', 'a: 2', []).result(10)
+    second = client.submit_impact_analysis('a: 1', 'a: 2', []).result(10)
+    assert first == second == 'analysis 1'
+    assert stub.requests == 1
+    # A fresh client reads the same answer from disk
+    assert _client(stub, tmp_path).submit_impact_analysis('a: 1', 'a: 2', []).result(10) == first
+    assert stub.requests == 1
+    client.shutdown()
+
+
+def test_changed_rule_changes_miss_the_cache(stub, tmp_path):
+    client = _client(stub, tmp_path)
+    client.submit_impact_analysis('a: 1', 'a: 2', [{"type": "modified"}]).result(10)
+    client.submit_impact_analysis('a: 1', 'a: 2', [{"type": "added"}]).result(10)
+    assert stub.requests == 2
+    client.shutdown()
+
+
+def test_same_pair_in_flight_shares_one_request(stub, tmp_path):
+    client = _client(stub, tmp_path)
+    stub.release.clear()
+    first = client.submit_impact_analysis('a: 1', 'a: 2', [])
+    second = client.submit_impact_analysis('a: 1', 'a: 2', [])
+    assert second is first
+    stub.release.set()
+    assert first.result(10) == 'analysis 1'
+    assert stub.requests == 1
+    client.shutdown()
+
+
+def test_max_concurrency_limits_parallel_requests(tmp_path):
+    with StubServer(delay=0.2) as server:
+        client = _client(server, tmp_path, max_concurrency=2)
+        futures = [client.submit_impact_analysis(f'a: {n}', 'a: 0', []) for n in range(6)]
+        assert all(future.result(10).startswith('analysis') for future in futures)
+        client.shutdown()
+    assert server.requests == 6
+    assert server.peak == 2
+
+
+def test_timeout_returns_error_and_is_not_cached(tmp_path):
+    with StubServer(delay=2) as server:
+        client = _client(server, tmp_path, timeout=0.2)
+        result = client.submit_impact_analysis('a: 1', 'a: 2', []).result(10)
+        assert result.startswith('LLM analysis error')
+        assert client.cached_impact_analysis('a: 1', 'a: 2', []) is None
+        assert list(tmp_path.iterdir()) == []
+        client.shutdown()
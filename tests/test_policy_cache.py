@@ -0,0 +1,79 @@
+import os
+import policy_cache
+from policy_cache import ParsedPolicyCache
+
+
+def _count_parses(monkeypatch):
+    calls = []
+    load_yaml = policy_cache.load_yaml
+
+    def counting_load(text):
+        calls.append(text)
+        return load_yaml(text)
+
+    monkeypatch.setattr(policy_cache, 'load_yaml', counting_load)
+    return calls
+
+
+def _entries(cache_dir):
+    return [name for _, _, names in os.walk(cache_dir) for name in names]
+
+
+def test_unchanged_content_is_parsed_once(tmp_path, monkeypatch):
+    calls = _count_parses(monkeypatch)
+    cache = ParsedPolicyCache(str(tmp_path))
+    assert cache.parse(b'name: one\n') == {'name': 'one'}
+    assert ParsedPolicyCache(str(tmp_path)).parse(b'name: one\n') == {'name': 'one'}
+    assert len(calls) == 1
+
+
+def test_edited_content_and_normalization_miss_the_cache(tmp_path, monkeypatch):
+    calls = _count_parses(monkeypatch)
+    cache = ParsedPolicyCache(str(tmp_path))
+    cache.parse(b'name: one\n')
+    assert cache.parse(b'name: two\n') == {'name': 'two'}
+    cache.parse(b'name: one\n', normalize=False)
+    assert len(calls) == 3
+    assert len(_entries(tmp_path)) == 3
+
+
+def test_schema_change_invalidates_entries(tmp_path, monkeypatch):
+    calls = _count_parses(monkeypatch)
+    cache = ParsedPolicyCache(str(tmp_path))
+    cache.parse(b'name: one\n')
+    key = cache.key(b'name: one\n', True)
+    monkeypatch.setattr(policy_cache, 'POLICY_CACHE_SCHEMA', policy_cache.POLICY_CACHE_SCHEMA + 1)
+    assert cache.get(key) is None
+    assert cache.parse(b'name: one\n') == {'name': 'one'}
+    assert len(calls) == 2
+
+
+def test_corrupt_entry_is_reparsed(tmp_path, monkeypatch):
+    calls = _count_parses(monkeypatch)
+    cache = ParsedPolicyCache(str(tmp_path))
+    cache.parse(b'name: one\n')
+    with open(cache._path(cache.key(b'name: one\n', True)), 'wb') as file:
+        file.write(b'not a pickle')
+    assert cache.parse(b'name: one\n') == {'name': 'one'}
+    assert len(calls) == 2
+
+
+def test_empty_environment_variable_disables_the_cache(tmp_path, monkeypatch):
+    calls = _count_parses(monkeypatch)
+    monkeypatch.setenv('IMMUTA_POLICY_CACHE_DIR', '')
+    monkeypatch.setattr(policy_cache, 'DEFAULT_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(policy_cache, '_default_cache', None)
+
+    cache = policy_cache.get_policy_cache()
+    assert cache.cache_dir is None
+    cache.parse(b'name: one\n')
+    cache.parse(b'name: one\n')
+    assert len(calls) == 2
+    assert _entries(tmp_path) == []
+
+
+def test_environment_variable_moves_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('IMMUTA_POLICY_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(policy_cache, '_default_cache', None)
+    policy_cache.get_policy_cache().parse(b'name: one\n')
+    assert len(_entries(tmp_path)) == 1
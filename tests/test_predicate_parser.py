@@ -0,0 +1,77 @@
+import pytest
+from predicate_parser import (
+    EQUIVALENT, EXPANDED, MIXED, RESTRICTED, UNKNOWN, And, Column, Comparison, InList, IsNull, Literal, Not, Or,
+    PredicateParseError, Split, compare_predicates, parse_predicate, to_sql, tokenize, value_sets,
+)
+
+
+def test_tokenize_kinds_and_positions():
+    tokens = tokenize("Dept in ('A','B''s') and x>=1")
+    assert [(t.kind, t.text) for t in tokens] == [
+        ('name', 'Dept'), ('name', 'in'), ('punct', '('), ('string', "'A'"), ('punct', ','),
+        ('string', "'B''s'"), ('punct', ')'), ('name', 'and'), ('name', 'x'), ('op', '>='), ('number', '1'),
+    ]
+    assert tokens[-1].position == 28
+    assert tokens[1].keyword == 'IN'
+    assert tokens[0].keyword is None
+
+
+def test_tokenize_rejects_unknown_character():
+    with pytest.raises(PredicateParseError, match="';' at position 2"):
+        tokenize("a ; b")
+
+
+def test_parse_split_membership_or_equality():
+    node = parse_predicate("split(Dept, '/')[safe_offset(0)] in ('OTF','OWE') or Plant = '1101'")
+    assert node == Or((
+        InList(Split(Column('Dept'), '/', 0), (Literal('OTF'), Literal('OWE'))),
+        Comparison(Column('Plant'), '=', Literal('1101')),
+    ))
+
+
+def test_and_binds_tighter_than_or():
+    node = parse_predicate("a = 1 or b = 2 and c = 3")
+    assert isinstance(node, Or)
+    assert node.items[1] == And((Comparison(Column('b'), '=', Literal(2)),
+                                 Comparison(Column('c'), '=', Literal(3))))
+
+
+def test_not_and_is_not_null():
+    node = parse_predicate("NOT a = 1 AND b IS NOT NULL")
+    assert node == And((Not(Comparison(Column('a'), '=', Literal(1))), IsNull(Column('b'), negated=True)))
+
+
+def test_whitespace_does_not_change_the_ast():
+    assert parse_predicate("a  in ('x',\n 'y')") == parse_predicate("a in ('x', 'y')")
+    assert to_sql(parse_predicate("a  in ('x',\n 'y')")) == "a IN ('x', 'y')"
+
+
+def test_unbalanced_predicate_raises():
+    with pytest.raises(PredicateParseError, match="Expected '\\)'"):
+        parse_predicate("a in ('x'")
+
+
+def test_value_sets_merges_or_memberships():
+    sets = value_sets(parse_predicate("Dept in ('A') or Dept = 'B' or Plant = '1101'"))
+    assert sets.combinator == 'OR'
+    assert sets.as_dict() == {'Dept': frozenset({'A', 'B'}), 'Plant': frozenset({'1101'})}
+    assert value_sets(parse_predicate("Dept like 'A%'")) is None
+
+
+@pytest.mark.parametrize("old, new, change, added, removed", [
+    ("Dept in ('A')", "Dept   in ('A', 'B')", EXPANDED, (('Dept', ('B',)),), ()),
+    ("Dept in ('A','B')", "Dept in ('A')", RESTRICTED, (), (('Dept', ('B',)),)),
+    ("Dept in ('A','B')", "Dept in ('A','C')", MIXED, (('Dept', ('C',)),), (('Dept', ('B',)),)),
+    ("Dept in ('A')", "Dept  in ( 'A' )", EQUIVALENT, (), ()),
+    ("a = 1 and b = 2", "a = 1", EXPANDED, (), ()),
+    ("a like 'x%'", "a like 'y%'", UNKNOWN, (), ()),
+])
+def test_compare_predicates(old, new, change, added, removed):
+    diff = compare_predicates(old, new)
+    assert (diff.change, diff.added, diff.removed) == (change, added, removed)
+
+
+def test_compare_with_always_true():
+    diff = compare_predicates("Dept in ('A')", "1=1")
+    assert diff.change == EXPANDED
+    assert diff.new_always_true and not diff.old_always_true